@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 命令行入口 (python -m c_drive_cleaner)
+"""
+
+import multiprocessing
+import sys
+import os
+
+# 添加当前目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 基准测试（不是单元测试，运行方式见 run.py）
+"""
@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 扫描/清理热路径基准测试
+
+在合成目录树上测量扫描计划、增量索引、并发删除和空目录修剪的吞吐量，
+每个用例在独立子进程中运行，以便单独统计峰值内存。可在普通 Linux 的 tmpfs 上运行。
+
+用法（在 c_drive_cleaner 目录下）:
+    python benchmarks/run.py                      # 完整规模，与 baselines.json 对比
+    python benchmarks/run.py --scale 0.05         # 小规模快速运行
+    python benchmarks/run.py --case scan_flat_temp --syscalls
+    python benchmarks/run.py --scale 0.05 --save-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# 添加程序目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import TreeStats, generate
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# 扫描用例共用的目录树，在父进程中生成一次
+SCAN_TREES = ("flat_temp", "node_modules_farm", "mixed_logs")
+
+# DirEntry.stat 的计数标签
+ENTRY_STAT = "entry_stat"
+
+
+# ---------- 系统调用计数 ----------
+
+class _Counts:
+    """线程安全的计数表：被测代码在多个遍历/删除线程中同时发起调用"""
+
+    def __init__(self):
+        self.values: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + 1
+
+
+class _CountingEntry:
+    """包装 os.DirEntry，统计 stat 调用"""
+
+    __slots__ = ("_entry", "_counts", "name", "path")
+
+    def __init__(self, entry: os.DirEntry, counts: _Counts):
+        self._entry = entry
+        self._counts = counts
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self) -> bool:
+        return self._entry.is_symlink()
+
+    def inode(self) -> int:
+        return self._entry.inode()
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        # 通常由目录列举结果或首次调用的缓存提供，单独计数，不计入系统调用总数
+        self._counts.add(ENTRY_STAT)
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+    def __fspath__(self) -> str:
+        return self.path
+
+
+class _CountingScandir:
+    def __init__(self, it, counts: _Counts):
+        self._it = it
+        self._counts = counts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._it.close()
+
+    def __iter__(self):
+        for entry in self._it:
+            yield _CountingEntry(entry, self._counts)
+
+    def close(self):
+        self._it.close()
+
+
+class SyscallCounter:
+    """
+    统计被测代码经由 os 模块发起的文件系统调用次数
+
+    替换 os 模块中的相关函数；DirEntry.stat 通过包装 scandir 返回的目录项统计，
+    记为 entry_stat（多数情况下不产生系统调用）。计数会带来额外开销，因此与计时分开运行。
+    """
+
+    NAMES = ("stat", "lstat", "remove", "unlink", "rmdir", "listdir", "open")
+
+    def __init__(self):
+        self._counts = _Counts()
+        self._saved = {}
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return dict(self._counts.values)
+
+    def __enter__(self) -> "SyscallCounter":
+        counts = self._counts
+
+        def wrap(name: str, func: Callable):
+            def counted(*args, **kwargs):
+                counts.add(name)
+                return func(*args, **kwargs)
+            return counted
+
+        for name in self.NAMES + ("scandir",):
+            self._saved[name] = getattr(os, name)
+        for name in self.NAMES:
+            setattr(os, name, wrap(name, self._saved[name]))
+
+        real_scandir = self._saved["scandir"]
+
+        def scandir(*args, **kwargs):
+            counts.add("scandir")
+            it = real_scandir(*args, **kwargs)
+            # shutil.rmtree 以文件描述符列举目录，保留原始对象以免影响其内部逻辑
+            if args and isinstance(args[0], int):
+                return it
+            return _CountingScandir(it, counts)
+
+        os.scandir = scandir
+        return self
+
+    def __exit__(self, *exc):
+        for name, func in self._saved.items():
+            setattr(os, name, func)
+
+
+# ---------- 用例 ----------
+
+def _scan_results(item_ids: List[str]):
+    from scanner import ScanResult
+    return {item_id: ScanResult(item_id=item_id, item_name=item_id) for item_id in item_ids}
+
+
+def _run_plan(rules, workers: int, session=None, keep_files: bool = True, size_cache=None):
+    from utils.scan_plan import ScanPlan
+    from utils.walker import TreeWalker, get_dir_size
+
+    results = _scan_results(sorted({rule.item_id for rule in rules}))
+    for rule in rules:
+        results[rule.item_id].roots.append(rule.root)
+    ScanPlan(rules).execute(
+        TreeWalker(workers=workers),
+        results,
+        lambda path: get_dir_size(path, workers=1),
+        session=session,
+        keep_files=keep_files,
+        size_cache=size_cache,
+        size_workers=workers
+    )
+    return results
+
+
+def _file_rule(root: str, extensions):
+    from utils.scan_plan import FileRule
+    return FileRule("bench", root, extensions)
+
+
+def _dev_rule(root: str):
+    from config import AGE_THRESHOLD_DAYS, DEVELOPER_CLEAN_RULES
+    from scanner import DEVELOPER_SKIP_DIRS
+    from utils.scan_plan import DirRule
+    return DirRule(
+        "bench", root, DEVELOPER_CLEAN_RULES, AGE_THRESHOLD_DAYS * 24 * 3600,
+        max_depth=6, skip_dirs=DEVELOPER_SKIP_DIRS, now=time.time()
+    )
+
+
+class Case:
+    """
+    基准用例
+
+    prepare 在计时前执行（如生成待删除的目录树），run 为被测代码，
+    返回值为目录树的 (文件数, 目录数)，吞吐量统一按目录树规模计算，便于不同版本之间比较。
+    """
+
+    def __init__(self, name: str, tree: str, prepare: Callable = None, run: Callable = None):
+        self.name = name
+        self.tree = tree
+        self.prepare = prepare
+        self.run = run
+
+
+def _case_scan(name: str, tree: str, rule_factory: Callable[[str], object]) -> Case:
+    def run(ctx):
+        _run_plan([rule_factory(ctx["root"])], ctx["workers"])
+        return ctx["stats"].files, ctx["stats"].dirs
+    return Case(name, tree, run=run)
+
+
+def _case_scan_indexed() -> Case:
+    """增量索引命中时的扫描：先完整扫描一次写入索引，再计时第二次"""
+    def prepare(ctx):
+        from utils.scan_index import ScanIndex
+        ctx["index"] = ScanIndex(os.path.join(ctx["work"], "index.db"))
+        session = ctx["index"].session("bench")
+        _run_plan([_file_rule(ctx["root"], [".log", ".tmp"])], ctx["workers"], session)
+        session.commit()
+
+    def run(ctx):
+        session = ctx["index"].session("bench")
+        _run_plan([_file_rule(ctx["root"], [".log", ".tmp"])], ctx["workers"], session)
+        return ctx["stats"].files, ctx["stats"].dirs
+    return Case("scan_mixed_logs_indexed", "mixed_logs", prepare, run)
+
+
+def _case_scan_sizes_cached() -> Case:
+    """目录大小缓存命中时的开发者目录扫描：先完整扫描一次写入缓存，再计时第二次"""
+    def prepare(ctx):
+        from utils.scan_index import ScanIndex
+        ctx["index"] = ScanIndex(os.path.join(ctx["work"], "index.db"))
+        cache = ctx["index"].size_cache()
+        _run_plan([_dev_rule(ctx["root"])], ctx["workers"], size_cache=cache)
+        cache.commit()
+
+    def run(ctx):
+        _run_plan([_dev_rule(ctx["root"])], ctx["workers"], size_cache=ctx["index"].size_cache())
+        return ctx["stats"].files, ctx["stats"].dirs
+    return Case("scan_node_modules_farm_cached", "node_modules_farm", prepare, run)
+
+
+def _case_clean(name: str, tree: str, rule_factory: Callable[[str], object]) -> Case:
+    """在独立的目录树副本上扫描（不计时）后计时删除与空目录修剪"""
+    def prepare(ctx):
+        root = os.path.join(ctx["work"], "clean")
+        ctx["clean_stats"] = generate(tree, root, ctx["scale"], ctx["seed"])
+        ctx["result"] = _run_plan([rule_factory(root)], ctx["workers"])["bench"]
+
+    def run(ctx):
+        from cleaner import Cleaner
+        cleaner = Cleaner(delete_workers=ctx["workers"])
+        cleaner._clean_files("bench", ctx["result"])
+        return ctx["clean_stats"].files, ctx["clean_stats"].dirs
+    return Case(name, None, prepare, run)
+
+
+CASES: Dict[str, Case] = {
+    case.name: case for case in (
+        _case_scan("scan_flat_temp", "flat_temp", lambda root: _file_rule(root, [".tmp"])),
+        _case_scan("scan_node_modules_farm", "node_modules_farm", _dev_rule),
+        _case_scan("scan_mixed_logs", "mixed_logs", lambda root: _file_rule(root, [".log", ".tmp", ".etl", ".dmp"])),
+        _case_scan_indexed(),
+        _case_scan_sizes_cached(),
+        _case_clean("clean_flat_temp", "flat_temp", lambda root: _file_rule(root, [".tmp"])),
+        _case_clean("clean_node_modules_farm", "node_modules_farm", _dev_rule),
+        _case_clean("clean_mixed_logs", "mixed_logs", lambda root: _file_rule(root, [".log", ".tmp", ".etl", ".dmp"])),
+    )
+}
+
+
+# ---------- 子进程 ----------
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(args) -> dict:
+    """在子进程中执行单个用例并返回测量结果"""
+    case = CASES[args.child]
+    with open(os.path.join(args.root, "trees.json"), encoding="utf-8") as f:
+        trees = json.load(f)
+    work = tempfile.mkdtemp(prefix=f"{case.name}-", dir=args.root)
+    ctx = {
+        "root": os.path.join(args.root, case.tree) if case.tree else None,
+        "stats": TreeStats(**trees[case.tree]) if case.tree else None,
+        "work": work,
+        "scale": args.scale,
+        "seed": args.seed,
+        "workers": args.workers,
+    }
+
+    try:
+        if case.prepare:
+            case.prepare(ctx)
+
+        if args.syscalls:
+            with SyscallCounter() as counter:
+                case.run(ctx)
+            return {"syscalls": counter.counts}
+
+        start = time.perf_counter()
+        files, dirs = case.run(ctx)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    return {
+        "elapsed": round(elapsed, 4),
+        "files": files,
+        "dirs": dirs,
+        "files_per_sec": round(files / elapsed) if elapsed else 0,
+        "dirs_per_sec": round(dirs / elapsed) if elapsed else 0,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def _spawn(case: str, args, syscalls: bool) -> dict:
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", case,
+        "--root", args.root, "--scale", str(args.scale), "--seed", str(args.seed),
+        "--workers", str(args.workers),
+    ]
+    if syscalls:
+        command.append("--syscalls")
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# ---------- 报告 ----------
+
+def _baseline_key(args) -> str:
+    return f"scale={args.scale:g},workers={args.workers}"
+
+
+def _load_baselines() -> dict:
+    try:
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _delta(current: float, baseline: Optional[float]) -> str:
+    if not baseline:
+        return ""
+    return f" ({(current - baseline) / baseline * 100:+.0f}%)"
+
+
+def _report(results: Dict[str, dict], baseline: Dict[str, dict]):
+    print(f"{'用例':<28}{'文件/秒':>16}{'目录/秒':>16}{'峰值内存MB':>16}{'系统调用':>12}")
+    for name, metrics in results.items():
+        base = baseline.get(name, {})
+        syscalls = sum(count for name, count in metrics.get("syscalls", {}).items() if name != ENTRY_STAT)
+        print(
+            f"{name:<28}"
+            f"{metrics['files_per_sec']:>10}{_delta(metrics['files_per_sec'], base.get('files_per_sec')):>8}"
+            f"{metrics['dirs_per_sec']:>10}{_delta(metrics['dirs_per_sec'], base.get('dirs_per_sec')):>8}"
+            f"{metrics['peak_rss_mb']:>10}{_delta(metrics['peak_rss_mb'], base.get('peak_rss_mb')):>8}"
+            f"{syscalls if syscalls else '-':>12}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="扫描/清理热路径基准测试")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="只运行指定用例（可重复）")
+    parser.add_argument("--scale", type=float, default=1.0, help="目录树规模系数（默认 1.0）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=4, help="遍历/删除线程数")
+    parser.add_argument("--root", default=None, help="生成目录树的位置（默认 /dev/shm 或系统临时目录）")
+    parser.add_argument("--syscalls", action="store_true", help="额外运行一次并统计系统调用次数")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入 baselines.json")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return 0
+
+    base_dir = args.root or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+    args.root = tempfile.mkdtemp(prefix="cdc-bench-", dir=base_dir)
+    names = args.case or list(CASES)
+
+    try:
+        trees = {}
+        for tree in SCAN_TREES:
+            if any(CASES[name].tree == tree for name in names):
+                stats = generate(tree, os.path.join(args.root, tree), args.scale, args.seed)
+                trees[tree] = stats.__dict__
+        with open(os.path.join(args.root, "trees.json"), "w", encoding="utf-8") as f:
+            json.dump(trees, f)
+
+        results: Dict[str, dict] = {}
+        for position, name in enumerate(names):
+            results[name] = _spawn(name, args, syscalls=False)
+            if args.syscalls:
+                results[name]["syscalls"] = _spawn(name, args, syscalls=True)["syscalls"]
+            # 不再使用的共享目录树立即删除，tmpfs 的 inode 数量有限
+            tree = CASES[name].tree
+            if tree and all(CASES[later].tree != tree for later in names[position + 1:]):
+                shutil.rmtree(os.path.join(args.root, tree), ignore_errors=True)
+    finally:
+        shutil.rmtree(args.root, ignore_errors=True)
+
+    baselines = _load_baselines()
+    key = _baseline_key(args)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print(f"{platform.platform()} | Python {platform.python_version()} | {key}")
+        _report(results, baselines.get(key, {}))
+
+    if args.save_baseline:
+        baselines.setdefault(key, {}).update(results)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 基准测试用的合成目录树
+以固定随机种子生成可复现的目录树，模拟典型的垃圾文件分布
+"""
+
+import os
+import random
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict
+
+
+# 超过开发者清理阈值（180 天）的修改时间
+_STALE_AGE = 400 * 24 * 3600
+
+
+@dataclass
+class TreeStats:
+    """生成的目录树规模"""
+    files: int = 0
+    dirs: int = 0
+    bytes: int = 0
+
+
+class _Builder:
+    def __init__(self, root: str, seed: int):
+        self.root = root
+        self.rng = random.Random(seed)
+        self.stats = TreeStats()
+
+    def mkdir(self, path: str):
+        os.mkdir(path)
+        self.stats.dirs += 1
+
+    def write(self, path: str, max_size: int = 256):
+        size = self.rng.randint(0, max_size)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        self.stats.files += 1
+        self.stats.bytes += size
+
+
+def _flat_temp(b: _Builder, scale: float):
+    """平铺的临时目录：少量目录、每个目录大量文件（默认共 50 万个）"""
+    dirs = 5
+    per_dir = max(1, int(100_000 * scale))
+    extensions = (".tmp", ".tmp", ".tmp", ".log", ".dat")
+    for d in range(dirs):
+        directory = os.path.join(b.root, f"Temp{d}")
+        b.mkdir(directory)
+        for i in range(per_dir):
+            b.write(os.path.join(directory, f"~tmp{i:06d}{b.rng.choice(extensions)}"))
+
+
+def _node_modules_farm(b: _Builder, scale: float):
+    """开发者项目目录：每个项目含多层嵌套的 node_modules，半数项目已过期"""
+    projects = max(2, int(100 * scale))
+    stale = time.time() - _STALE_AGE
+
+    def packages(parent: str, depth: int):
+        for p in range(4 if depth < 3 else 2):
+            package = os.path.join(parent, f"pkg{depth}_{p}")
+            b.mkdir(package)
+            for f in range(6):
+                b.write(os.path.join(package, f"index{f}.js"), 2048)
+            if depth < 3:
+                nested = os.path.join(package, "node_modules")
+                b.mkdir(nested)
+                packages(nested, depth + 1)
+
+    for i in range(projects):
+        project = os.path.join(b.root, "code", f"group{i % 10}", f"project{i}")
+        os.makedirs(os.path.dirname(project), exist_ok=True)
+        b.mkdir(project)
+        for f in range(5):
+            b.write(os.path.join(project, f"src{f}.ts"), 4096)
+        modules = os.path.join(project, "node_modules")
+        b.mkdir(modules)
+        packages(modules, 0)
+        if i % 2 == 0:
+            os.utime(modules, (stale, stale))
+
+
+def _mixed_logs(b: _Builder, scale: float):
+    """多层嵌套的日志目录，混合多种扩展名"""
+    fanout = 6
+    depth = 4
+    per_dir = max(1, int(20 * scale))
+    extensions = (".log", ".tmp", ".txt", ".dat", ".etl", ".dmp", ".old", ".json")
+
+    def fill(directory: str, level: int):
+        for i in range(per_dir):
+            b.write(os.path.join(directory, f"f{i}{b.rng.choice(extensions)}"), 1024)
+        if level == depth:
+            return
+        for c in range(fanout):
+            child = os.path.join(directory, f"d{c}")
+            b.mkdir(child)
+            fill(child, level + 1)
+
+    fill(b.root, 0)
+
+
+PROFILES: Dict[str, Callable[[_Builder, float], None]] = {
+    "flat_temp": _flat_temp,
+    "node_modules_farm": _node_modules_farm,
+    "mixed_logs": _mixed_logs,
+}
+
+
+def generate(profile: str, root: str, scale: float = 1.0, seed: int = 0) -> TreeStats:
+    """
+    生成合成目录树（目标目录已存在时先删除）
+
+    Args:
+        profile: 目录树类型，见 PROFILES
+        root: 目标目录
+        scale: 规模系数，1.0 为完整规模
+        seed: 随机种子，相同参数生成完全相同的目录树
+
+    Returns:
+        生成的文件数、目录数和字节数
+    """
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    os.makedirs(root)
+    builder = _Builder(root, seed)
+    PROFILES[profile](builder, scale)
+    return builder.stats
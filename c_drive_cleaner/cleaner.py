@@ -6,13 +6,25 @@ C盘清理工具 - 清理模块
 
 import os
 import shutil
+import stat
 import ctypes
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Callable, Optional
+from typing import Dict, Iterable, Iterator, List, Callable, Optional
 from dataclasses import dataclass
 
-from scanner import ScanResult
+from scanner import ScanBatch, ScanResult
+from utils.duplicates import FileInfo
 from config import CLEANUP_ITEMS
+from utils.pathstore import KIND_DIR, KIND_FILE, KIND_UNKNOWN, PathRecord, PathStore
+from utils.scan_index import LockedFileMemory
+from utils.dir_pruner import EmptyDirPruner
+from utils.dir_tree import DirTree
+from utils.drives import get_drive_registry
+from utils.metrics import ItemMetrics
+from utils.reclaim import ReclaimStager
+from utils.walker import get_dir_size
 
 
 @dataclass
@@ -24,10 +36,51 @@ class CleanResult:
     cleaned_count: int = 0
     failed_count: int = 0
     errors: List[str] = None
+    metrics: ItemMetrics = None
+    # 其中移入暂存区、等待后台删除的字节数（即时回收模式）
+    staged_size: int = 0
     
     def __post_init__(self):
         if self.errors is None:
             self.errors = []
+        if self.metrics is None:
+            self.metrics = ItemMetrics()
+
+
+class _BatchOutcome:
+    """单个删除批次的统计结果"""
+    
+    # 每个批次最多保留的日志样例数
+    MAX_SAMPLES = 3
+    
+    def __init__(self):
+        self.processed = 0
+        self.cleaned_size = 0
+        self.cleaned_count = 0
+        self.failed_count = 0
+        self.staged_size = 0
+        self.samples: List[tuple] = []
+        self.sampled_cleaned = 0
+        self.sampled_failed = 0
+        self.stat_calls = 0
+        self.permission_denied = 0
+        self.os_errors = 0
+        # 因已知被占用而跳过的文件数
+        self.locked_skipped = 0
+        # 本批次中因被占用而删除失败的文件: (路径, 文件 ID, 修改时间)
+        self.locked = []
+        # 有内容被删除的目录
+        self.parents = set()
+    
+    def sample(self, kind: str, file_path: str):
+        """记录日志样例：kind 为 file/dir/staged（成功）、locked/error（失败）或 changed/original（跳过）"""
+        if len(self.samples) >= self.MAX_SAMPLES:
+            return
+        self.samples.append((kind, file_path))
+        if kind in ("file", "dir", "staged"):
+            self.sampled_cleaned += 1
+        elif kind not in ("changed", "original"):
+            self.sampled_failed += 1
 
 
 class Cleaner:
@@ -36,7 +89,13 @@ class Cleaner:
     def __init__(
         self, 
         progress_callback: Callable[[str, int, int], None] = None,
-        log_callback: Callable[[str], None] = None
+        log_callback: Callable[[str], None] = None,
+        delete_workers: int = 4,
+        batch_size: int = 256,
+        verify: bool = True,
+        dir_tree: Optional[DirTree] = None,
+        locked: Optional[LockedFileMemory] = None,
+        stager: Optional[ReclaimStager] = None
     ):
         """
         初始化清理器
@@ -44,9 +103,27 @@ class Cleaner:
         Args:
             progress_callback: 进度回调函数，参数为(项目名称, 当前进度, 总进度)
             log_callback: 日志回调函数，参数为(日志信息)
+            delete_workers: 并发删除的线程数
+            batch_size: 每个删除批次包含的路径数
+            verify: 删除前是否确认文件自扫描以来未被修改或替换
+            dir_tree: 扫描时建立的目录聚合表，已完整遍历的目录直接查表得到大小
+            locked: 被占用文件的记录：已知被占用且未变化的文件直接跳过，本次因占用失败的文件写入其中
+            stager: 即时回收暂存区：设置后，标记了 instant_reclaim 的清理项整目录移入暂存区即算完成，
+                由后台线程删除
         """
         self.progress_callback = progress_callback
         self.log_callback = log_callback
+        self.delete_workers = max(1, delete_workers)
+        self.batch_size = max(1, batch_size)
+        self.verify = verify
+        self.dir_tree = dir_tree
+        self.locked = locked
+        self.stager = stager
+        # 本次清理累计处理的路径数与释放的字节数，供界面计算实时吞吐量
+        self.processed_count = 0
+        self.freed_bytes = 0
+        # 最近一次清理的结果，清理被中断（如 KeyboardInterrupt）时保留已完成的部分
+        self.results: Dict[str, CleanResult] = {}
         self._cancelled = False
     
     def _log(self, message: str):
@@ -67,7 +144,10 @@ class Cleaner:
         执行清理操作
         """
         self._cancelled = False
+        self.processed_count = 0
+        self.freed_bytes = 0
         results: Dict[str, CleanResult] = {}
+        self.results = results
         
         # 计算总文件数
         total_files = sum(
@@ -87,10 +167,7 @@ class Cleaner:
             scan_result = scan_results[item_id]
             
             # 获取清理项配置
-            item_config = next(
-                (item for item in CLEANUP_ITEMS if item["id"] == item_id), 
-                None
-            )
+            item_config = self._item_config(item_id)
             
             if not item_config:
                 continue
@@ -112,8 +189,114 @@ class Cleaner:
             
             results[item_id] = result
         
+        self._commit_locked()
+        return results
+    
+    def clean_stream(
+        self,
+        batches: Iterable[ScanBatch],
+        selected_ids: List[str]
+    ) -> Dict[str, CleanResult]:
+        """
+        流式清理：消费 Scanner.iter_scan 的输出，边扫描边删除
+        
+        扫描较快的清理项可以先开始删除，不必等待全部扫描结束，
+        也不需要在内存中保存完整的路径列表。进度的总数随扫描结果增长。
+        
+        Args:
+            batches: 扫描批次
+            selected_ids: 需要清理的项目ID
+            
+        Returns:
+            各项目的清理结果
+        """
+        self._cancelled = False
+        self.processed_count = 0
+        self.freed_bytes = 0
+        results: Dict[str, CleanResult] = {}
+        self.results = results
+        selected = set(selected_ids)
+        found_files = 0
+        cleaned_files = 0
+        # 各清理项有内容被删除的目录，扫描完成得到根目录后统一修剪
+        touched: Dict[str, set] = {}
+        # 各清理项开始清理的时间
+        started: Dict[str, float] = {}
+        
+        try:
+            for batch in batches:
+                if self._cancelled:
+                    break
+                
+                if batch.item_id not in selected:
+                    continue
+                
+                item_config = self._item_config(batch.item_id)
+                if not item_config:
+                    continue
+                
+                # 回收站只能整体清空，等扫描完成后处理
+                if item_config.get("special") == "recycle_bin":
+                    if batch.done:
+                        results[batch.item_id] = self._clean_recycle_bin(batch.item_id, batch.item_name)
+                    continue
+                
+                result = results.get(batch.item_id)
+                if result is None:
+                    result = results[batch.item_id] = CleanResult(item_id=batch.item_id, item_name=batch.item_name)
+                    started[batch.item_id] = time.monotonic()
+                    self._log(f"开始清理 {batch.item_name}")
+                
+                if len(batch.files):
+                    found_files += len(batch.files)
+                    base = cleaned_files
+                    self._delete_files(
+                        batch.files,
+                        result,
+                        lambda count: self._update_progress(batch.item_name, base + count, found_files),
+                        touched.setdefault(batch.item_id, set()),
+                        self._instant(batch.item_id),
+                        originals=batch.originals
+                    )
+                    cleaned_files += len(batch.files)
+                
+                if batch.done:
+                    self._log_item_done(result)
+                    if batch.result is not None:
+                        self._clean_empty_dirs(batch.result.roots, touched.pop(batch.item_id, ()), result)
+                    self._finish_metrics(result, started[batch.item_id])
+        finally:
+            # 提前结束时关闭生成器，从而取消仍在进行的扫描
+            close = getattr(batches, "close", None)
+            if close:
+                close()
+            self._commit_locked()
+        
         return results
     
+    def _commit_locked(self):
+        """写回被占用文件的记录，失败时只影响下次是否跳过"""
+        if self.locked is None:
+            return
+        try:
+            self.locked.commit()
+        except Exception:
+            pass
+    
+    def _item_config(self, item_id: str) -> Optional[dict]:
+        """获取清理项配置"""
+        return next(
+            (item for item in CLEANUP_ITEMS if item["id"] == item_id), 
+            None
+        )
+    
+    def _instant(self, item_id: str) -> bool:
+        """清理项是否使用即时回收"""
+        if self.stager is None:
+            return False
+        item_config = self._item_config(item_id)
+        return bool(item_config and item_config.get("instant_reclaim"))
+    
     def _update_progress(self, item_name: str, current: int, total: int):
         """更新进度"""
         if self.progress_callback:
@@ -129,91 +312,352 @@ class Cleaner:
         清理文件列表
         """
         result = CleanResult(item_id=item_id, item_name=scan_result.item_name)
+        started = time.monotonic()
+        
+        self._log(f"开始清理 {scan_result.item_name}，共 {len(scan_result.files)} 个文件")
+        
+        touched = set()
+        files = scan_result.files
+        stage = self._instant(item_id)
+        if stage and scan_result.whole_roots:
+            files = self._stage_children(scan_result, result)
+        self._delete_files(
+            files, result, progress_update, touched, stage, len(scan_result.files) - len(files), scan_result.originals
+        )
+        
+        self._log_item_done(result)
+        
+        self._clean_empty_dirs(scan_result.roots, touched, result)
+        self._finish_metrics(result, started)
+        return result
+    
+    def _stage_children(self, scan_result: ScanResult, result: CleanResult) -> PathStore:
+        """
+        即时回收：把根目录下的每个子目录整体移入暂存区
+        
+        只用于覆盖了根目录下全部文件的扫描结果（见 ScanResult.whole_roots）。根目录本身
+        （如 Windows\\Temp）保留不动，以免丢失其权限设置；移入暂存区的子目录中的文件
+        不再逐个校验。根目录下直接存放的文件和无法移入暂存区的子目录照常逐个删除。
+        
+        Returns:
+            仍需逐个删除的路径
+        """
+        files = scan_result.files
+        roots = sorted(
+            (os.path.normcase(os.path.normpath(root)).rstrip("\\/") + os.sep for root in scan_result.roots),
+            key=len,
+            reverse=True
+        )
+        # 父目录编号 -> 该目录所在的根目录下第一级子目录（父目录就是根目录时为 None）
+        child_of: List[Optional[str]] = []
+        for parent in files.parents:
+            key = os.path.normcase(parent)
+            child = None
+            for root in roots:
+                if key.startswith(root) and len(key) > len(root):
+                    # 分隔符位置按规范化的 key 查找，名称取自原始路径（normcase 不改变长度）
+                    end = key.find(os.sep, len(root))
+                    child = parent[:end] if end >= 0 else parent
+                    break
+            child_of.append(child)
         
+        groups: Dict[str, List[int]] = {}
+        rest: List[int] = []
+        for index in range(len(files)):
+            child = child_of[files.parent_id_at(index)]
+            if child is None:
+                rest.append(index)
+            else:
+                groups.setdefault(child, []).append(index)
+        
+        staged_count = 0
+        for child, indices in groups.items():
+            size = sum(files.size_at(index) for index in indices)
+            if self._cancelled or not self.stager.stage(child, size, len(indices), result.item_id):
+                rest.extend(indices)
+                continue
+            staged_count += 1
+            result.cleaned_size += size
+            result.staged_size += size
+            result.cleaned_count += len(indices)
+            result.metrics.entries += len(indices)
+            self.processed_count += len(indices)
+            self.freed_bytes += size
+        
+        if not staged_count:
+            return files
+        self._log(f"  {staged_count} 个子目录已移入暂存区")
+        rest.sort()
+        return files.select(rest)
+    
+    def _delete_files(
+        self,
+        files: PathStore,
+        result: CleanResult,
+        progress_update: Callable[[int], None] = None,
+        touched: Optional[set] = None,
+        stage: bool = False,
+        done_before: int = 0,
+        originals: Optional[Dict[str, FileInfo]] = None
+    ):
+        """
+        删除一组文件或目录，结果累加到 result 中
+        
+        路径按批次交给有界线程池并发删除，单个文件删除的系统调用延迟可以相互重叠。
+        
+        Args:
+            files: 待删除的路径
+            result: 清理结果
+            progress_update: 进度回调，参数为本组已处理的数量
+            touched: 收集有内容被删除的目录，供之后修剪空目录
+            stage: 整目录记录是否移入即时回收暂存区
+            done_before: 调用前已处理（如已移入暂存区）的数量，计入进度
+            originals: 重复文件副本路径 -> 原件，原件已不存在或已变化的副本不删除
+        """
+        total = len(files) + done_before
+        stage_as = result.item_id if stage else None
         # 批量更新进度，减少UI回调频率
-        update_interval = max(1, len(scan_result.files) // 100)
+        update_interval = max(1, total // 100)
+        processed = done_before
+        last_bucket = -1
+        in_flight = set()
+        if progress_update and done_before:
+            progress_update(done_before)
         
-        self._log(f"开始清理 {scan_result.item_name}，共 {len(scan_result.files)} 个文件")
+        def collect(done):
+            nonlocal processed, last_bucket
+            for future in done:
+                outcome = future.result()
+                processed += outcome.processed
+                self._apply_outcome(outcome, result)
+                if touched is not None:
+                    touched.update(outcome.parents)
+            
+            bucket = processed // update_interval
+            if progress_update and (bucket != last_bucket or processed == total):
+                last_bucket = bucket
+                progress_update(processed)
         
-        for index, file_path in enumerate(scan_result.files):
+        with ThreadPoolExecutor(max_workers=self.delete_workers, thread_name_prefix="clean") as pool:
+            for batch in self._batches(files):
+                if self._cancelled:
+                    break
+                in_flight.add(pool.submit(self._delete_batch, batch, stage_as, originals))
+                # 限制排队的批次数，避免一次性展开全部路径
+                if len(in_flight) >= self.delete_workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+            
+            if in_flight:
+                done, _ = wait(in_flight)
+                collect(done)
+    
+    def _batches(self, files: PathStore) -> Iterator[List[PathRecord]]:
+        """把路径记录切分为固定大小的批次"""
+        batch = []
+        for record in files.records():
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def _delete_batch(
+        self,
+        records: List[PathRecord],
+        stage_as: Optional[str] = None,
+        originals: Optional[Dict[str, FileInfo]] = None
+    ) -> "_BatchOutcome":
+        """
+        在工作线程中删除一批路径
+        
+        优先使用扫描时记录的类型和大小：不开启校验时每个文件只有一次删除调用，
+        开启校验时额外一次 lstat，确认修改时间和文件 ID 与扫描时一致。
+        stage_as 不为 None 时目录先尝试移入暂存区（记在该清理项下），失败时照常删除。
+        originals 中有原件的副本（重复文件），无论是否开启校验都先确认原件仍在且未变化。
+        """
+        outcome = _BatchOutcome()
+        locked = self.locked
+        
+        for record in records:
             if self._cancelled:
                 break
+            outcome.processed += 1
+            file_path = record.path
+            kind = record.kind
+            size = record.size
+            st = None
             
-            try:
-                if not os.path.exists(file_path):
+            if locked is not None and kind == KIND_FILE and locked.is_locked(file_path, record.file_id, record.mtime):
+                # 上次删除时被占用且之后未变化，不再重复尝试
+                outcome.locked_skipped += 1
+                continue
+            
+            original = originals.get(file_path) if originals else None
+            if original is not None:
+                outcome.stat_calls += 1
+                if not self._is_original_intact(original):
+                    # 删除副本会丢失唯一的一份内容
+                    outcome.sample("original", file_path)
                     continue
-                    
-                if os.path.isfile(file_path):
-                    size = os.path.getsize(file_path)
+            
+            try:
+                if kind == KIND_UNKNOWN or self.verify:
+                    outcome.stat_calls += 1
+                    st = os.lstat(file_path)
+                    is_dir = stat.S_ISDIR(st.st_mode)
+                    if kind == KIND_UNKNOWN:
+                        kind = KIND_DIR if is_dir else KIND_FILE
+                        size = self._get_dir_size(file_path) if is_dir else st.st_size
+                    elif not self._is_unchanged(record, st, is_dir):
+                        # 扫描之后已被替换或修改，不能再按扫描结果删除
+                        outcome.sample("changed", file_path)
+                        continue
+                
+                if kind == KIND_FILE:
                     os.remove(file_path)
-                    result.cleaned_size += size
-                    result.cleaned_count += 1
-                    if index < 3: 
-                        self._log(f"  √ 已删除: ...{os.path.basename(file_path)}")
-                elif os.path.isdir(file_path):
-                    size = self._get_dir_size(file_path)
+                    outcome.cleaned_size += size
+                    outcome.cleaned_count += 1
+                    outcome.parents.add(os.path.dirname(file_path))
+                    outcome.sample("file", file_path)
+                elif stage_as is not None and self.stager.stage(file_path, size, 1, stage_as):
+                    outcome.cleaned_size += size
+                    outcome.staged_size += size
+                    outcome.cleaned_count += 1
+                    outcome.parents.add(os.path.dirname(file_path))
+                    outcome.sample("staged", file_path)
+                else:
                     shutil.rmtree(file_path, ignore_errors=True)
-                    result.cleaned_size += size
-                    result.cleaned_count += 1
-                    if index < 3:
-                        self._log(f"  √ 已删除目录: {os.path.basename(file_path)}")
+                    outcome.cleaned_size += size
+                    outcome.cleaned_count += 1
+                    outcome.parents.add(os.path.dirname(file_path))
+                    outcome.sample("dir", file_path)
                     
+            except FileNotFoundError:
+                # 扫描之后已被其他程序删除
+                continue
             except PermissionError:
-                result.failed_count += 1
-                if index < 2:
-                    self._log(f"  × 权限不足(文件正在使用): {os.path.basename(file_path)}")
+                outcome.failed_count += 1
+                outcome.permission_denied += 1
+                outcome.sample("locked", file_path)
+                if locked is not None and kind == KIND_FILE:
+                    if st is not None:
+                        outcome.locked.append((file_path, st.st_ino, st.st_mtime))
+                    else:
+                        outcome.locked.append((file_path, record.file_id, record.mtime))
             except Exception as e:
+                outcome.failed_count += 1
+                if isinstance(e, OSError):
+                    outcome.os_errors += 1
+                outcome.sample("error", file_path)
+        
+        return outcome
+    
+    @staticmethod
+    def _is_unchanged(record: PathRecord, st: os.stat_result, is_dir: bool) -> bool:
+        """检查路径的类型、修改时间和文件 ID 是否与扫描时一致（未记录的字段不参与比较）"""
+        if is_dir != (record.kind == KIND_DIR):
+            return False
+        if record.mtime and st.st_mtime != record.mtime:
+            return False
+        if record.file_id and st.st_ino and st.st_ino != record.file_id:
+            return False
+        return True
+    
+    @staticmethod
+    def _is_original_intact(original: FileInfo) -> bool:
+        """重复文件的原件是否仍然存在，且大小、修改时间（以及记录了的文件 ID）与扫描时一致"""
+        try:
+            st = os.stat(original.path, follow_symlinks=False)
+        except OSError:
+            return False
+        if not stat.S_ISREG(st.st_mode) or st.st_size != original.size or st.st_mtime != original.mtime:
+            return False
+        if original.file_id and st.st_ino and st.st_ino != original.file_id:
+            return False
+        return True
+    
+    def _apply_outcome(self, outcome: "_BatchOutcome", result: CleanResult):
+        """把一个批次的结果累加到清理结果中，并输出前几条日志"""
+        for kind, file_path in outcome.samples:
+            name = os.path.basename(file_path)
+            if kind in ("file", "dir", "staged"):
+                result.cleaned_count += 1
+                if result.cleaned_count > 3:
+                    continue
+                if kind == "file":
+                    self._log(f"  √ 已删除: ...{name}")
+                elif kind == "staged":
+                    self._log(f"  √ 已移入暂存区: {name}")
+                else:
+                    self._log(f"  √ 已删除目录: {name}")
+            elif kind == "changed":
+                self._log(f"  - 扫描后已变化，跳过: {name}")
+            elif kind == "original":
+                self._log(f"  - 原件已不存在或已变化，保留副本: {name}")
+            else:
                 result.failed_count += 1
-                if index < 2:
-                    self._log(f"  × 删除失败: {os.path.basename(file_path)}")
-            
-            if progress_update and (index % update_interval == 0 or index == len(scan_result.files) - 1):
-                progress_update(index + 1)
+                if result.failed_count > 2:
+                    continue
+                if kind == "locked":
+                    self._log(f"  × 权限不足(文件正在使用): {name}")
+                else:
+                    self._log(f"  × 删除失败: {name}")
         
-        from scanner import format_size
-        self._log(f"完成 {scan_result.item_name}: 成功 {result.cleaned_count}，失败 {result.failed_count}，释放 {format_size(result.cleaned_size)}")
+        metrics = result.metrics
+        metrics.entries += outcome.processed
+        metrics.stat_calls += outcome.stat_calls
+        metrics.permission_denied += outcome.permission_denied
+        metrics.os_errors += outcome.os_errors
+        metrics.locked_skipped += outcome.locked_skipped
+        for file_path, file_id, mtime in outcome.locked:
+            self.locked.add(file_path, file_id, mtime)
         
-        self._clean_empty_dirs(scan_result)
-        return result
-    
-    def _clean_empty_dirs(self, scan_result: ScanResult):
-        """清理空目录"""
-        # 获取所有涉及的目录
-        dirs = set()
-        for file_path in scan_result.files:
-            parent = os.path.dirname(file_path)
-            while parent:
-                dirs.add(parent)
-                new_parent = os.path.dirname(parent)
-                if new_parent == parent:
-                    break
-                parent = new_parent
+        self.processed_count += outcome.processed
+        self.freed_bytes += outcome.cleaned_size
         
-        # 按路径长度降序排序（先删除深层目录）
-        sorted_dirs = sorted(dirs, key=len, reverse=True)
+        # 样例之外的部分直接累加计数
+        result.cleaned_size += outcome.cleaned_size
+        result.staged_size += outcome.staged_size
+        result.cleaned_count += outcome.cleaned_count - outcome.sampled_cleaned
+        result.failed_count += outcome.failed_count - outcome.sampled_failed
+    
+    def _log_item_done(self, result: CleanResult):
+        from scanner import format_size
+        self._log(f"完成 {result.item_name}: 成功 {result.cleaned_count}，失败 {result.failed_count}，释放 {format_size(result.cleaned_size)}")
+        if result.metrics.locked_skipped:
+            self._log(f"  跳过 {result.metrics.locked_skipped} 个上次被占用且未变化的文件")
+        if result.staged_size:
+            self._log(f"  其中 {format_size(result.staged_size)} 已移入暂存区，将在后台删除")
+    
+    def _clean_empty_dirs(self, roots: List[str], touched: Iterable[str], result: CleanResult = None):
+        """
+        清理空目录
         
-        for dir_path in sorted_dirs:
-            try:
-                if os.path.isdir(dir_path) and not os.listdir(dir_path):
-                    os.rmdir(dir_path)
-            except (PermissionError, OSError):
-                pass
+        Args:
+            roots: 清理项的根目录，只修剪根目录以下的目录
+            touched: 有内容被删除的目录
+            result: 清理结果，提供时记录尝试移除的目录数
+        """
+        pruner = EmptyDirPruner(roots)
+        pruner.add_all(touched)
+        pruner.prune(lambda: self._cancelled)
+        if result is not None:
+            result.metrics.dirs_visited += pruner.attempted
+    
+    @staticmethod
+    def _finish_metrics(result: CleanResult, started: float):
+        result.metrics.wall_time = time.monotonic() - started
+        result.metrics.bytes = result.cleaned_size
     
     def _get_dir_size(self, path: str) -> int:
-        """获取目录大小"""
-        total = 0
-        try:
-            for entry in os.scandir(path):
-                try:
-                    if entry.is_file(follow_symlinks=False):
-                        total += entry.stat().st_size
-                    elif entry.is_dir(follow_symlinks=False):
-                        total += self._get_dir_size(entry.path)
-                except (PermissionError, OSError):
-                    pass
-        except (PermissionError, OSError):
-            pass
-        return total
+        """获取目录大小，聚合表中有完整记录时不再遍历"""
+        if self.dir_tree is not None:
+            size = self.dir_tree.subtree_size(path)
+            if size is not None:
+                return size
+        return get_dir_size(path)
     
     def _clean_recycle_bin(self, item_id: str, item_name: str) -> CleanResult:
         """
@@ -227,6 +671,7 @@ class Cleaner:
             清理结果
         """
         result = CleanResult(item_id=item_id, item_name=item_name)
+        started = time.monotonic()
         
         try:
             # 使用 Windows Shell API 清空回收站
@@ -253,12 +698,13 @@ class Cleaner:
             result.failed_count = 1
             result.errors.append(str(e))
         
+        self._finish_metrics(result, started)
         return result
 
 
 def get_disk_usage(drive: str = "C:") -> dict:
     """
-    获取磁盘使用情况
+    获取磁盘使用情况（短时间内的重复查询直接使用缓存）
     
     Args:
         drive: 驱动器号
@@ -266,19 +712,4 @@ def get_disk_usage(drive: str = "C:") -> dict:
     Returns:
         包含 total, used, free 的字典
     """
-    try:
-        import psutil
-        usage = psutil.disk_usage(drive + "\\")
-        return {
-            "total": usage.total,
-            "used": usage.used,
-            "free": usage.free,
-            "percent": usage.percent
-        }
-    except Exception:
-        return {
-            "total": 0,
-            "used": 0,
-            "free": 0,
-            "percent": 0
-        }
+    return get_drive_registry().usage(drive)
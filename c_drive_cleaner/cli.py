@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 命令行模式
+不加载图形界面，直接驱动 Scanner / Cleaner，以 JSON 或 NDJSON 输出结果，便于脚本批量调用
+
+用法:
+    python -m c_drive_cleaner items [--format ndjson]
+    python -m c_drive_cleaner scan  [--drive C:] [--items user_temp,chrome_cache] [--format ndjson] [--files] [--estimate] [--all-profiles]
+    python -m c_drive_cleaner clean --yes [--drive C:] [--items user_temp] [--format ndjson] [--all-profiles] [--instant]
+    python -m c_drive_cleaner hogs  [--drive C:] [--top 50] [--format ndjson]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from config import CLEANUP_ITEMS, LOCKED_RETRY_HOURS, SCAN_INDEX_PATH, SPACE_HOGS_TOP_N
+
+
+class _Output:
+    """
+    结果输出
+
+    ndjson 格式每个事件立即输出一行；json 格式只在结束时输出一个完整文档，
+    过程中的日志写到标准错误。
+    """
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+
+    def event(self, kind: str, **data):
+        if self.fmt != "ndjson":
+            return
+        self._write({"event": kind, **data})
+
+    def log(self, message: str):
+        if self.fmt == "ndjson":
+            self._write({"event": "log", "message": message})
+        else:
+            print(message, file=sys.stderr, flush=True)
+
+    def document(self, data: dict):
+        if self.fmt == "json":
+            print(json.dumps(data, ensure_ascii=False, indent=2), flush=True)
+
+    @staticmethod
+    def _write(data: dict):
+        sys.stdout.write(json.dumps(data, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+
+def _parse_items(value: Optional[str]) -> Optional[List[str]]:
+    """解析逗号分隔的清理项 ID，未知 ID 时报错"""
+    if not value:
+        return None
+    ids = [part.strip() for part in value.split(",") if part.strip()]
+    known = {item["id"] for item in CLEANUP_ITEMS}
+    unknown = [item_id for item_id in ids if item_id not in known]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"未知的清理项: {', '.join(unknown)}（可用 items 命令查看）")
+    return ids
+
+
+def _parse_drive(value: str) -> str:
+    drive = value.strip().upper().rstrip("\\/")
+    if drive == "ALL":
+        return drive
+    if len(drive) == 1:
+        drive += ":"
+    if len(drive) != 2 or not drive[0].isalpha() or drive[1] != ":":
+        raise argparse.ArgumentTypeError(f"无效的盘符: {value}")
+    return drive
+
+
+def _open_index(args):
+    """打开增量扫描索引，失败时退化为完整扫描"""
+    if args.no_index:
+        return None
+    try:
+        from utils.scan_index import ScanIndex
+        return ScanIndex(SCAN_INDEX_PATH)
+    except Exception:
+        return None
+
+
+def _scan_record(result) -> dict:
+    record = {
+        "id": result.item_id,
+        "name": result.item_name,
+        "size": result.total_size,
+        "count": result.file_count,
+        "complete": result.complete,
+        "error": result.error,
+        "metrics": result.metrics.to_dict(),
+    }
+    if result.by_profile:
+        record["profiles"] = {
+            name: {"size": size, "count": count} for name, (size, count) in sorted(result.by_profile.items())
+        }
+    return record
+
+
+def _estimate_record(result) -> dict:
+    estimate = result.estimate
+    return {
+        "id": result.item_id,
+        "name": result.item_name,
+        "size": estimate.size,
+        "low": estimate.low,
+        "high": estimate.high,
+        "count": estimate.file_count,
+        "rounds": estimate.rounds,
+    }
+
+
+def _clean_record(result) -> dict:
+    return {
+        "id": result.item_id,
+        "name": result.item_name,
+        "cleaned_size": result.cleaned_size,
+        "cleaned_count": result.cleaned_count,
+        "failed_count": result.failed_count,
+        "staged_size": result.staged_size,
+        "errors": result.errors,
+        "metrics": result.metrics.to_dict(),
+    }
+
+
+def cmd_items(args, out: _Output) -> int:
+    """列出所有清理项"""
+    records = [
+        {
+            "id": item["id"],
+            "name": item["name"],
+            "description": item.get("description", ""),
+            "risk": item.get("risk"),
+            "enabled": item.get("enabled", True),
+        }
+        for item in CLEANUP_ITEMS
+    ]
+    for record in records:
+        out.event("item", **record)
+    out.document({"items": records})
+    return 0
+
+
+def cmd_scan(args, out: _Output) -> int:
+    """扫描并输出各清理项的大小"""
+    from scanner import Scanner
+
+    scanner = Scanner(
+        drive=args.drive,
+        index=_open_index(args),
+        time_budget=args.time_budget,
+        items=args.items,
+        all_profiles=args.all_profiles
+    )
+    started = time.monotonic()
+    records: List[dict] = []
+    estimates: List[dict] = []
+    files: Dict[str, List[dict]] = {}
+    status = 0
+
+    try:
+        if args.estimate:
+            # 先输出超大项目的抽样估算，再进行精确扫描
+            for result in scanner.estimate().values():
+                record = _estimate_record(result)
+                out.event("estimate", **record)
+                estimates.append(record)
+        for batch in scanner.iter_scan(keep_files=False):
+            if args.files:
+                for path, size in batch.files.items():
+                    if out.fmt == "ndjson":
+                        out.event("file", item=batch.item_id, path=path, size=size)
+                    else:
+                        files.setdefault(batch.item_id, []).append({"path": path, "size": size})
+            if batch.done:
+                record = _scan_record(batch.result)
+                out.event("item", **record)
+                records.append(record)
+    except KeyboardInterrupt:
+        # 中断迭代时 iter_scan 会取消扫描线程
+        status = 130
+
+    # 按配置顺序输出，与界面一致
+    order = {item["id"]: index for index, item in enumerate(CLEANUP_ITEMS)}
+    records.sort(key=lambda record: order.get(record["id"], len(order)))
+    if args.files and out.fmt == "json":
+        for record in records:
+            record["files"] = files.get(record["id"], [])
+
+    summary = {
+        "drive": args.drive,
+        "total_size": sum(record["size"] for record in records),
+        "total_count": sum(record["count"] for record in records),
+        "elapsed": round(time.monotonic() - started, 3),
+        "timed_out": scanner.timed_out,
+        "interrupted": status != 0,
+    }
+    out.event("summary", **summary)
+    document = {**summary, "items": records}
+    if args.estimate:
+        document["estimates"] = estimates
+    out.document(document)
+    return status
+
+
+def cmd_clean(args, out: _Output) -> int:
+    """边扫描边清理选中的清理项"""
+    from cleaner import Cleaner
+    from scanner import Scanner
+
+    # 未指定时只清理默认启用的项目，与界面的默认勾选一致
+    selected = args.items or [item["id"] for item in CLEANUP_ITEMS if item.get("enabled", True)]
+    index = _open_index(args)
+    scanner = Scanner(drive=args.drive, index=index, items=selected, all_profiles=args.all_profiles)
+    locked = None
+    if index is not None:
+        try:
+            locked = index.locked_files(LOCKED_RETRY_HOURS * 3600)
+        except Exception:
+            pass
+    stager = None
+    if args.instant:
+        from utils.reclaim import ReclaimStager
+        # 命令行退出后无法撤销，暂存的目录在输出汇总后立即删除
+        stager = ReclaimStager(undo_seconds=0)
+    cleaner = Cleaner(log_callback=out.log, locked=locked, stager=stager)
+    started = time.monotonic()
+    status = 0
+
+    try:
+        results = cleaner.clean_stream(scanner.iter_scan(), selected)
+    except KeyboardInterrupt:
+        cleaner.cancel()
+        # 已经删除的部分仍要如实输出
+        results = cleaner.results
+        status = 130
+
+    records = [_clean_record(result) for result in results.values()]
+    for record in records:
+        out.event("cleaned", **record)
+
+    summary = {
+        "drive": args.drive,
+        "cleaned_size": sum(record["cleaned_size"] for record in records),
+        "cleaned_count": sum(record["cleaned_count"] for record in records),
+        "failed_count": sum(record["failed_count"] for record in records),
+        "elapsed": round(time.monotonic() - started, 3),
+        "interrupted": status != 0,
+    }
+    out.event("summary", **summary)
+    out.document({**summary, "items": records})
+
+    if stager is not None:
+        try:
+            stager.purge_now()
+        except KeyboardInterrupt:
+            # 未删完的暂存目录在下次即时回收时继续删除
+            status = 130
+    return status
+
+
+def cmd_hogs(args, out: _Output) -> int:
+    """输出驱动器中最大的文件和目录"""
+    from scanner import Scanner
+
+    scanner = Scanner(drive=args.drive)
+    try:
+        report = scanner.find_space_hogs(top_n=args.top)
+    except KeyboardInterrupt:
+        scanner.cancel()
+        return 130
+
+    files = [{"path": hog.path, "size": hog.size} for hog in report.files]
+    dirs = [{"path": hog.path, "size": hog.size, "count": hog.file_count} for hog in report.dirs]
+    for record in files:
+        out.event("file", **record)
+    for record in dirs:
+        out.event("dir", **record)
+
+    summary = {
+        "drive": args.drive,
+        "total_size": report.total_size,
+        "file_count": report.file_count,
+        "dir_count": report.dir_count,
+        "elapsed": round(report.elapsed, 3),
+        "complete": report.complete,
+    }
+    out.event("summary", **summary)
+    out.document({**summary, "files": files, "dirs": dirs})
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m c_drive_cleaner",
+        description="C盘清理工具命令行模式（不启动图形界面，清理系统目录需以管理员身份运行）"
+    )
+    format_help = "输出格式：json 结束时输出完整文档，ndjson 逐行输出事件（默认 json）"
+    parser.add_argument("--format", choices=("json", "ndjson"), default="json", help=format_help)
+    # 子命令也接受 --format（写在子命令之后）；SUPPRESS 使未指定时不覆盖顶层的值
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--format", choices=("json", "ndjson"), default=argparse.SUPPRESS, help=format_help)
+    commands = parser.add_subparsers(dest="command", metavar="{items,scan,clean,hogs}")
+
+    commands.add_parser("items", parents=[output], help="列出所有清理项")
+
+    def add_common(sub: argparse.ArgumentParser):
+        sub.add_argument("--drive", type=_parse_drive, default="C:", help="盘符，如 C: 或 ALL（默认 C:）")
+        sub.add_argument("--items", type=_parse_items, default=None, help="逗号分隔的清理项 ID")
+        sub.add_argument("--no-index", action="store_true", help="不使用增量扫描索引")
+        sub.add_argument("--all-profiles", action="store_true", help="包含本机所有用户的配置文件目录（需管理员权限）")
+
+    scan = commands.add_parser("scan", parents=[output], help="扫描并输出各清理项的大小")
+    add_common(scan)
+    scan.add_argument("--files", action="store_true", help="同时输出命中的每个文件")
+    scan.add_argument("--time-budget", type=float, default=None, metavar="SECONDS", help="快速扫描的时间预算")
+    scan.add_argument("--estimate", action="store_true", help="精确扫描前先输出超大项目的抽样估算值")
+
+    clean = commands.add_parser("clean", parents=[output], help="扫描并删除选中的清理项")
+    add_common(clean)
+    clean.add_argument("--yes", action="store_true", help="确认删除（必须提供）")
+    clean.add_argument("--instant", action="store_true", help="整目录的清理项改名移入暂存区即算完成，删除在后台进行，退出前等待删除完毕")
+
+    hogs = commands.add_parser("hogs", parents=[output], help="列出驱动器中最大的文件和目录")
+    hogs.add_argument("--drive", type=_parse_drive, default="C:", help="盘符，如 C: 或 ALL（默认 C:）")
+    hogs.add_argument("--top", type=int, default=SPACE_HOGS_TOP_N, help=f"排行数量（默认 {SPACE_HOGS_TOP_N}）")
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        parser.print_help()
+        return 2
+    if args.command == "clean" and not args.yes:
+        parser.error("clean 会删除文件，请加 --yes 确认")
+
+    # 输出统一为 UTF-8，避免控制台代码页无法编码路径中的字符
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8", errors="backslashreplace")
+
+    out = _Output(args.format)
+    commands = {"items": cmd_items, "scan": cmd_scan, "clean": cmd_clean, "hogs": cmd_hogs}
+    try:
+        return commands[args.command](args, out)
+    except BrokenPipeError:
+        # 下游（如 head）提前关闭管道时静默退出
+        sys.stdout = open(os.devnull, "w")
+        return 1
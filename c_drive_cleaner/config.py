@@ -11,9 +11,22 @@ from pathlib import Path
 TEMP_PATH = os.environ.get('TEMP', r'C:\Users\Default\AppData\Local\Temp')
 LOCALAPPDATA = os.environ.get('LOCALAPPDATA', r'C:\Users\Default\AppData\Local')
 USERPROFILE = os.environ.get('USERPROFILE', r'C:\Users\Default')
+# 所有用户配置文件所在的目录；多用户模式下位于 USERPROFILE 之下的路径会展开到其中每个用户
+PROFILES_ROOT = os.path.dirname(USERPROFILE)
+
+# 本程序的数据目录（扫描索引等持久化数据）
+APP_DATA_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or os.path.expanduser('~'), "CDriveCleaner")
+SCAN_INDEX_PATH = os.path.join(APP_DATA_DIR, "scan_index.db")
+# 最近一次扫描/清理的指标（JSON），供监控程序读取
+METRICS_PATH = os.path.join(APP_DATA_DIR, "last_metrics.json")
 
 # 清理项目配置
 # 每个项目包含: name(名称), paths(路径列表), description(描述), risk(风险等级), enabled(默认启用)
+# 文件匹配条件（均可省略，同时设置时需全部满足）:
+#   extensions(扩展名列表), names(文件名通配符列表), pattern(路径中包含的子串), path_regex(路径正则),
+#   min_size(最小字节数), min_age_days(至少多少天未修改),
+#   include / exclude(相对 paths 中各目录的子目录通配符，以 / 分隔：只匹配 include 之下的文件，跳过 exclude 整个子目录)
+# estimate 为 True 的超大项目在估算模式下先显示抽样估算值，精确扫描完成后替换
 CLEANUP_ITEMS = [
     {
         "id": "user_temp",
@@ -31,7 +44,8 @@ CLEANUP_ITEMS = [
         "paths": [r"C:\Windows\Temp"],
         "extensions": None,
         "risk": "low",
-        "enabled": True
+        "enabled": True,
+        "instant_reclaim": True
     },
     {
         "id": "chrome_cache",
@@ -78,7 +92,9 @@ CLEANUP_ITEMS = [
         "paths": [r"C:\Windows\SoftwareDistribution\Download"],
         "extensions": None,
         "risk": "medium",
-        "enabled": False  # 默认不启用，因为可能需要管理员权限
+        "enabled": False,  # 默认不启用，因为可能需要管理员权限
+        "estimate": True,
+        "instant_reclaim": True
     },
     {
         "id": "thumbnail_cache",
@@ -157,7 +173,9 @@ CLEANUP_ITEMS = [
         "extensions": None,
         "risk": "high",
         "enabled": False,
-        "special": "developer_mode"
+        "special": "developer_mode",
+        "estimate": True,
+        "instant_reclaim": True
     },
     {
         "id": "delivery_optimization",
@@ -194,7 +212,25 @@ CLEANUP_ITEMS = [
         "extensions": [".log", ".tmp"],
         "risk": "medium",
         "enabled": False,
-        "pattern": "storage"
+        "pattern": "storage",
+        "estimate": True
+    },
+    {
+        "id": "duplicate_files",
+        "name": "重复文件",
+        "description": "用户文件夹中内容完全相同的文件，每组保留最早的一份",
+        "paths": [
+            os.path.join(USERPROFILE, "Desktop"),
+            os.path.join(USERPROFILE, "Documents"),
+            os.path.join(USERPROFILE, "Downloads"),
+            os.path.join(USERPROFILE, "Pictures"),
+            os.path.join(USERPROFILE, "Videos"),
+            os.path.join(USERPROFILE, "Music"),
+        ],
+        "extensions": None,
+        "risk": "high",
+        "enabled": False,
+        "special": "duplicates"
     },
 ]
 
@@ -221,10 +257,34 @@ DEVELOPER_CLEAN_RULES = {
 # 时间阈值：天数（默认180天，即半年未动过的项目）
 AGE_THRESHOLD_DAYS = 180
 
+# 重复文件查找的最小文件大小（字节），更小的文件释放空间有限且数量庞大
+DUPLICATE_MIN_SIZE = 1024 * 1024
+
+# 空间大户分析中文件与目录排行各保留的数量
+SPACE_HOGS_TOP_N = 50
+
+# 删除时被占用的文件在此时间（小时）内跳过，除非文件已变化；过期后重新尝试
+LOCKED_RETRY_HOURS = 24
+
+# 即时回收：标记了 instant_reclaim 的清理项把整个目录改名移入同一卷上的暂存目录即算完成，
+# 由后台低优先级线程删除，撤销期限（秒）内可移回原处
+INSTANT_RECLAIM = False
+INSTANT_RECLAIM_UNDO_SECONDS = 300
+
+# 快速扫描的时间预算（秒），超时后返回已扫描到的部分结果
+QUICK_SCAN_SECONDS = 5.0
+
+# 估算模式的时间预算（秒），抽样估算在此时间内给出带置信区间的结果
+ESTIMATE_SECONDS = 1.0
+
 # UI 配置
 UI_CONFIG = {
     "window_title": "C盘清理大师 Pro",
     "window_size": "850x750",
     "theme": "dark-blue",
     "accent_color": "#1f538d",
+    # 界面刷新帧率：进度、日志和吞吐量按此频率统一绘制
+    "refresh_fps": 30,
+    # 日志框最多保留的行数，超出后丢弃最旧的行
+    "log_lines": 500,
 }
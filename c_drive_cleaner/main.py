@@ -6,6 +6,7 @@ C盘清理工具 - 主程序入口
 import sys
 import os
 import ctypes
+import multiprocessing
 
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -40,6 +41,9 @@ def run_as_admin():
 
 
 if __name__ == "__main__":
+    # 打包为 EXE 后，重复文件查找使用的进程池需要由此启动子进程
+    multiprocessing.freeze_support()
+    
     # 检查管理员权限
     if not is_admin():
         print("正在尝试以管理员身份重新运行...")
@@ -6,15 +6,39 @@ C盘清理工具 - 扫描模块
 
 import os
 import ctypes
-from pathlib import Path
-from typing import Dict, List, Callable, Optional
+import threading
+import hashlib
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Callable, Optional, Tuple
 from dataclasses import dataclass, field
-import winreg
 
-from config import CLEANUP_ITEMS, DEVELOPER_CLEAN_RULES, AGE_THRESHOLD_DAYS
+from config import (
+    CLEANUP_ITEMS, DEVELOPER_CLEAN_RULES, AGE_THRESHOLD_DAYS, ESTIMATE_SECONDS, DUPLICATE_MIN_SIZE, SPACE_HOGS_TOP_N,
+    PROFILES_ROOT, USERPROFILE, LOCKED_RETRY_HOURS
+)
+from utils.dir_tree import DirTree
+from utils.drives import DriveRegistry, get_drive_registry
+from utils.duplicates import DuplicateFinder, FileInfo
+from utils.estimator import SizeEstimate, SizeEstimator
+from utils.metrics import ItemMetrics
+from utils.pathstore import KIND_FILE, PathStore
+from utils.profiles import ProfileResolver, list_profiles
+from utils.scan_index import LockedFileMemory, ScanIndex
+from utils.scan_plan import DirRule, FileRule, ScanPlan
+from utils.space_hogs import SpaceHogFinder, SpaceHogReport
+from utils.walker import TreeWalker, get_dir_size
 import time
 
 
+# 开发者清理时不进入的目录
+DEVELOPER_SKIP_DIRS = {
+    "windows", "program files", "program files (x86)", 
+    "programdata", "appdata", ".git", ".svn", "system volume information",
+    "$recycle.bin", "recovery", "msocache"
+}
+
+
 @dataclass
 class ScanResult:
     """扫描结果数据类"""
@@ -22,196 +46,661 @@ class ScanResult:
     item_name: str
     total_size: int = 0
     file_count: int = 0
-    files: List[str] = field(default_factory=list)
+    files: PathStore = field(default_factory=PathStore)
+    # 扫描的根目录，清理后修剪空目录不会越过这些目录
+    roots: List[str] = field(default_factory=list)
+    # 为 False 时扫描被中止（超出时间预算或被取消），结果只是下限
+    complete: bool = True
     error: Optional[str] = None
+    metrics: ItemMetrics = field(default_factory=ItemMetrics)
+    # 不为 None 时本结果只是抽样估算（不含文件列表），等待精确扫描结果替换
+    estimate: Optional[SizeEstimate] = None
+    # 多用户模式下按用户汇总：用户名 -> (字节数, 文件数)
+    by_profile: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    # 为 True 时文件列表覆盖根目录下的全部文件（清理项没有过滤条件且扫描无遗漏），可按目录整体清理
+    whole_roots: bool = False
+    # 重复文件：副本路径 -> 保留的原件（扫描时的路径、大小和修改时间），删除副本前确认原件未变化
+    originals: Dict[str, FileInfo] = field(default_factory=dict)
+
+
+@dataclass
+class ScanBatch:
+    """流式扫描输出的一批结果"""
+    item_id: str
+    item_name: str
+    files: PathStore = field(default_factory=PathStore)
+    # 为 True 时该清理项已扫描完毕，result 为其最终结果
+    done: bool = False
+    result: Optional[ScanResult] = None
+    # 同 ScanResult.originals，包含本批中的副本
+    originals: Dict[str, FileInfo] = field(default_factory=dict)
 
 
 class Scanner:
     """垃圾文件扫描器"""
     
-    def __init__(self, progress_callback: Callable[[str, int], None] = None, drive: str = "C:"):
+    def __init__(
+        self,
+        progress_callback: Callable[[str, int], None] = None,
+        drive: str = "C:",
+        max_workers: int = 4,
+        walk_workers: int = 4,
+        index: Optional[ScanIndex] = None,
+        time_budget: Optional[float] = None,
+        items: Optional[List[str]] = None,
+        drives: Optional[DriveRegistry] = None,
+        build_tree: bool = False,
+        all_profiles: bool = False
+    ):
         """
         初始化扫描器
         
         Args:
             progress_callback: 进度回调函数，参数为(当前扫描项名称, 进度百分比)
             drive: 要扫描的盘符 (如 "C:", "D:", 或 "ALL")
+            max_workers: 扫描计划与特殊清理项并发执行的最大线程数，1 表示按顺序执行
+            walk_workers: 遍历目录树时使用的线程数
+            index: 增量扫描索引，提供时修改时间未变化的目录直接复用上次的结果
+            time_budget: 快速扫描的时间预算（秒），超时后停止扫描并返回不完整的结果
+            items: 只扫描这些 ID 的清理项，None 表示全部
+            drives: 驱动器信息缓存，默认使用进程内共享的实例
+            build_tree: 是否在扫描时建立目录聚合表（dir_tree），之后可直接查询任意子树的大小；
+                开启后扫描计划不使用增量索引，每个目录都需完整列举
+            all_profiles: 是否扫描本机所有用户：位于当前用户目录下的路径展开到每个用户，
+                所有用户的目录合并在同一个扫描计划中并发遍历，结果按用户汇总到 by_profile
         """
         self.progress_callback = progress_callback
         self.drive = drive.upper().replace("\\", "")
+        self.max_workers = max(1, max_workers)
+        self.walk_workers = max(1, walk_workers)
+        self.index = index
+        self.drive_registry = drives or get_drive_registry()
+        self.time_budget = time_budget
+        self.items = [item for item in CLEANUP_ITEMS if items is None or item["id"] in items]
         self.results: Dict[str, ScanResult] = {}
+        # 本次扫描是否因超出时间预算而提前结束
+        self.timed_out = False
+        # 只在构造时清除：扫描线程启动前调用的 cancel 也必须生效，因此每次扫描使用新的扫描器
         self._cancelled = False
+        self._deadline: Optional[float] = None
+        # 本次扫描测得的各清理项产出速率
+        self._rates: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # 流式扫描时的输出：每次命中、每个清理项完成
+        self._match_sink: Optional[Callable[[str, str, str, int, float, int, int], None]] = None
+        self._item_done_sink: Optional[Callable[[ScanResult], None]] = None
+        # 流式扫描时在输出重复文件的副本之前登记它们的原件
+        self._originals_sink: Optional[Callable[[str, Dict[str, FileInfo]], None]] = None
+        self._keep_files = True
+        self.build_tree = build_tree
+        # 最近一次扫描建立的目录聚合表
+        self.dir_tree: Optional[DirTree] = DirTree() if build_tree else None
+        self.profiles: Optional[ProfileResolver] = None
+        if all_profiles:
+            self.profiles = ProfileResolver(list_profiles(PROFILES_ROOT, USERPROFILE), USERPROFILE)
+        # 上次清理时被占用的文件，扫描时不再计入结果
+        self.locked: Optional[LockedFileMemory] = None
     
     @staticmethod
     def get_available_drives() -> List[str]:
-        """获取所有可用本地驱动器"""
-        try:
-            import psutil
-            drives = []
-            for part in psutil.disk_partitions(all=False):
-                if 'fixed' in part.opts.lower() or part.fstype:
-                    drives.append(part.device.replace("\\", ""))
-            return sorted(drives)
-        except:
-            return ["C:"]
+        """获取所有可用本地驱动器（进程内缓存）"""
+        return get_drive_registry().drives()
 
     def cancel(self):
-        """取消扫描"""
+        """取消扫描（包括尚未开始的扫描），取消后本扫描器不再可用"""
         self._cancelled = True
     
+    def _is_cancelled(self) -> bool:
+        if self._cancelled:
+            return True
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            self.timed_out = True
+            return True
+        return False
+    
+    def _walker(self) -> TreeWalker:
+        """创建与本扫描器共享取消状态的遍历器"""
+        return TreeWalker(workers=self.walk_workers, cancel_check=self._is_cancelled)
+    
+    @staticmethod
+    def _is_planned(item: dict) -> bool:
+        """基于目录遍历的清理项统一由扫描计划处理"""
+        return item.get("special") in (None, "developer_mode")
+    
     def scan_all(self) -> Dict[str, ScanResult]:
         """
-        扫描所有配置的清理项目
+        扫描所有选中的清理项目
+        
+        所有基于目录遍历的清理项合并为一个扫描计划，每个目录只列举一次；
+        回收站等特殊项与之并发执行。每完成一个根目录或特殊项汇报一次进度。
+        
+        设置了时间预算时改为快速扫描：按历史产出速率从高到低逐项扫描，
+        超时后停止，未完成的清理项标记为 complete=False。
         
         Returns:
             包含所有扫描结果的字典
         """
-        self._cancelled = False
+        self.timed_out = False
+        self._rates = {}
+        self._deadline = time.monotonic() + self.time_budget if self.time_budget else None
         self.results.clear()
+        if self.build_tree:
+            self.dir_tree = DirTree()
+        self.locked = self._load_locked()
         
-        total_items = len(CLEANUP_ITEMS)
+        planned = [item for item in self.items if self._is_planned(item)]
+        separate = [item for item in self.items if not self._is_planned(item)]
         
-        for index, item in enumerate(CLEANUP_ITEMS):
-            if self._cancelled:
-                break
-                
-            item_id = item["id"]
-            item_name = item["name"]
-            
-            # 如果不是全盘扫描，且路径不属于该盘符，可能需要跳过或重定向
-            # 但这里我们保持逻辑：如果是 ALL，则为每个盘符执行规则；如果是特定盘，则只执行该盘的规则
-            
-            if self.progress_callback:
-                progress = int((index / total_items) * 100)
-                self.progress_callback(item_name, progress)
-            
-            # 特殊处理回收站
-            if item.get("special") == "recycle_bin":
-                if self.drive == "ALL":
-                    result = self._scan_recycle_bin(item_id, item_name, None)
-                else:
-                    result = self._scan_recycle_bin(item_id, item_name, self.drive + "\\")
-            elif item.get("special") == "developer_mode":
-                result = self._scan_developer_junk(item_id, item_name)
-            else:
-                result = self._scan_item(item)
-            
-            self.results[item_id] = result
+        self._progress_done = 0
+        if self._deadline is not None:
+            # 快速扫描逐项执行，按清理项汇报进度
+            planned = self._order_by_yield(planned)
+            self._progress_total = max(1, len(planned) + len(separate))
+            self._root_names = {}
+            run_planned = lambda: self._run_ordered(planned)
+        else:
+            plan = self._build_plan(planned)
+            item_names = {item["id"]: item["name"] for item in planned}
+            self._progress_total = max(1, len(plan.root_keys) + len(separate))
+            self._root_names = {
+                key: "、".join(dict.fromkeys(item_names[rule.item_id] for rule in plan.rules_at(key)))
+                for key in plan.root_keys
+            }
+            run_planned = lambda: self._run_plan(plan, planned)
+        
+        if self.max_workers == 1:
+            self._merge(run_planned())
+            for item in separate:
+                if self._is_cancelled():
+                    break
+                self._finish_item(self._scan_one(item))
+                self._advance(item["name"])
+        else:
+            self._scan_concurrently(run_planned, separate)
+        
+        # 按配置顺序整理结果，保证界面展示顺序稳定；被中止而未开始的清理项补一个不完整的空结果
+        interrupted = self._is_cancelled()
+        with self._lock:
+            ordered = {}
+            for item in self.items:
+                result = self.results.get(item["id"])
+                if result is None and interrupted:
+                    result = ScanResult(item_id=item["id"], item_name=item["name"], complete=False)
+                if result is not None:
+                    ordered[item["id"]] = result
+            self.results.clear()
+            self.results.update(ordered)
+        
+        if self.index is not None and self._rates:
+            try:
+                self.index.record_item_rates(self._rates)
+            except Exception:
+                pass
+        
+        # 扫描中发现已变化的被占用文件记录不再需要，与清理时一样写回，失败时只影响下次是否跳过
+        if self.locked is not None:
+            try:
+                self.locked.commit()
+            except Exception:
+                pass
         
         if self.progress_callback:
             self.progress_callback("扫描完成", 100)
         
         return self.results
     
-    def _scan_item(self, item: dict) -> ScanResult:
+    def estimate(self, time_budget: float = ESTIMATE_SECONDS) -> Dict[str, ScanResult]:
         """
-        扫描单个清理项目
+        对标记了 estimate 的超大清理项做抽样估算
+        
+        各清理项并发估算，总耗时约为 time_budget。返回的结果 complete=False 且不含文件列表，
+        只用于在精确扫描完成前展示；可与 scan_all / iter_scan 在不同线程中同时调用。
         
         Args:
-            item: 清理项目配置
+            time_budget: 每个清理项的估算时间预算（秒）
             
         Returns:
-            扫描结果
+            按清理项 ID 索引的估算结果
         """
-        result = ScanResult(
-            item_id=item["id"],
-            item_name=item["name"]
-        )
+        items = [item for item in self.items if item.get("estimate") and self._is_planned(item)]
+        if not items:
+            return {}
+        rules: Dict[str, list] = {}
+        for rule in self._build_plan(items).rules:
+            rules.setdefault(rule.item_id, []).append(rule)
         
-        paths = item.get("paths", [])
-        extensions = item.get("extensions")
-        pattern = item.get("pattern")
+        def run(item: dict) -> ScanResult:
+            estimator = SizeEstimator(time_budget=time_budget, cancel_check=lambda: self._cancelled)
+            estimate = estimator.estimate(item["id"], rules.get(item["id"], []))
+            return ScanResult(
+                item_id=item["id"],
+                item_name=item["name"],
+                total_size=estimate.size,
+                file_count=estimate.file_count,
+                complete=False,
+                estimate=estimate
+            )
         
-        for path_template in paths:
-            if self._cancelled:
-                break
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="estimate") as pool:
+            return dict(zip((item["id"] for item in items), pool.map(run, items)))
+    
+    def find_space_hogs(self, top_n: int = SPACE_HOGS_TOP_N) -> SpaceHogReport:
+        """
+        遍历整个驱动器，找出最大的 N 个文件和 N 个目录
+        
+        只读取目录项自带的大小信息，不打开文件；内存占用与文件数量无关。
+        可通过 cancel 取消，此时返回已统计部分的排行。
+        
+        Args:
+            top_n: 文件与目录排行各保留的数量
             
-            # 处理路径盘符：如果配置是硬编码的 C:\，在扫描其他盘时需要转换
-            target_paths = []
-            if self.drive == "ALL":
-                # 对于 ALL，如果路径包含盘符，尝试替换为所有可用盘符
-                if path_template.lower().startswith("c:"):
-                    for d in self.get_available_drives():
-                        target_paths.append(d + path_template[2:])
-                else:
-                    target_paths.append(path_template)
-            else:
-                # 对于特定盘，如果是 C:\ 开头的路径，替换为目标盘符
-                if path_template.lower().startswith("c:"):
-                    target_paths.append(self.drive + path_template[2:])
-                else:
-                    target_paths.append(path_template)
-
-            for path in target_paths:
-                if not os.path.exists(path):
+        Returns:
+            分析结果
+        """
+        self._deadline = None
+        drives = self.drive_registry.drives() if self.drive == "ALL" else [self.drive]
+        finder = SpaceHogFinder(top_n=top_n, workers=self.walk_workers, cancel_check=self._is_cancelled)
+        return finder.find([drive + "\\" for drive in drives])
+    
+    def _scan_concurrently(self, run_planned: Callable[[], Dict[str, ScanResult]], separate: List[dict]):
+        """扫描计划与特殊清理项放入线程池并发执行"""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scan") as pool:
+            futures = {pool.submit(run_planned): None}
+            for item in separate:
+                futures[pool.submit(self._scan_one, item)] = item
+            
+            for future in as_completed(futures):
+                item = futures[future]
+                
+                if self._is_cancelled():
+                    # 取消尚未开始的任务，正在运行的任务会自行检查取消标志
+                    for pending in futures:
+                        pending.cancel()
+                
+                if future.cancelled():
+                    continue
+                
+                if item is None:
+                    self._merge(future.result())
                     continue
                 
                 try:
-                    self._scan_directory(
-                        path, 
-                        result, 
-                        extensions=extensions,
-                        pattern=pattern
-                    )
-                except PermissionError:
-                    result.error = "权限不足，需要管理员权限"
+                    result = future.result()
                 except Exception as e:
-                    result.error = str(e)
+                    result = ScanResult(item_id=item["id"], item_name=item["name"], error=str(e))
+                
+                self._finish_item(result)
+                self._advance(item["name"])
+    
+    def iter_scan(self, batch_size: int = 1000, keep_files: bool = False) -> Iterator[ScanBatch]:
+        """
+        流式扫描：在后台线程中执行 scan_all，并按清理项分批返回命中的文件
         
-        return result
+        每个清理项扫描完毕时额外返回一个 done=True 的批次。
+        队列有界，消费方处理较慢时扫描线程会等待，内存占用与批次大小成正比。
+        提前停止迭代会取消扫描。
+        
+        Args:
+            batch_size: 每批最多包含的路径数
+            keep_files: 是否同时把路径保存到 self.results 中
+            
+        Yields:
+            扫描批次
+        """
+        stream = _ScanStream(self, batch_size)
+        self._match_sink = stream.on_match
+        self._item_done_sink = stream.on_item_done
+        self._originals_sink = stream.on_originals
+        self._keep_files = keep_files
+        
+        thread = threading.Thread(target=stream.produce, daemon=True, name="scan-stream")
+        thread.start()
+        try:
+            while True:
+                batch = stream.queue.get()
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            stream.closed = True
+            if thread.is_alive():
+                self.cancel()
+            thread.join()
+            self._match_sink = None
+            self._item_done_sink = None
+            self._originals_sink = None
+            self._keep_files = True
     
-    def _scan_directory(
-        self, 
-        directory: str, 
-        result: ScanResult,
-        extensions: List[str] = None,
-        pattern: str = None
-    ):
+    def _merge(self, results: Dict[str, ScanResult]):
+        with self._lock:
+            self.results.update(results)
+    
+    def _finish_item(self, result: ScanResult):
+        """记录单独扫描完成的清理项"""
+        self._merge({result.item_id: result})
+        if self._item_done_sink:
+            self._item_done_sink(result)
+    
+    def _advance(self, name: str):
+        """完成一个进度单位"""
+        with self._lock:
+            self._progress_done += 1
+            progress = min(99, int((self._progress_done / self._progress_total) * 100))
+        if self.progress_callback:
+            self.progress_callback(name, progress)
+    
+    def _order_by_yield(self, items: List[dict]) -> List[dict]:
+        """按历史产出速率从高到低排列清理项，没有历史记录的保持配置顺序排在最后"""
+        rates: Dict[str, float] = {}
+        if self.index is not None:
+            try:
+                rates = self.index.item_rates()
+            except Exception:
+                rates = {}
+        known = sorted((item for item in items if item["id"] in rates), key=lambda item: -rates[item["id"]])
+        return known + [item for item in items if item["id"] not in rates]
+    
+    def _run_ordered(self, items: List[dict]) -> Dict[str, ScanResult]:
         """
-        递归扫描目录
+        逐项执行扫描计划，直到全部完成或超出时间预算
         
         Args:
-            directory: 目录路径
-            result: 扫描结果对象
-            extensions: 文件扩展名过滤
-            pattern: 路径模式匹配
+            items: 已排好顺序的清理项
+            
+        Returns:
+            已开始扫描的清理项的结果
         """
+        results: Dict[str, ScanResult] = {}
+        for item in items:
+            if self._is_cancelled():
+                break
+            result = self._run_plan(self._build_plan([item]), [item])[item["id"]]
+            results[item["id"]] = result
+            self._merge({item["id"]: result})
+            if self._item_done_sink:
+                self._item_done_sink(result)
+            self._advance(item["name"])
+        return results
+    
+    def _expand_paths(self, path_template: str, drives: List[str]) -> List[str]:
+        """处理路径盘符：如果配置是硬编码的 C:\\，在扫描其他盘时需要转换"""
+        if not path_template.lower().startswith("c:"):
+            return [path_template]
+        return [d + path_template[2:] for d in drives]
+    
+    def _load_locked(self) -> Optional[LockedFileMemory]:
+        """载入上次清理时被占用的文件记录，没有记录时返回 None"""
+        if self.index is None:
+            return None
         try:
-            for entry in os.scandir(directory):
-                if self._cancelled:
-                    return
-                    
-                try:
-                    if entry.is_file(follow_symlinks=False):
-                        # 检查扩展名过滤
-                        if extensions:
-                            ext = Path(entry.path).suffix.lower()
-                            if ext not in extensions:
-                                continue
-                        
-                        # 检查模式匹配
-                        if pattern and pattern.lower() not in entry.path.lower():
-                            continue
-                        
-                        size = entry.stat().st_size
-                        result.total_size += size
-                        result.file_count += 1
-                        result.files.append(entry.path)
-                        
-                    elif entry.is_dir(follow_symlinks=False):
-                        # 检查模式匹配（目录级别）
-                        if pattern and pattern.lower() not in entry.path.lower():
-                            # 继续递归，但不统计此目录下的文件
-                            self._scan_directory(entry.path, result, extensions, pattern)
-                        else:
-                            self._scan_directory(entry.path, result, extensions, None if pattern else None)
-                            
-                except (PermissionError, OSError):
-                    # 跳过无权限访问的文件
+            locked = self.index.locked_files(LOCKED_RETRY_HOURS * 3600)
+        except Exception:
+            return None
+        return locked if len(locked) else None
+    
+    def _expand_profiles(self, path: str) -> List[str]:
+        """多用户模式下把当前用户目录下的路径展开到每个用户"""
+        if self.profiles is None:
+            return [path]
+        return self.profiles.expand(path)
+    
+    def _profile_tally(self, results: Dict[str, ScanResult], sink: Optional[Callable]) -> Callable:
+        """
+        包装命中回调：按用户汇总后再交给流式输出
+        
+        扫描计划在多个遍历线程中并发调用命中回调，累加需加锁；流式输出在锁外调用
+        """
+        owner_of = self.profiles.owner
+        lock = threading.Lock()
+        
+        def on_match(item_id: str, prefix: str, name: str, size: int, mtime: float, file_id: int, kind: int):
+            owner = owner_of(prefix)
+            if owner is not None:
+                with lock:
+                    usage = results[item_id].by_profile
+                    total, count = usage.get(owner, (0, 0))
+                    usage[owner] = (total + size, count + 1)
+            if sink:
+                sink(item_id, prefix, name, size, mtime, file_id, kind)
+        
+        return on_match
+    
+    def _build_plan(self, items: List[dict]) -> ScanPlan:
+        """
+        把清理项展开为扫描规则并生成扫描计划
+        
+        Args:
+            items: 基于目录遍历的清理项
+            
+        Returns:
+            扫描计划
+        """
+        # 如果是 ALL，则为每个盘符执行规则；如果是特定盘，则只执行该盘的规则
+        drives = self.drive_registry.drives() if self.drive == "ALL" else [self.drive]
+        now = time.time()
+        rules = []
+        
+        for item in items:
+            if item.get("special") == "developer_mode":
+                for drive in drives:
+                    drive_path = drive + "\\"
+                    if not os.path.exists(drive_path):
+                        continue
+                    # 限制遍历深度以保证性能
+                    rules.append(DirRule(
+                        item["id"],
+                        drive_path,
+                        DEVELOPER_CLEAN_RULES,
+                        AGE_THRESHOLD_DAYS * 24 * 3600,
+                        max_depth=6,
+                        skip_dirs=DEVELOPER_SKIP_DIRS,
+                        now=now
+                    ))
+                continue
+            
+            for path_template in item.get("paths", []):
+                for profile_path in self._expand_profiles(path_template):
+                    for path in self._expand_paths(profile_path, drives):
+                        if os.path.exists(path):
+                            rules.append(FileRule.from_item(item, path, now))
+        
+        return ScanPlan(rules)
+    
+    def _run_plan(self, plan: ScanPlan, items: List[dict]) -> Dict[str, ScanResult]:
+        """
+        执行扫描计划
+        
+        Args:
+            plan: 扫描计划
+            items: 计划覆盖的清理项
+            
+        Returns:
+            计划内各清理项的扫描结果
+        """
+        results = {
+            item["id"]: ScanResult(item_id=item["id"], item_name=item["name"])
+            for item in items
+        }
+        for rule in plan.rules:
+            results[rule.item_id].roots.append(rule.root)
+        
+        session = None
+        if self.index is not None and self.dir_tree is None:
+            # 规则或盘符变化后旧记录不再适用，因此一并作为索引键
+            signature = hashlib.sha1(plan.signature().encode("utf-8", "surrogatepass")).hexdigest()
+            try:
+                session = self.index.session(f"plan|{self.drive}|{signature}")
+            except Exception:
+                session = None
+        size_cache = None
+        if self.index is not None and any(isinstance(rule, DirRule) for rule in plan.rules):
+            try:
+                size_cache = self.index.size_cache()
+            except Exception:
+                size_cache = None
+        
+        # 每个清理项尚未完成的根目录，全部完成时该项的结果即为最终结果
+        pending: Dict[str, set] = {}
+        for key in plan.root_keys:
+            for rule in plan.rules_at(key):
+                pending.setdefault(rule.item_id, set()).add(key)
+        started = time.monotonic()
+        
+        def on_root_done(key: str):
+            self._on_root_done(key)
+            done = []
+            with self._lock:
+                for rule in plan.rules_at(key):
+                    keys = pending.get(rule.item_id)
+                    if keys is None:
+                        continue
+                    keys.discard(key)
+                    if not keys:
+                        del pending[rule.item_id]
+                        result = results[rule.item_id]
+                        done.append(result)
+                        # 以完成所用时间估算该项的产出速率
+                        elapsed = max(time.monotonic() - started, 1e-3)
+                        result.metrics.wall_time = elapsed
+                        result.metrics.bytes = result.total_size
+                        self._rates[rule.item_id] = result.total_size / elapsed
+            if self._item_done_sink:
+                for result in done:
+                    self._item_done_sink(result)
+        
+        try:
+            plan.execute(
+                self._walker(),
+                results,
+                self._get_dir_size_for_scan,
+                session=session,
+                on_root_done=on_root_done,
+                on_match=self._profile_tally(results, self._match_sink) if self.profiles else self._match_sink,
+                keep_files=self._keep_files,
+                size_cache=size_cache,
+                size_workers=self.walk_workers,
+                tree=self.dir_tree,
+                skip=self.locked.is_locked if self.locked is not None else None
+            )
+        except Exception as e:
+            for result in results.values():
+                result.error = str(e)
+            return results
+        
+        interrupted = self._is_cancelled()
+        elapsed = time.monotonic() - started
+        for item_id in pending:
+            # 扫描被中止时尚未完成的清理项
+            result = results[item_id]
+            result.complete = not interrupted
+            result.metrics.wall_time = elapsed
+            result.metrics.bytes = result.total_size
+        
+        filtered = {rule.item_id for rule in plan.rules if not (isinstance(rule, FileRule) and rule.unfiltered)}
+        for result in results.values():
+            metrics = result.metrics
+            result.whole_roots = (
+                result.complete and result.error is None and result.item_id not in filtered
+                and not (metrics.permission_denied or metrics.os_errors or metrics.locked_skipped)
+            )
+        
+        # 只有完整扫描的结果才写回索引
+        if not interrupted:
+            for pending_write in (session, size_cache):
+                if pending_write is None:
                     continue
-                    
-        except (PermissionError, OSError):
-            pass
+                try:
+                    pending_write.commit()
+                except Exception:
+                    pass
+        
+        return results
+    
+    def _on_root_done(self, key: str):
+        name = self._root_names.get(key)
+        if name is not None:
+            self._advance(name)
+    
+    def _scan_one(self, item: dict) -> ScanResult:
+        """
+        扫描单个清理项目
+        
+        Args:
+            item: 清理项目配置
+            
+        Returns:
+            扫描结果
+        """
+        item_id = item["id"]
+        item_name = item["name"]
+        
+        if self._is_cancelled():
+            return ScanResult(item_id=item_id, item_name=item_name, complete=False)
+        
+        # 特殊处理回收站
+        if item.get("special") == "recycle_bin":
+            started = time.monotonic()
+            result = self._scan_recycle_bin(item_id, item_name, None if self.drive == "ALL" else self.drive + "\\")
+            result.metrics.wall_time = time.monotonic() - started
+            result.metrics.bytes = result.total_size
+            return result
+        if item.get("special") == "duplicates":
+            return self._scan_duplicates(item)
+        return self._run_plan(self._build_plan([item]), [item])[item_id]
+    
+    def _scan_duplicates(self, item: dict) -> ScanResult:
+        """
+        查找重复文件：每组保留修改时间最早的一份，其余副本作为可清理的文件
+        
+        每个副本对应的原件记在 originals 中，清理时原件已不存在或已变化则不删除副本。
+        
+        Args:
+            item: 清理项目配置
+            
+        Returns:
+            扫描结果（roots 为空，清理后不修剪用户文件夹中的空目录）
+        """
+        # 多用户模式下也只查找当前用户的文件夹：跨用户比较会把一个用户的文件当作另一个用户的副本删除
+        item_id = item["id"]
+        result = ScanResult(item_id=item_id, item_name=item["name"])
+        started = time.monotonic()
+        
+        drives = self.drive_registry.drives() if self.drive == "ALL" else [self.drive]
+        roots = [
+            path
+            for template in item.get("paths", [])
+            for path in self._expand_paths(template, drives)
+            if os.path.isdir(path)
+        ]
+        finder = DuplicateFinder(
+            min_size=DUPLICATE_MIN_SIZE,
+            workers=min(4, os.cpu_count() or 1),
+            walk_workers=self.walk_workers,
+            cancel_check=self._is_cancelled
+        )
+        groups = finder.find(roots)
+        for group in groups:
+            for copy in group.copies:
+                result.originals[copy.path] = group.keep
+        if self._originals_sink:
+            self._originals_sink(item_id, result.originals)
+        for group in groups:
+            for copy in group.copies:
+                name = os.path.basename(copy.path)
+                prefix = copy.path[:len(copy.path) - len(name)]
+                result.total_size += copy.size
+                result.file_count += 1
+                if self._keep_files:
+                    result.files.add(prefix, name, copy.size, copy.mtime, copy.file_id, KIND_FILE)
+                if self._match_sink:
+                    self._match_sink(item_id, prefix, name, copy.size, copy.mtime, copy.file_id, KIND_FILE)
+        
+        result.complete = not self._is_cancelled()
+        result.metrics.wall_time = time.monotonic() - started
+        result.metrics.entries = finder.stats.files_seen
+        result.metrics.stat_calls = finder.stats.files_seen + finder.stats.id_lookups
+        result.metrics.bytes = result.total_size
+        return result
     
     def _scan_recycle_bin(self, item_id: str, item_name: str, drive_path: Optional[str] = None) -> ScanResult:
         """
@@ -256,88 +745,13 @@ class Scanner:
         
         return result
     
-    def _scan_developer_junk(self, item_id: str, item_name: str) -> ScanResult:
-        """
-        深度扫描开发者相关的过期项目文件
+    def _get_dir_size_for_scan(self, path: str) -> int:
         """
-        result = ScanResult(item_id=item_id, item_name=item_name)
-        now = time.time()
-        threshold_seconds = AGE_THRESHOLD_DAYS * 24 * 3600
-        
-        # 确定扫描盘符
-        drives = self.get_available_drives() if self.drive == "ALL" else [self.drive]
+        扫描期间专用的目录大小获取逻辑
         
-        # 排除目录
-        skip_dirs = {
-            "windows", "program files", "program files (x86)", 
-            "programdata", "appdata", ".git", ".svn", "system volume information",
-            "$recycle.bin", "recovery", "msocache"
-        }
-
-        for drive in drives:
-            drive_path = drive + "\\"
-            if not os.path.exists(drive_path):
-                continue
-            
-            # 限制递归深度以保证性能
-            self._depth_search(drive_path, result, now, threshold_seconds, skip_dirs, depth=0, max_depth=6)
-            
-            if self._cancelled:
-                break
-                
-        return result
-
-    def _depth_search(self, path: str, result: ScanResult, now: float, threshold: float, skip_dirs: set, depth: int, max_depth: int):
-        """递归深度搜索开发者垃圾"""
-        if self._cancelled or depth > max_depth:
-            return
-            
-        try:
-            for entry in os.scandir(path):
-                if self._cancelled:
-                    return
-                
-                try:
-                    if entry.is_dir(follow_symlinks=False):
-                        name_lower = entry.name.lower()
-                        
-                        # 检查是否为目标清理目录
-                        if name_lower in DEVELOPER_CLEAN_RULES:
-                            mtime = entry.stat().st_mtime
-                            # 如果文件夹超过阈值未更新，记录
-                            if (now - mtime) > threshold:
-                                size = self._get_dir_size_for_scan(entry.path)
-                                result.total_size += size
-                                result.file_count += 1
-                                result.files.append(entry.path)
-                                # 识别到目标后，不再进入该目录深层
-                                continue
-                        
-                        # 如果不是目标目录，检查是否需要跳过并继续递归
-                        if name_lower in skip_dirs or entry.name.startswith('.'):
-                            continue
-                            
-                        self._depth_search(entry.path, result, now, threshold, skip_dirs, depth + 1, max_depth)
-                except (PermissionError, OSError):
-                    continue
-        except (PermissionError, OSError):
-            pass
-
-    def _get_dir_size_for_scan(self, path: str) -> int:
-        """扫描期间专用的目录大小获取逻辑"""
-        total = 0
-        try:
-            for entry in os.scandir(path):
-                try:
-                    if entry.is_file(follow_symlinks=False):
-                        total += entry.stat().st_size
-                    elif entry.is_dir(follow_symlinks=False):
-                        total += self._get_dir_size_for_scan(entry.path)
-                except (PermissionError, OSError):
-                    continue
-        except (PermissionError, OSError):
-            pass
-        return total
+        各目标目录已在扫描计划的线程池中并发计算，单个目录内只用调用线程遍历
+        """
+        return get_dir_size(path, workers=1, cancel_check=self._is_cancelled)
 
     def get_total_size(self) -> int:
         """获取所有扫描结果的总大小"""
@@ -352,6 +766,67 @@ class Scanner:
         )
 
 
+class _ScanStream:
+    """把扫描线程中的命中结果分批送入有界队列"""
+    
+    def __init__(self, scanner: Scanner, batch_size: int):
+        self.scanner = scanner
+        self.batch_size = max(1, batch_size)
+        self.queue: "queue.Queue[Optional[ScanBatch]]" = queue.Queue(maxsize=8)
+        self.closed = False
+        self._lock = threading.Lock()
+        self._buffers: Dict[str, PathStore] = {}
+        self._done = set()
+        self._names = {item["id"]: item["name"] for item in scanner.items}
+        # 清理项 -> 重复文件副本的原件
+        self._originals: Dict[str, Dict[str, FileInfo]] = {}
+    
+    def produce(self):
+        try:
+            self.scanner.scan_all()
+            # 扫描结束（或被取消）时补发尚未完成的清理项
+            for result in list(self.scanner.results.values()):
+                self.on_item_done(result)
+        finally:
+            self._put(None, force=True)
+    
+    def on_match(self, item_id: str, prefix: str, name: str, size: int, mtime: float, file_id: int, kind: int):
+        with self._lock:
+            buffer = self._buffers.get(item_id)
+            if buffer is None:
+                buffer = self._buffers[item_id] = PathStore()
+            buffer.add(prefix, name, size, mtime, file_id, kind)
+            if len(buffer) < self.batch_size:
+                return
+            del self._buffers[item_id]
+            originals = self._originals.get(item_id, {})
+        self._put(ScanBatch(item_id, self._names.get(item_id, item_id), buffer, originals=originals))
+    
+    def on_originals(self, item_id: str, originals: Dict[str, FileInfo]):
+        with self._lock:
+            self._originals[item_id] = originals
+    
+    def on_item_done(self, result: ScanResult):
+        with self._lock:
+            if result.item_id in self._done:
+                return
+            self._done.add(result.item_id)
+            buffer = self._buffers.pop(result.item_id, None) or PathStore()
+            originals = self._originals.pop(result.item_id, {})
+        self._put(ScanBatch(result.item_id, result.item_name, buffer, done=True, result=result, originals=originals))
+    
+    def _put(self, batch: Optional[ScanBatch], force: bool = False):
+        """放入队列；消费方已停止时丢弃（结束标记除外）"""
+        while not self.closed or force:
+            try:
+                self.queue.put(batch, timeout=0.1)
+                return
+            except queue.Full:
+                if force and self.closed:
+                    return
+                continue
+
+
 def format_size(size_bytes: int) -> str:
     """
     格式化文件大小显示
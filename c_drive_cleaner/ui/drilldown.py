@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 清理项明细面板
+虚拟化列表：只为可见的几十行创建控件，滚动时按页从扫描结果中取数据，
+百万级记录也不会卡住界面；可在清理前排除单个文件或整个子目录
+"""
+
+import customtkinter as ctk
+import threading
+from typing import Callable, List, Optional
+
+from scanner import ScanResult, format_size
+from utils.pathstore import PathStore
+from utils.result_view import (
+    MODE_DIRS, MODE_FILES, SORT_NAME, SORT_PATH, SORT_SIZE_ASC, SORT_SIZE_DESC,
+    ResultView, ViewQuery, ViewRow
+)
+
+
+# 可见行数
+VISIBLE_ROWS = 18
+# 路径列最多显示的字符数，超出时省略开头
+PATH_CHARS = 78
+# 过滤框停止输入后多久开始过滤（毫秒）
+FILTER_DELAY_MS = 300
+
+MODE_LABELS = {"按文件": MODE_FILES, "按目录": MODE_DIRS}
+SORT_LABELS = {
+    "大小 ↓": SORT_SIZE_DESC,
+    "大小 ↑": SORT_SIZE_ASC,
+    "名称": SORT_NAME,
+    "路径": SORT_PATH,
+}
+
+
+def _shorten(path: str) -> str:
+    if len(path) <= PATH_CHARS:
+        return path
+    return "…" + path[-(PATH_CHARS - 1):]
+
+
+class DrillDownPanel(ctk.CTkToplevel):
+    """单个清理项的文件明细窗口"""
+
+    def __init__(self, master, result: ScanResult, on_apply: Callable[[PathStore], None]):
+        """
+        Args:
+            master: 主窗口
+            result: 要查看的扫描结果
+            on_apply: 应用排除时的回调，参数为去掉被排除记录后的路径列表
+        """
+        super().__init__(master)
+        self.title(f"{result.item_name} - 明细")
+        self.geometry("820x640")
+        self.resizable(False, False)
+
+        self.result = result
+        self.on_apply = on_apply
+        self.view = ResultView(result.files)
+        self.query = ViewQuery(MODE_FILES, [])
+        self.offset = 0
+        self._page: List[ViewRow] = []
+        # 后台查询与排除统计的代次，只采用最新一次的结果
+        self._generation = 0
+        self._count_generation = 0
+        self._filter_job: Optional[str] = None
+        # 正在应用排除时不再允许修改排除项
+        self._applying = False
+
+        self._create_widgets()
+        self._run_query()
+
+    def _create_widgets(self):
+        # ===== 工具栏 =====
+        toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        toolbar.pack(fill="x", padx=15, pady=(12, 5))
+
+        self.mode_button = ctk.CTkSegmentedButton(
+            toolbar, values=list(MODE_LABELS), command=lambda _: self._run_query()
+        )
+        self.mode_button.set("按文件")
+        self.mode_button.pack(side="left")
+
+        self.sort_menu = ctk.CTkOptionMenu(
+            toolbar, values=list(SORT_LABELS), command=lambda _: self._run_query(), width=100
+        )
+        self.sort_menu.set("大小 ↓")
+        self.sort_menu.pack(side="left", padx=10)
+
+        self.filter_entry = ctk.CTkEntry(toolbar, placeholder_text="过滤路径...", width=300)
+        self.filter_entry.pack(side="left", fill="x", expand=True)
+        self.filter_entry.bind("<KeyRelease>", self._on_filter_typed)
+
+        self.status_label = ctk.CTkLabel(self, text="", font=ctk.CTkFont(size=12), text_color="#BBBBBB")
+        self.status_label.pack(fill="x", padx=15)
+
+        # ===== 列表（固定行数的控件，滚动时只更新文字） =====
+        body = ctk.CTkFrame(self)
+        body.pack(fill="both", expand=True, padx=15, pady=5)
+
+        self.list_frame = ctk.CTkFrame(body, fg_color="transparent")
+        self.list_frame.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(body, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self._rows = []
+        for index in range(VISIBLE_ROWS):
+            frame = ctk.CTkFrame(self.list_frame, fg_color="transparent", height=26)
+            frame.pack(fill="x", pady=1)
+            toggle = ctk.CTkButton(
+                frame, text="排除", width=50, height=22,
+                command=lambda i=index: self._on_toggle(i)
+            )
+            toggle.pack(side="left", padx=(5, 8))
+            path_label = ctk.CTkLabel(frame, text="", anchor="w", font=ctk.CTkFont(size=12))
+            path_label.pack(side="left", fill="x", expand=True)
+            size_label = ctk.CTkLabel(frame, text="", width=110, anchor="e", font=ctk.CTkFont(size=12, weight="bold"))
+            size_label.pack(side="right", padx=5)
+            for widget in (frame, path_label, size_label):
+                widget.bind("<MouseWheel>", self._on_mousewheel)
+            self._rows.append((toggle, path_label, size_label))
+        self.list_frame.bind("<MouseWheel>", self._on_mousewheel)
+
+        # ===== 底部 =====
+        footer = ctk.CTkFrame(self, fg_color="transparent")
+        footer.pack(fill="x", padx=15, pady=(5, 12))
+
+        self.excluded_label = ctk.CTkLabel(footer, text="未排除任何项目", font=ctk.CTkFont(size=12))
+        self.excluded_label.pack(side="left")
+
+        ctk.CTkButton(footer, text="关闭", width=80, command=self.destroy).pack(side="right", padx=5)
+        self.apply_button = ctk.CTkButton(
+            footer, text="应用排除", width=100, command=self._on_apply_click,
+            fg_color="#E53935", hover_color="#C62828", state="disabled"
+        )
+        self.apply_button.pack(side="right", padx=5)
+        self.clear_button = ctk.CTkButton(footer, text="恢复全部", width=80, command=self._on_clear_click)
+        self.clear_button.pack(side="right", padx=5)
+
+    # ---------- 查询 ----------
+
+    def _run_query(self):
+        """在后台线程中排序/过滤，完成后回到界面线程显示"""
+        self._generation += 1
+        generation = self._generation
+        mode = MODE_LABELS[self.mode_button.get()]
+        sort = SORT_LABELS[self.sort_menu.get()]
+        text = self.filter_entry.get()
+        self.status_label.configure(text="正在整理列表...")
+        threading.Thread(
+            target=self._query_thread, args=(generation, mode, sort, text), daemon=True
+        ).start()
+
+    def _query_thread(self, generation: int, mode: str, sort: str, text: str):
+        query = self.view.query(mode, sort, text)
+        try:
+            self.after(0, lambda: self._on_query_done(generation, query))
+        except Exception:
+            # 窗口已关闭
+            pass
+
+    def _on_query_done(self, generation: int, query: ViewQuery):
+        if generation != self._generation:
+            return
+        self.query = query
+        unit = "个目录" if query.mode == MODE_DIRS else "项"
+        self.status_label.configure(
+            text=f"共 {len(self.result.files)} 项，{format_size(self.result.total_size)}；当前列表 {len(query)} {unit}"
+        )
+        self._scroll_to(0)
+
+    def _on_filter_typed(self, _event=None):
+        # 连续输入时只在停顿后过滤一次
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(FILTER_DELAY_MS, self._on_filter_idle)
+
+    def _on_filter_idle(self):
+        self._filter_job = None
+        self._run_query()
+
+    # ---------- 滚动与显示 ----------
+
+    def _scroll_to(self, offset: int):
+        total = len(self.query)
+        self.offset = max(0, min(offset, total - VISIBLE_ROWS))
+        self._render()
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + VISIBLE_ROWS) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_scrollbar(self, action: str, value: str, unit: str = None):
+        total = len(self.query)
+        if action == "moveto":
+            self._scroll_to(int(float(value) * total))
+        elif action == "scroll":
+            step = VISIBLE_ROWS if unit == "pages" else 1
+            self._scroll_to(self.offset + int(value) * step)
+
+    def _on_mousewheel(self, event):
+        self._scroll_to(self.offset - int(event.delta / 120) * 3)
+
+    def _render(self):
+        """只取当前可见的一页数据填入固定的行控件"""
+        self._page = self.view.page(self.query, self.offset, VISIBLE_ROWS)
+        for index, (toggle, path_label, size_label) in enumerate(self._rows):
+            if index >= len(self._page):
+                toggle.configure(state="disabled", text="排除")
+                path_label.configure(text="")
+                size_label.configure(text="")
+                continue
+            row = self._page[index]
+            path = _shorten(row.path)
+            if self.query.mode == MODE_DIRS:
+                path = f"{path}  ({row.count} 项)"
+            color = "#777777" if row.excluded else "white"
+            toggle.configure(
+                state="disabled" if self._applying else "normal", text="恢复" if row.excluded else "排除"
+            )
+            path_label.configure(text=path, text_color=color)
+            size_label.configure(text=format_size(row.size), text_color=color)
+
+    # ---------- 排除 ----------
+
+    def _on_toggle(self, index: int):
+        if self._applying or index >= len(self._page):
+            return
+        self.view.toggle(self.query, self._page[index])
+        self._render()
+        self._refresh_excluded()
+
+    def _on_clear_click(self):
+        if self._applying:
+            return
+        self.view.clear_exclusions()
+        self._render()
+        self._refresh_excluded()
+
+    def _refresh_excluded(self):
+        """在后台统计被排除的数量，百万级记录时不阻塞界面"""
+        self._count_generation += 1
+        generation = self._count_generation
+        # 快照在界面线程中取得，统计期间继续切换排除项不会影响后台线程
+        exclusions = self.view.snapshot()
+
+        def count():
+            excluded = self.view.excluded_totals(exclusions)
+            try:
+                self.after(0, lambda: self._on_excluded_counted(generation, excluded))
+            except Exception:
+                pass
+
+        threading.Thread(target=count, daemon=True).start()
+
+    def _on_excluded_counted(self, generation: int, excluded):
+        if generation != self._count_generation or self._applying:
+            return
+        count, size = excluded
+        if count:
+            self.excluded_label.configure(text=f"已排除 {count} 项，{format_size(size)}（清理时跳过）")
+            self.apply_button.configure(state="normal")
+        else:
+            self.excluded_label.configure(text="未排除任何项目")
+            self.apply_button.configure(state="disabled")
+
+    def _on_apply_click(self):
+        self._applying = True
+        self.apply_button.configure(state="disabled")
+        self.clear_button.configure(state="disabled")
+        self.status_label.configure(text="正在应用排除...")
+        self._render()
+        exclusions = self.view.snapshot()
+
+        def build():
+            kept = self.view.kept(exclusions)
+            try:
+                self.after(0, lambda: self._on_kept(kept))
+            except Exception:
+                pass
+
+        threading.Thread(target=build, daemon=True).start()
+
+    def _on_kept(self, kept: PathStore):
+        self.on_apply(kept)
+        self.destroy()
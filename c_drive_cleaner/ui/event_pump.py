@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 界面事件泵
+工作线程只把事件放入线程安全的缓冲区，界面线程按固定帧率统一取出并绘制：
+进度每个通道只绘制最新值，日志合并为一次插入，吞吐量按帧间差值计算
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+
+
+# 吞吐量滑动平均中新样本的权重
+_RATE_WEIGHT = 0.3
+# 至少间隔多久（秒）计算一次吞吐量，帧间隔过短时差值抖动太大
+_RATE_INTERVAL = 0.5
+
+
+class UIEventPump:
+    """
+    界面事件泵
+
+    - post: 有序的一次性事件（如单项扫描完成），按提交顺序执行
+    - progress: 同一通道在一帧内只保留最后一次的参数
+    - log: 日志行累积到下一帧一次性交给日志处理函数，积压超过上限时丢弃最旧的行
+    - set_counts: 通道的累计文件数/字节数，每帧换算为 文件/秒、字节/秒
+
+    除 start/stop 和注册处理函数外，所有方法都可以在任意线程中调用。
+    每帧先绘制进度，再执行一次性事件，因此“完成”事件总能覆盖同一帧中较早的进度。
+    """
+
+    def __init__(self, widget, fps: int = 30, log_limit: int = 500):
+        """
+        Args:
+            widget: 用于调度 after 的 Tk 控件（通常为主窗口）
+            fps: 每秒处理的帧数
+            log_limit: 一帧内最多保留的待显示日志行数
+        """
+        self.widget = widget
+        self.interval_ms = max(1, int(1000 / max(1, fps)))
+        self._lock = threading.Lock()
+        self._calls: List[Callable[[], None]] = []
+        self._progress: Dict[str, tuple] = {}
+        self._logs: deque = deque(maxlen=log_limit)
+        self._dropped_logs = 0
+        self._counts: Dict[str, Tuple[int, int]] = {}
+        self._reset: set = set()
+        self._progress_handlers: Dict[str, Callable] = {}
+        self._rate_handlers: Dict[str, Callable[[float, float], None]] = {}
+        self._log_handler: Callable[[List[str]], None] = None
+        # 通道 -> (上次采样时间, 文件数, 字节数, 文件/秒, 字节/秒)
+        self._rates: Dict[str, Tuple[float, int, int, float, float]] = {}
+        self._job = None
+
+    # ---------- 注册（界面线程） ----------
+
+    def on_progress(self, channel: str, handler: Callable):
+        self._progress_handlers[channel] = handler
+
+    def on_log(self, handler: Callable[[List[str]], None]):
+        self._log_handler = handler
+
+    def on_rate(self, channel: str, handler: Callable[[float, float], None]):
+        self._rate_handlers[channel] = handler
+
+    def start(self):
+        if self._job is None:
+            self._job = self.widget.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    # ---------- 提交事件（任意线程） ----------
+
+    def post(self, callback: Callable[[], None]):
+        with self._lock:
+            self._calls.append(callback)
+
+    def progress(self, channel: str, *args):
+        with self._lock:
+            self._progress[channel] = args
+
+    def log(self, message: str):
+        with self._lock:
+            if len(self._logs) == self._logs.maxlen:
+                self._dropped_logs += 1
+            self._logs.append(message)
+
+    def set_counts(self, channel: str, files: int, size: int):
+        """更新通道的累计处理文件数与字节数"""
+        with self._lock:
+            self._counts[channel] = (files, size)
+
+    def reset_counts(self, channel: str):
+        """开始新的操作时清零通道的计数与吞吐量"""
+        with self._lock:
+            self._counts.pop(channel, None)
+            self._reset.add(channel)
+
+    # ---------- 每帧处理（界面线程） ----------
+
+    def _drain(self):
+        try:
+            with self._lock:
+                calls, self._calls = self._calls, []
+                progress, self._progress = self._progress, {}
+                logs = list(self._logs)
+                self._logs.clear()
+                dropped, self._dropped_logs = self._dropped_logs, 0
+                counts = dict(self._counts)
+                reset, self._reset = self._reset, set()
+
+            for channel in reset:
+                self._rates.pop(channel, None)
+            for channel, args in progress.items():
+                handler = self._progress_handlers.get(channel)
+                if handler:
+                    handler(*args)
+            for callback in calls:
+                callback()
+            if logs and self._log_handler:
+                if dropped:
+                    logs.insert(0, f"…（省略 {dropped} 条日志）")
+                self._log_handler(logs)
+            self._update_rates(counts)
+        finally:
+            self._job = self.widget.after(self.interval_ms, self._drain)
+
+    def _update_rates(self, counts: Dict[str, Tuple[int, int]]):
+        now = time.monotonic()
+        for channel, (files, size) in counts.items():
+            handler = self._rate_handlers.get(channel)
+            if handler is None:
+                continue
+            last = self._rates.get(channel)
+            if last is None:
+                self._rates[channel] = (now, files, size, 0.0, 0.0)
+                continue
+            elapsed = now - last[0]
+            if elapsed < _RATE_INTERVAL:
+                continue
+            file_rate = (files - last[1]) / elapsed
+            byte_rate = (size - last[2]) / elapsed
+            if last[3] or last[4]:
+                file_rate = last[3] + (file_rate - last[3]) * _RATE_WEIGHT
+                byte_rate = last[4] + (byte_rate - last[4]) * _RATE_WEIGHT
+            self._rates[channel] = (now, files, size, file_rate, byte_rate)
+            handler(file_rate, byte_rate)
@@ -13,8 +13,16 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scanner import Scanner, ScanResult, format_size
-from cleaner import Cleaner, CleanResult, get_disk_usage
-from config import CLEANUP_ITEMS, RISK_COLORS, UI_CONFIG
+from cleaner import Cleaner, CleanResult
+from ui.drilldown import DrillDownPanel
+from ui.event_pump import UIEventPump
+from ui.space_hogs_view import SpaceHogsView
+from config import CLEANUP_ITEMS, RISK_COLORS, UI_CONFIG, SCAN_INDEX_PATH, QUICK_SCAN_SECONDS, METRICS_PATH, ESTIMATE_SECONDS, LOCKED_RETRY_HOURS, INSTANT_RECLAIM, INSTANT_RECLAIM_UNDO_SECONDS
+from utils.drives import get_drive_registry
+from utils.metrics import export_metrics, summarize
+from utils.pathstore import PathStore
+from utils.reclaim import ReclaimStager
+from utils.scan_index import ScanIndex
 
 
 class MainWindow(ctk.CTk):
@@ -36,18 +44,62 @@ class MainWindow(ctk.CTk):
         self.scan_results: Dict[str, ScanResult] = {}
         self.scanner: Scanner = None
         self.cleaner: Cleaner = None
+        self.drilldown: DrillDownPanel = None
         self.is_scanning = False
         self.is_cleaning = False
         self.current_drive = "C:"
-        self.available_drives = Scanner.get_available_drives()
+        self.drive_registry = get_drive_registry()
+        self.available_drives = self.drive_registry.drives()
+        self.scan_index = self._open_scan_index()
+        # 即时回收的暂存区在多次清理之间共用，后台删除完成后刷新磁盘用量
+        self.stager = ReclaimStager(
+            INSTANT_RECLAIM_UNDO_SECONDS,
+            on_purged=lambda entry: self.pump.post(self._on_staged_purged)
+        ) if INSTANT_RECLAIM else None
         
         # 创建UI
         self._create_widgets()
         self._layout_widgets()
         
+        # 工作线程的进度与日志统一经由事件泵，按固定帧率绘制
+        self.pump = UIEventPump(self, fps=UI_CONFIG["refresh_fps"], log_limit=UI_CONFIG["log_lines"])
+        self.pump.on_progress("scan", self._update_progress)
+        self.pump.on_progress("clean", self._update_progress_clean)
+        self.pump.on_log(self._write_logs)
+        self.pump.on_rate("scan", lambda files, size: self._show_rate("扫描", files, size))
+        self.pump.on_rate("clean", lambda files, size: self._show_rate("清理", files, size))
+        self.pump.start()
+        
+        # 空间大户页依赖事件泵，在其创建后再放入标签页
+        self.space_hogs_view = SpaceHogsView(
+            self.results_tabs.tab("空间大户"),
+            self.pump,
+            get_drive=lambda: self.current_drive,
+            log=self._log,
+            height=150
+        )
+        self.space_hogs_view.pack(fill="both", expand=True)
+        
         # 初始化磁盘信息
         self._update_disk_info()
     
+    @staticmethod
+    def _open_scan_index():
+        """打开增量扫描索引，失败时退化为每次完整扫描"""
+        try:
+            return ScanIndex(SCAN_INDEX_PATH)
+        except Exception:
+            return None
+
+    def _open_locked_memory(self):
+        """载入被占用文件的记录，没有索引或失败时返回 None（不跳过也不记录）"""
+        if self.scan_index is None:
+            return None
+        try:
+            return self.scan_index.locked_files(LOCKED_RETRY_HOURS * 3600)
+        except Exception:
+            return None
+
     def _create_widgets(self):
         """创建所有UI组件"""
         
@@ -85,6 +137,12 @@ class MainWindow(ctk.CTk):
         )
         self.drive_menu.set("C:")
         
+        self.profiles_switch = ctk.CTkSwitch(
+            self.drive_select_frame,
+            text="包含所有用户",
+            font=ctk.CTkFont(size=12)
+        )
+        
         # ===== 磁盘状态卡片 =====
         self.stats_frame = ctk.CTkFrame(self)
         
@@ -132,6 +190,13 @@ class MainWindow(ctk.CTk):
             text_color="#BBBBBB"
         )
         
+        self.rate_label = ctk.CTkLabel(
+            self.progress_section,
+            text="",
+            font=ctk.CTkFont(size=11),
+            text_color="#888888"
+        )
+        
         self.progress_percent_label = ctk.CTkLabel(
             self.progress_section,
             text="0%",
@@ -155,8 +220,13 @@ class MainWindow(ctk.CTk):
             text_color="#4CAF50"
         )
         
+        # 垃圾分类与空间大户并列为两个标签页
+        self.results_tabs = ctk.CTkTabview(self.results_frame, height=250)
+        self.results_tabs.add("垃圾分类")
+        self.results_tabs.add("空间大户")
+        
         self.scrollable_frame = ctk.CTkScrollableFrame(
-            self.results_frame,
+            self.results_tabs.tab("垃圾分类"),
             width=840,
             height=280
         )
@@ -198,6 +268,15 @@ class MainWindow(ctk.CTk):
             state="disabled"
         )
 
+        # 即时回收后在撤销期限内显示
+        self.undo_button = ctk.CTkButton(
+            self.control_frame,
+            text="↩ 撤销清理",
+            command=self._on_undo_click,
+            width=110,
+            height=40
+        )
+
         self.select_all_btn = ctk.CTkButton(
             self.control_frame,
             text="全选",
@@ -214,6 +293,18 @@ class MainWindow(ctk.CTk):
             height=40
         )
         
+        self.quick_scan_switch = ctk.CTkSwitch(
+            self.control_frame,
+            text=f"快速扫描 ({QUICK_SCAN_SECONDS:g}秒)",
+            font=ctk.CTkFont(size=12)
+        )
+        
+        self.estimate_switch = ctk.CTkSwitch(
+            self.control_frame,
+            text="大项先估算",
+            font=ctk.CTkFont(size=12)
+        )
+        
         self.tip_label = ctk.CTkLabel(
             self,
             text="💡 提示: 清理前请先手动关闭浏览器，清理后磁盘可用空间将即时更新。",
@@ -230,6 +321,7 @@ class MainWindow(ctk.CTk):
         self.drive_select_frame.pack(padx=30, pady=2, fill="x")
         self.drive_label.pack(side="left", padx=(5, 10))
         self.drive_menu.pack(side="left")
+        self.profiles_switch.pack(side="left", padx=15)
         
         self.stats_frame.pack(padx=30, pady=5, fill="x")
         self.disk_title.pack(pady=(5, 2))
@@ -240,16 +332,18 @@ class MainWindow(ctk.CTk):
         self.progress_title.pack(pady=(5, 0))
         self.operation_progress.pack(pady=2)
         self.progress_percent_label.place(relx=0.9, rely=0.3)
-        self.progress_detail_label.pack(pady=(0, 5))
+        self.progress_detail_label.pack(pady=(0, 0))
+        self.rate_label.pack(pady=(0, 5))
         
         self.results_frame.pack(padx=30, pady=5, fill="x")
         self.results_header.pack(fill="x", padx=10, pady=2)
         self.results_title_label.pack(side="left")
         self.results_size_label.pack(side="right")
-        self.scrollable_frame.configure(height=200)  # 稍微增加列表高度
-        self.scrollable_frame.pack(padx=10, pady=(0, 5), fill="x")
+        self.results_tabs.pack(padx=10, pady=(0, 5), fill="x")
+        self.scrollable_frame.configure(height=190)  # 稍微增加列表高度
+        self.scrollable_frame.pack(fill="x")
         
-        self.log_textbox.configure(height=150)  # 显著增加日志框高度，方便用户查看
+        self.log_textbox.configure(height=120)  # 显著增加日志框高度，方便用户查看
         self.log_textbox.pack(padx=30, pady=5, fill="x")
         
         self.control_frame.pack(padx=30, pady=5)
@@ -257,22 +351,39 @@ class MainWindow(ctk.CTk):
         self.clean_button.pack(side="left", padx=5)
         self.select_all_btn.pack(side="left", padx=5)
         self.deselect_all_btn.pack(side="left", padx=5)
+        self.quick_scan_switch.pack(side="left", padx=5)
+        self.estimate_switch.pack(side="left", padx=5)
         
         self.tip_label.pack(pady=(0, 5))
 
     def _log(self, message: str):
-        """添加日志到输出框"""
+        """添加日志（任意线程均可调用，下一帧统一写入输出框）"""
+        self.pump.log(message)
+
+    def _write_logs(self, messages: List[str]):
+        """一次性写入一帧内累积的日志，输出框只保留最近的若干行"""
         self.log_textbox.configure(state="normal")
-        self.log_textbox.insert("end", f"> {message}\n")
+        self.log_textbox.insert("end", "".join(f"> {message}\n" for message in messages))
+        lines = int(self.log_textbox.index("end-1c").split(".")[0])
+        excess = lines - UI_CONFIG["log_lines"]
+        if excess > 0:
+            self.log_textbox.delete("1.0", f"{excess + 1}.0")
         self.log_textbox.see("end")
         self.log_textbox.configure(state="disabled")
 
+    def _show_rate(self, operation: str, files_per_sec: float, bytes_per_sec: float):
+        if not (self.is_scanning or self.is_cleaning):
+            return
+        self.rate_label.configure(
+            text=f"{operation}速度: {files_per_sec:,.0f} 个/秒 · {format_size(int(max(0, bytes_per_sec)))}/秒"
+        )
+
     def _update_disk_info(self):
         if self.current_drive == "ALL":
             # 如果是全部磁盘，汇总信息
             total_cleaned, used_cleaned, free_cleaned = 0, 0, 0
             for d in self.available_drives:
-                usage = get_disk_usage(d)
+                usage = self.drive_registry.usage(d)
                 total_cleaned += usage["total"]
                 used_cleaned += usage["used"]
                 free_cleaned += usage["free"]
@@ -284,7 +395,7 @@ class MainWindow(ctk.CTk):
                     text=f"[ALL] 已用: {used_cleaned/(1024**3):.1f}GB | 可用: {free_cleaned/(1024**3):.1f}GB | 总计: {total_cleaned/(1024**3):.1f}GB"
                 )
         else:
-            usage = get_disk_usage(self.current_drive)
+            usage = self.drive_registry.usage(self.current_drive)
             if usage["total"] > 0:
                 percent = usage["percent"] / 100
                 self.disk_progress.set(percent)
@@ -305,6 +416,7 @@ class MainWindow(ctk.CTk):
         # 清空之前的扫描结果，强制重新扫描
         self.scan_results.clear()
         self._create_cleanup_items()
+        self.space_hogs_view.reset()
         self.results_size_label.configure(text="共计: 0 B")
 
     def _create_cleanup_items(self):
@@ -333,12 +445,54 @@ class MainWindow(ctk.CTk):
             cb.pack(side="left", pady=5)
             cb.configure(command=self._update_selected_size)
             
-            size_lbl = ctk.CTkLabel(frame, text=format_size(scan_result.total_size), 
+            size_text = format_size(scan_result.total_size)
+            if scan_result.estimate is not None:
+                # 抽样估算值，附 95% 置信区间，精确扫描完成后替换
+                estimate = scan_result.estimate
+                size_text = f"≈ {size_text} ({format_size(estimate.low)} ~ {format_size(estimate.high)})"
+            elif not scan_result.complete:
+                # 扫描被中止，实际大小不小于该值
+                size_text = f"≥ {size_text}"
+            size_lbl = ctk.CTkLabel(frame, text=size_text, 
                                     text_color=RISK_COLORS.get(item['risk'], "white"),
                                     font=ctk.CTkFont(weight="bold"))
             size_lbl.pack(side="right")
+            if scan_result.estimate is None and len(scan_result.files) > 0:
+                detail_btn = ctk.CTkButton(
+                    frame, text="明细", width=50, height=24,
+                    command=lambda r=scan_result: self._open_drilldown(r)
+                )
+                detail_btn.pack(side="right", padx=8)
             self.cleanup_checkboxes[item_id] = cb
 
+    def _open_drilldown(self, result: ScanResult):
+        """打开清理项的文件明细面板，同一时间只保留一个"""
+        if self.is_cleaning:
+            return
+        if self.drilldown is not None and self.drilldown.winfo_exists():
+            self.drilldown.destroy()
+        self.drilldown = DrillDownPanel(
+            self, result, on_apply=lambda kept: self._apply_exclusions(result, kept)
+        )
+        self.drilldown.focus()
+
+    def _apply_exclusions(self, result: ScanResult, kept: PathStore):
+        """用排除后的路径列表替换扫描结果，清理时只删除保留的项目"""
+        if self.is_cleaning or self.scan_results.get(result.item_id) is not result:
+            return
+        excluded_count = result.file_count - len(kept)
+        kept_size = sum(kept.size_at(index) for index in range(len(kept)))
+        excluded_size = result.total_size - kept_size
+        result.files = kept
+        result.total_size = kept_size
+        result.file_count = len(kept)
+        if excluded_count:
+            # 排除的文件仍在原目录中，不能再按目录整体移入暂存区
+            result.whole_roots = False
+        self._log(f"{result.item_name}: 已排除 {excluded_count} 项（{format_size(excluded_size)}），清理时跳过")
+        self._create_cleanup_items()
+        self._update_selected_size()
+
     def _update_selected_size(self):
         total = 0
         for iid, cb in self.cleanup_checkboxes.items():
@@ -347,30 +501,67 @@ class MainWindow(ctk.CTk):
         self.results_size_label.configure(text=f"已选中: {format_size(total)}")
 
     def _on_scan_click(self):
+        if self.is_scanning:
+            # 扫描进行中再次点击即停止扫描，已扫描到的结果保留
+            if self.scanner:
+                self.scanner.cancel()
+            self.scan_button.configure(state="disabled")
+            self._log("正在停止扫描...")
+            return
+        
         self.is_scanning = True
-        self.scan_button.configure(state="disabled")
+        self.scan_button.configure(text="⏹ 停止扫描")
         self.clean_button.configure(state="disabled")
         self.results_size_label.configure(text="正在扫描...")
         
         # 清理旧的扫描结果界面
+        self.scan_results = {}
         for widget in self.scrollable_frame.winfo_children():
             widget.destroy()
         self.cleanup_checkboxes.clear()
         
         drive_name = "全部磁盘" if self.current_drive == "ALL" else f"{self.current_drive} 盘"
-        self._log(f"开始扫描 {drive_name} 垃圾文件...")
+        quick = bool(self.quick_scan_switch.get())
+        self._log(f"开始{'快速' if quick else ''}扫描 {drive_name} 垃圾文件...")
+        self.pump.reset_counts("scan")
+        self.rate_label.configure(text="")
+        # 先在界面线程中创建扫描器，保证停止按钮随时可用
+        self.scanner = Scanner(
+            progress_callback=self._on_scan_progress,
+            drive=self.current_drive,
+            index=self.scan_index,
+            time_budget=QUICK_SCAN_SECONDS if quick else None,
+            drives=self.drive_registry,
+            all_profiles=bool(self.profiles_switch.get())
+        )
         threading.Thread(target=self._scan_thread, daemon=True).start()
+        if self.estimate_switch.get():
+            # 估算与精确扫描同时进行，超大项目的估算值约一秒后先显示出来
+            threading.Thread(target=self._estimate_thread, args=(self.scanner,), daemon=True).start()
 
     def _scan_thread(self):
         try:
-            self.scanner = Scanner(
-                progress_callback=self._on_scan_progress,
-                drive=self.current_drive
-            )
-            self.scan_results = self.scanner.scan_all()
-            self.after(0, self._on_scan_complete)
+            # 每个清理项扫描完毕即显示在列表中，不必等待全部完成
+            found = found_bytes = 0
+            for batch in self.scanner.iter_scan(keep_files=True):
+                if len(batch.files):
+                    found += len(batch.files)
+                    found_bytes += sum(batch.files.size_at(i) for i in range(len(batch.files)))
+                    self.pump.set_counts("scan", found, found_bytes)
+                if batch.done:
+                    self.pump.post(lambda r=batch.result: self._on_item_scanned(r))
+            self.scan_results = self.scanner.results
+            self.pump.post(self._on_scan_complete)
+        except Exception as e:
+            self._log(f"扫描出错: {e}")
+
+    def _estimate_thread(self, scanner: Scanner):
+        try:
+            for result in scanner.estimate(ESTIMATE_SECONDS).values():
+                # 估算较慢时可能已开始了新的扫描，旧扫描器的估算值直接丢弃
+                self.pump.post(lambda r=result: scanner is self.scanner and self._on_item_scanned(r))
         except Exception as e:
-            self.after(0, lambda: self._log(f"扫描出错: {e}"))
+            self._log(f"估算出错: {e}")
 
     def _select_all(self):
         """全选所有项目"""
@@ -387,13 +578,36 @@ class MainWindow(ctk.CTk):
         self._log("已取消选择所有项目")
 
     def _on_scan_progress(self, name: str, progress: int):
-        self.after(0, lambda: self._update_progress(name, progress))
+        # 同一帧内只绘制最新的进度
+        self.pump.progress("scan", name, progress)
 
     def _update_progress(self, name: str, progress: int):
         self.operation_progress.set(progress / 100)
         self.progress_percent_label.configure(text=f"{progress}%")
         self.progress_detail_label.configure(text=f"正在扫描: {name}")
 
+    def _on_item_scanned(self, result: ScanResult):
+        """单个清理项扫描完成（或得到估算值）"""
+        if not self.is_scanning:
+            return
+        current = self.scan_results.get(result.item_id)
+        if result.estimate is not None and current is not None and current.estimate is None:
+            # 精确结果已先到达，估算值作废
+            return
+        if result.estimate is not None:
+            self._log(
+                f"{result.item_name} 估算: 约 {format_size(result.total_size)}"
+                f"（抽样 {result.estimate.rounds} 轮，精确扫描进行中）"
+            )
+        elif len(result.by_profile) > 1:
+            usage = sorted(result.by_profile.items(), key=lambda kv: kv[1][0], reverse=True)
+            self._log(f"{result.item_name} 按用户: " + "，".join(
+                f"{name} {format_size(size)}" for name, (size, _) in usage
+            ))
+        self.scan_results[result.item_id] = result
+        self._create_cleanup_items()
+        self._update_selected_size()
+
     def _on_scan_complete(self):
         self.is_scanning = False
         self.scan_button.configure(state="normal", text="🔍 重新扫描")
@@ -403,7 +617,45 @@ class MainWindow(ctk.CTk):
         self.operation_progress.set(0)
         self.progress_percent_label.configure(text="0%")
         self.progress_detail_label.configure(text="扫描完毕，请选择项目清理")
-        self._log("扫描完成！")
+        incomplete = [r.item_name for r in self.scan_results.values() if not r.complete]
+        if self.scanner and self.scanner.timed_out:
+            self._log(f"快速扫描已到时间上限，{len(incomplete)} 个项目未扫描完整（标记为 ≥）")
+        elif incomplete:
+            self._log(f"扫描已停止，{len(incomplete)} 个项目未扫描完整（标记为 ≥）")
+        else:
+            self._log("扫描完成！")
+        self._log_scan_metrics()
+        self._export_metrics()
+
+    def _log_scan_metrics(self):
+        """在日志中输出扫描指标摘要及最慢的几个项目"""
+        results = list(self.scan_results.values())
+        if not results:
+            return
+        total = summarize(r.metrics for r in results)
+        self._log(
+            f"扫描统计: 目录 {total.dirs_visited} 个（索引复用 {total.dirs_cached}），"
+            f"目录项 {total.entries} 个，stat {total.stat_calls} 次，拒绝访问 {total.permission_denied} 次"
+        )
+        for r in sorted(results, key=lambda r: r.metrics.wall_time, reverse=True)[:3]:
+            if r.metrics.wall_time <= 0:
+                continue
+            self._log(
+                f"  - {r.item_name}: {r.metrics.wall_time:.2f} 秒，"
+                f"{format_size(int(r.metrics.bytes_per_sec))}/秒"
+            )
+
+    def _export_metrics(self, clean_results: Dict[str, CleanResult] = None):
+        """把最近一次扫描/清理的指标写入 JSON 文件，失败时忽略"""
+        try:
+            export_metrics(
+                METRICS_PATH,
+                self.scan_results,
+                clean_results,
+                extra={"drive": self.current_drive}
+            )
+        except Exception:
+            pass
 
     def _on_clean_click(self):
         selected = [id for id, cb in self.cleanup_checkboxes.items() if cb.get()]
@@ -413,24 +665,30 @@ class MainWindow(ctk.CTk):
         self.scan_button.configure(state="disabled")
         self.clean_button.configure(state="disabled")
         self._log("启动清理任务...")
+        self.pump.reset_counts("clean")
+        self.rate_label.configure(text="")
         threading.Thread(target=self._clean_thread, args=(selected,), daemon=True).start()
 
     def _clean_thread(self, selected):
         try:
             self.cleaner = Cleaner(
                 progress_callback=self._on_clean_progress,
-                log_callback=self._log  # 将日志重定向到UI
+                log_callback=self._log,  # 将日志重定向到UI
+                locked=self._open_locked_memory(),
+                stager=self.stager
             )
             results = self.cleaner.clean(self.scan_results, selected)
-            self.after(0, lambda: self._on_clean_complete(results))
+            self.pump.post(lambda: self._on_clean_complete(results))
         except Exception as e:
-            self.after(0, lambda: self._log(f"清理失败: {e}"))
+            self._log(f"清理失败: {e}")
 
     def _on_clean_progress(self, name: str, current: int, total: int):
-        percent = int((current / total) * 100) if total > 0 else 0
-        self.after(0, lambda: self._update_progress_clean(current, total, percent))
+        self.pump.progress("clean", current, total)
+        if self.cleaner:
+            self.pump.set_counts("clean", self.cleaner.processed_count, self.cleaner.freed_bytes)
 
-    def _update_progress_clean(self, current, total, percent):
+    def _update_progress_clean(self, current, total):
+        percent = int((current / total) * 100) if total > 0 else 0
         self.operation_progress.set(current / total if total > 0 else 0)
         self.progress_percent_label.configure(text=f"{percent}%")
         self.progress_detail_label.configure(text=f"清理进度: {current} / {total} 文件")
@@ -442,14 +700,61 @@ class MainWindow(ctk.CTk):
         for r in results.values():
             if r.failed_count > 0:
                 self._log(f"  - {r.item_name}: {r.failed_count} 个文件因占用无法删除")
+        total = summarize(r.metrics for r in results.values())
+        self._log(
+            f"清理统计: 处理 {total.entries} 项，stat {total.stat_calls} 次，"
+            f"权限不足 {total.permission_denied}，尝试移除空目录 {total.dirs_visited} 个"
+        )
+        self._export_metrics(results)
         
+        # 清理后可用空间已变化，丢弃缓存的用量
+        self.drive_registry.invalidate_usage()
         self._update_disk_info()
         self.operation_progress.set(0)
         self.progress_percent_label.configure(text="0%")
         self.progress_detail_label.configure(text="清理完成")
         self.scan_button.configure(state="normal")
+        self._show_undo()
         self._on_scan_click()
 
+    def _show_undo(self):
+        """有可撤销的暂存目录时显示撤销按钮，期限过后自动隐藏"""
+        if self.stager is None or not self.stager.restorable():
+            return
+        self._log(f"已移入暂存区的目录将在 {INSTANT_RECLAIM_UNDO_SECONDS // 60} 分钟后删除，期间可撤销")
+        self.undo_button.configure(state="normal")
+        self.undo_button.pack(side="left", padx=5, after=self.clean_button)
+        self.after(int(INSTANT_RECLAIM_UNDO_SECONDS * 1000), self._hide_undo)
+
+    def _hide_undo(self):
+        if self.stager is not None and self.stager.restorable():
+            return
+        self.undo_button.pack_forget()
+
+    def _on_undo_click(self):
+        if self.is_cleaning:
+            return
+        self.undo_button.configure(state="disabled")
+        threading.Thread(target=self._undo_thread, daemon=True).start()
+
+    def _undo_thread(self):
+        restored = self.stager.undo()
+        size = sum(entry.size for entry in restored)
+        self._log(f"已撤销 {len(restored)} 个目录的清理，恢复 {format_size(size)}")
+        self.pump.post(self._on_undo_complete)
+
+    def _on_undo_complete(self):
+        self.undo_button.pack_forget()
+        self.drive_registry.invalidate_usage()
+        self._update_disk_info()
+        if not self.is_scanning:
+            self._on_scan_click()
+
+    def _on_staged_purged(self):
+        """暂存目录在后台删除完毕，空间此时才真正释放"""
+        self.drive_registry.invalidate_usage()
+        self._update_disk_info()
+
 def main():
     MainWindow().mainloop()
 
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 空间大户页
+与垃圾分类并列显示：一次遍历整个驱动器，列出最大的文件和目录
+"""
+
+import customtkinter as ctk
+import os
+import subprocess
+import threading
+from typing import Callable, List, Optional
+
+from config import SPACE_HOGS_TOP_N
+from scanner import Scanner, format_size
+from ui.event_pump import UIEventPump
+from utils.space_hogs import SpaceHog, SpaceHogReport
+
+
+# 路径列最多显示的字符数，超出时省略开头
+PATH_CHARS = 72
+
+
+def _shorten(path: str) -> str:
+    if len(path) <= PATH_CHARS:
+        return path
+    return "…" + path[-(PATH_CHARS - 1):]
+
+
+class SpaceHogsView(ctk.CTkFrame):
+    """空间大户分析页"""
+
+    def __init__(
+        self,
+        master,
+        pump: UIEventPump,
+        get_drive: Callable[[], str],
+        log: Callable[[str], None],
+        height: int = 200
+    ):
+        """
+        Args:
+            master: 所在的标签页
+            pump: 主窗口的事件泵，分析线程经由它回到界面线程
+            get_drive: 返回当前选择的盘符（"C:" 或 "ALL"）
+            log: 写入主窗口日志
+            height: 列表高度
+        """
+        super().__init__(master, fg_color="transparent")
+        self.pump = pump
+        self.get_drive = get_drive
+        self.log = log
+        self.scanner: Optional[Scanner] = None
+        self.is_running = False
+
+        toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        toolbar.pack(fill="x", pady=(0, 4))
+        self.run_button = ctk.CTkButton(toolbar, text="📊 分析空间占用", width=140, command=self._on_run_click)
+        self.run_button.pack(side="left")
+        self.status_label = ctk.CTkLabel(
+            toolbar,
+            text=f"遍历整个磁盘，列出最大的 {SPACE_HOGS_TOP_N} 个文件和目录（只读，不会删除任何内容）",
+            font=ctk.CTkFont(size=12),
+            text_color="#BBBBBB"
+        )
+        self.status_label.pack(side="left", padx=10)
+
+        self.list_frame = ctk.CTkScrollableFrame(self, height=height)
+        self.list_frame.pack(fill="both", expand=True)
+
+    def reset(self):
+        """切换磁盘时清空上一次的结果，进行中的分析被取消且结果丢弃"""
+        if self.scanner:
+            self.scanner.cancel()
+            self.scanner = None
+        self.is_running = False
+        self.run_button.configure(text="📊 分析空间占用", state="normal")
+        for widget in self.list_frame.winfo_children():
+            widget.destroy()
+        self.status_label.configure(text="")
+
+    def _on_run_click(self):
+        if self.is_running:
+            if self.scanner:
+                self.scanner.cancel()
+            self.run_button.configure(state="disabled")
+            return
+
+        self.is_running = True
+        self.run_button.configure(text="⏹ 停止分析")
+        self.status_label.configure(text="正在遍历磁盘...")
+        for widget in self.list_frame.winfo_children():
+            widget.destroy()
+
+        drive = self.get_drive()
+        self.scanner = Scanner(drive=drive)
+        self.log(f"开始分析 {'全部磁盘' if drive == 'ALL' else drive} 的空间占用...")
+        threading.Thread(target=self._run_thread, args=(self.scanner,), daemon=True).start()
+
+    def _run_thread(self, scanner: Scanner):
+        try:
+            report = scanner.find_space_hogs()
+        except Exception as e:
+            self.log(f"空间分析出错: {e}")
+            report = None
+        self.pump.post(lambda: self._on_done(scanner, report))
+
+    def _on_done(self, scanner: Scanner, report: Optional[SpaceHogReport]):
+        if scanner is not self.scanner:
+            # 分析期间切换了磁盘
+            return
+        self.is_running = False
+        self.run_button.configure(text="📊 分析空间占用", state="normal")
+        if report is None:
+            self.status_label.configure(text="分析失败")
+            return
+
+        suffix = "" if report.complete else "（已停止，结果不完整）"
+        self.status_label.configure(
+            text=f"共 {report.file_count} 个文件、{report.dir_count} 个目录，"
+                 f"{format_size(report.total_size)}，用时 {report.elapsed:.1f} 秒{suffix}"
+        )
+        self.log(f"空间分析完成: {format_size(report.total_size)}，用时 {report.elapsed:.1f} 秒{suffix}")
+        self._render("最大的文件", report.files, is_dir=False)
+        self._render("最大的目录", report.dirs, is_dir=True)
+
+    def _render(self, title: str, hogs: List[SpaceHog], is_dir: bool):
+        ctk.CTkLabel(
+            self.list_frame, text=title, anchor="w", font=ctk.CTkFont(size=13, weight="bold")
+        ).pack(fill="x", padx=10, pady=(6, 2))
+        if not hogs:
+            ctk.CTkLabel(self.list_frame, text="无", anchor="w", text_color="#777777").pack(fill="x", padx=20)
+            return
+
+        for hog in hogs:
+            frame = ctk.CTkFrame(self.list_frame, fg_color="transparent")
+            frame.pack(fill="x", padx=10, pady=1)
+            text = _shorten(hog.path)
+            if is_dir:
+                text = f"{text}  ({hog.file_count} 个文件)"
+            ctk.CTkLabel(frame, text=text, anchor="w", font=ctk.CTkFont(size=12)).pack(
+                side="left", fill="x", expand=True
+            )
+            ctk.CTkLabel(
+                frame, text=format_size(hog.size), width=90, anchor="e",
+                font=ctk.CTkFont(size=12, weight="bold"), text_color="#FFA726"
+            ).pack(side="right", padx=5)
+            if os.name == "nt":
+                ctk.CTkButton(
+                    frame, text="定位", width=44, height=22,
+                    command=lambda p=hog.path: self._reveal(p)
+                ).pack(side="right", padx=5)
+
+    @staticmethod
+    def _reveal(path: str):
+        """在资源管理器中选中该文件或目录"""
+        try:
+            subprocess.Popen(["explorer", "/select,", path])
+        except OSError:
+            pass
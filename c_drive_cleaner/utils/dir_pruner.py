@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 空目录修剪
+以清理项的根目录为界，把删除过内容的目录组织成一棵目录树，自底向上移除空目录
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class EmptyDirPruner:
+    """
+    空目录修剪器
+
+    删除过程中不断登记被删除路径所在的目录，这些目录连同它们到根目录之间的祖先
+    组成一棵目录树；修剪时按深度从深到浅处理：
+      - 任意子目录未能移除的目录必然非空，直接跳过，不再访问磁盘
+      - 其余目录直接尝试 rmdir，非空目录会返回错误，不需要先列举
+    因此每个目录最多访问一次，且永远不会越过清理项的根目录，根目录本身也不会被移除。
+    """
+
+    def __init__(self, roots: Iterable[str]):
+        """
+        Args:
+            roots: 清理项的根目录
+        """
+        self._roots: Set[str] = {self._key(root) for root in roots if root}
+        # 目录键 -> (原始路径, 相对根目录的深度, 父目录键；父目录为根目录时为 None)
+        self._nodes: Dict[str, tuple] = {}
+        # 最近一次修剪实际尝试移除的目录数
+        self.attempted = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.normpath(path))
+
+    def add(self, directory: str):
+        """
+        登记一个有内容被删除的目录
+
+        Args:
+            directory: 被删除文件或目录的父目录
+        """
+        if not self._roots:
+            return
+
+        key = self._key(directory)
+        if key in self._nodes or key in self._roots:
+            return
+
+        # 向上查找所属的根目录，不在任何根目录之下的路径不做修剪
+        chain: List[tuple] = []
+        path = os.path.normpath(directory)
+        anchor: Optional[str] = None
+        while True:
+            if key in self._roots:
+                break
+            if key in self._nodes:
+                anchor = key
+                break
+            chain.append((key, path))
+            parent = os.path.dirname(path)
+            if parent == path:
+                return
+            path = parent
+            key = self._key(path)
+
+        depth = self._nodes[anchor][1] + 1 if anchor is not None else 1
+        parent_key = anchor
+        for key, path in reversed(chain):
+            self._nodes[key] = (path, depth, parent_key)
+            parent_key = key
+            depth += 1
+
+    def add_all(self, directories: Iterable[str]):
+        for directory in directories:
+            self.add(directory)
+
+    def prune(self, cancel_check=None) -> int:
+        """
+        自底向上移除空目录
+
+        Args:
+            cancel_check: 取消检查函数
+
+        Returns:
+            移除的目录数
+        """
+        removed = 0
+        self.attempted = 0
+        # 仍然存在（非空或无法移除）的目录，其祖先无需再尝试
+        kept: Set[str] = set()
+
+        for key, (path, _depth, parent_key) in sorted(
+            self._nodes.items(), key=lambda item: item[1][1], reverse=True
+        ):
+            if cancel_check and cancel_check():
+                break
+            if key not in kept:
+                self.attempted += 1
+                try:
+                    os.rmdir(path)
+                    removed += 1
+                    continue
+                except FileNotFoundError:
+                    continue
+                except OSError:
+                    pass
+            if parent_key is not None:
+                kept.add(parent_key)
+
+        self._nodes.clear()
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._nodes)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 目录聚合表
+扫描时顺带记录每个列举过的目录：父目录下标、自身文件字节数、子树字节数，
+之后查询任意已完整遍历的子树大小只需一次字典查找，无需再次遍历磁盘
+"""
+
+import os
+import threading
+from array import array
+from typing import Callable, Dict, List, Optional
+
+
+class DirTree:
+    """
+    目录聚合表
+
+    目录按首次遇到的顺序编号，父目录总是先于子目录加入，因此编号越大的目录层级越深：
+    汇总时只需按编号从大到小扫描一遍，把每个目录的子树字节数加到父目录上。
+    各列存放在 array 中（每个目录约 30 字节），路径到编号的映射是唯一的字典。
+
+    子树只有在它和它下面的每个子目录都被完整列举时才算完整；
+    遍历时被剪枝、无法访问或被中止的目录会使其所有祖先的子树大小只是下限。
+    增删目录可以在多个线程中同时进行，查询时自动完成汇总。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._paths: List[str] = []
+        # 父目录编号，-1 表示根（其父目录不在表中）
+        self.parents = array("q")
+        # 目录自身直接包含的文件字节数与文件数
+        self.own_bytes = array("q")
+        self.own_files = array("q")
+        # 列举时看到的子目录数，-1 表示尚未（或未能）列举
+        self._subdirs = array("q")
+        # 汇总结果：子树字节数、子树文件数与子树是否完整
+        self.subtree_bytes = array("q")
+        self.subtree_files = array("q")
+        self._complete = bytearray()
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.normpath(path))
+
+    # ---------- 记录（遍历线程） ----------
+
+    def add(self, path: str) -> int:
+        """
+        加入一个目录，父目录已在表中时自动关联
+
+        Returns:
+            目录编号；已存在时返回原编号
+        """
+        key = self._key(path)
+        parent_key = os.path.dirname(key)
+        with self._lock:
+            index = self._index.get(key)
+            if index is not None:
+                return index
+            parent = self._index.get(parent_key, -1) if parent_key != key else -1
+            index = len(self._paths)
+            self._index[key] = index
+            self._paths.append(path)
+            self.parents.append(parent)
+            self.own_bytes.append(0)
+            self.own_files.append(0)
+            self._subdirs.append(-1)
+            self._dirty = True
+            return index
+
+    def set_listing(self, index: int, own_bytes: int, own_files: int, subdirs: int):
+        """记录目录列举结果：自身文件的字节数与数量、子目录总数（含未进入的）"""
+        with self._lock:
+            self.own_bytes[index] = own_bytes
+            self.own_files[index] = own_files
+            self._subdirs[index] = subdirs
+            self._dirty = True
+
+    def add_sized(self, path: str, size: int, files: int = 0) -> int:
+        """加入一个已知总大小的目录（如来自大小缓存），作为不再细分的完整叶子"""
+        index = self.add(path)
+        self.set_listing(index, size, files, 0)
+        return index
+
+    def measure(self, path: str, cancel_check: Callable[[], bool] = None) -> int:
+        """
+        在调用线程中遍历一棵子树并记入表中
+
+        Returns:
+            子树的总字节数；被中止时只是已遍历部分的大小
+        """
+        total = 0
+        stack = [path]
+        while stack:
+            if cancel_check and cancel_check():
+                break
+            current = stack.pop()
+            index = self.add(current)
+            size = files = subdirs = 0
+            children = []
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_file(follow_symlinks=False):
+                                size += entry.stat(follow_symlinks=False).st_size
+                                files += 1
+                            elif entry.is_dir(follow_symlinks=False):
+                                subdirs += 1
+                                children.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            self.set_listing(index, size, files, subdirs)
+            total += size
+            stack.extend(children)
+        return total
+
+    # ---------- 查询 ----------
+
+    def _finalize(self):
+        """自底向上汇总子树字节数与完整性（需持有锁）"""
+        count = len(self._paths)
+        parents = self.parents
+        subtree_bytes = array("q", self.own_bytes)
+        subtree_files = array("q", self.own_files)
+        complete_children = array("q", bytes(8 * count))
+        complete = bytearray(count)
+        for index in range(count - 1, -1, -1):
+            expected = self._subdirs[index]
+            complete[index] = expected >= 0 and complete_children[index] == expected
+            parent = parents[index]
+            if parent >= 0:
+                subtree_bytes[parent] += subtree_bytes[index]
+                subtree_files[parent] += subtree_files[index]
+                complete_children[parent] += complete[index]
+        self.subtree_bytes = subtree_bytes
+        self.subtree_files = subtree_files
+        self._complete = complete
+        self._dirty = False
+
+    def index_of(self, path: str) -> Optional[int]:
+        return self._index.get(self._key(path))
+
+    def path_at(self, index: int) -> str:
+        return self._paths[index]
+
+    def is_complete(self, index: int) -> bool:
+        with self._lock:
+            if self._dirty:
+                self._finalize()
+            return bool(self._complete[index])
+
+    def subtree_size(self, path: str) -> Optional[int]:
+        """
+        查询目录的子树总字节数
+
+        Returns:
+            字节数；目录不在表中或子树未被完整遍历时为 None
+        """
+        index = self.index_of(path)
+        if index is None:
+            return None
+        with self._lock:
+            if self._dirty:
+                self._finalize()
+            return self.subtree_bytes[index] if self._complete[index] else None
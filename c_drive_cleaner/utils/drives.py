@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 驱动器信息缓存
+统一缓存分区列表、文件系统类型、簇大小和磁盘用量，避免每次扫描反复查询
+"""
+
+import ctypes
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class DriveInfo:
+    """单个驱动器的分区信息"""
+    drive: str
+    mountpoint: str
+    fstype: str = ""
+    opts: str = ""
+    # 簇大小（字节），0 表示尚未查询或无法获取
+    cluster_size: int = 0
+
+
+def _empty_usage() -> dict:
+    return {"total": 0, "used": 0, "free": 0, "percent": 0}
+
+
+class DriveRegistry:
+    """
+    带过期时间的驱动器信息缓存
+
+    分区列表变化很少，默认缓存较长时间；磁盘用量在清理后会变化，单独使用较短的过期时间，
+    清理完成后可调用 invalidate_usage 立即刷新。
+    """
+
+    def __init__(self, ttl: float = 60.0, usage_ttl: float = 2.0):
+        """
+        Args:
+            ttl: 分区列表的缓存时间（秒）
+            usage_ttl: 磁盘用量的缓存时间（秒）
+        """
+        self.ttl = ttl
+        self.usage_ttl = usage_ttl
+        self._lock = threading.Lock()
+        self._partitions: Optional[Dict[str, DriveInfo]] = None
+        self._partitions_at = 0.0
+        self._usage: Dict[str, Tuple[float, dict]] = {}
+        self._clusters: Dict[str, int] = {}
+
+    def drives(self) -> List[str]:
+        """获取所有可用本地驱动器（如 ["C:", "D:"]）"""
+        return sorted(self._load_partitions())
+
+    def info(self, drive: str) -> Optional[DriveInfo]:
+        """获取驱动器的分区信息，簇大小按需查询并缓存"""
+        info = self._load_partitions().get(self._normalize(drive))
+        if info is not None and not info.cluster_size:
+            info.cluster_size = self.cluster_size(info.drive)
+        return info
+
+    def usage(self, drive: str) -> dict:
+        """
+        获取磁盘使用情况
+
+        Returns:
+            包含 total, used, free, percent 的字典
+        """
+        drive = self._normalize(drive)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._usage.get(drive)
+        if cached is not None and now - cached[0] < self.usage_ttl:
+            return dict(cached[1])
+
+        try:
+            import psutil
+            usage = psutil.disk_usage(drive + "\\")
+            result = {
+                "total": usage.total,
+                "used": usage.used,
+                "free": usage.free,
+                "percent": usage.percent
+            }
+        except Exception:
+            result = _empty_usage()
+
+        with self._lock:
+            self._usage[drive] = (now, result)
+        return dict(result)
+
+    def cluster_size(self, drive: str) -> int:
+        """获取驱动器的簇大小（字节），无法获取时返回 0"""
+        drive = self._normalize(drive)
+        with self._lock:
+            if drive in self._clusters:
+                return self._clusters[drive]
+
+        size = 0
+        try:
+            if os.name == "nt":
+                sectors = ctypes.c_ulong()
+                bytes_per_sector = ctypes.c_ulong()
+                free_clusters = ctypes.c_ulong()
+                total_clusters = ctypes.c_ulong()
+                if ctypes.windll.kernel32.GetDiskFreeSpaceW(
+                    drive + "\\",
+                    ctypes.byref(sectors),
+                    ctypes.byref(bytes_per_sector),
+                    ctypes.byref(free_clusters),
+                    ctypes.byref(total_clusters)
+                ):
+                    size = sectors.value * bytes_per_sector.value
+            else:
+                size = os.statvfs(drive).f_frsize
+        except Exception:
+            size = 0
+
+        with self._lock:
+            self._clusters[drive] = size
+        return size
+
+    def invalidate_usage(self):
+        """清除磁盘用量缓存（清理完成后调用）"""
+        with self._lock:
+            self._usage.clear()
+
+    def invalidate(self):
+        """清除全部缓存（如插拔了移动硬盘）"""
+        with self._lock:
+            self._partitions = None
+            self._usage.clear()
+            self._clusters.clear()
+
+    def _load_partitions(self) -> Dict[str, DriveInfo]:
+        with self._lock:
+            if self._partitions is not None and time.monotonic() - self._partitions_at < self.ttl:
+                return self._partitions
+
+        partitions: Dict[str, DriveInfo] = {}
+        try:
+            import psutil
+            for part in psutil.disk_partitions(all=False):
+                if 'fixed' in part.opts.lower() or part.fstype:
+                    drive = part.device.replace("\\", "")
+                    partitions[drive] = DriveInfo(drive, part.mountpoint, part.fstype, part.opts)
+        except Exception:
+            partitions = {}
+        if not partitions:
+            partitions = {"C:": DriveInfo("C:", "C:\\")}
+
+        with self._lock:
+            self._partitions = partitions
+            self._partitions_at = time.monotonic()
+        return partitions
+
+    @staticmethod
+    def _normalize(drive: str) -> str:
+        return drive.upper().replace("\\", "")
+
+
+_registry = DriveRegistry()
+
+
+def get_drive_registry() -> DriveRegistry:
+    """获取进程内共享的驱动器信息缓存"""
+    return _registry
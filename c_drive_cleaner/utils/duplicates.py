@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 重复文件查找
+分阶段筛选，尽量少读文件内容：
+  1. 遍历时只记录大小，大小唯一的文件直接排除（不读取任何内容）
+  2. 大小相同的文件比较首尾两个数据块的哈希
+  3. 仍然相同的文件才计算完整哈希
+哈希在进程池中以内存映射方式读取，多个大文件可以真正并行计算
+"""
+
+import hashlib
+import mmap
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.reclaim import STAGING_DIR_NAME
+from utils.walker import TreeWalker
+
+
+# 首尾哈希读取的数据块大小
+BLOCK_SIZE = 64 * 1024
+# 完整哈希时每次送入哈希函数的长度
+_CHUNK_SIZE = 8 * 1024 * 1024
+# 每次提交给进程池的文件数，两次提交之间检查取消
+_SUBMIT_CHUNK = 256
+
+# 遍历时不进入的目录
+_SKIP_DIRS = {"$recycle.bin", "system volume information", ".git", ".svn", "node_modules", STAGING_DIR_NAME}
+
+
+@dataclass
+class FileInfo:
+    """候选文件"""
+    path: str
+    size: int
+    mtime: float
+    file_id: int
+
+
+@dataclass
+class DuplicateGroup:
+    """一组内容完全相同的文件"""
+    size: int
+    # 保留的文件（修改时间最早者，视为原件）
+    keep: FileInfo
+    # 可删除的副本
+    copies: List[FileInfo] = field(default_factory=list)
+
+    @property
+    def reclaimable(self) -> int:
+        return self.size * len(self.copies)
+
+
+@dataclass
+class DuplicateStats:
+    """各阶段的筛选数量，用于评估读取量"""
+    files_seen: int = 0
+    # 目录项未提供文件 ID（Windows）时为去除硬链接额外调用 stat 的次数
+    id_lookups: int = 0
+    size_candidates: int = 0
+    partial_hashed: int = 0
+    full_hashed: int = 0
+    bytes_hashed: int = 0
+
+
+def _hash_file(task: Tuple[str, int, bool]) -> Tuple[str, Optional[bytes]]:
+    """
+    计算文件哈希（在进程池中执行，必须是模块级函数）
+
+    Args:
+        task: (路径, 扫描时的大小, 是否只哈希首尾数据块)
+
+    Returns:
+        (路径, 摘要)；文件无法读取或大小已变化时摘要为 None
+    """
+    path, size, partial = task
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if len(mapped) != size:
+                    return path, None
+                with memoryview(mapped) as view:
+                    if partial:
+                        digest.update(view[:BLOCK_SIZE])
+                        digest.update(view[-BLOCK_SIZE:])
+                    else:
+                        for offset in range(0, size, _CHUNK_SIZE):
+                            digest.update(view[offset:offset + _CHUNK_SIZE])
+    except (OSError, ValueError):
+        return path, None
+    return path, digest.digest()
+
+
+class DuplicateFinder:
+    """分阶段的重复文件查找器"""
+
+    def __init__(
+        self,
+        min_size: int = 1024 * 1024,
+        workers: int = 4,
+        walk_workers: int = 4,
+        use_processes: bool = True,
+        cancel_check: Callable[[], bool] = None
+    ):
+        """
+        Args:
+            min_size: 参与比较的最小文件大小（字节）
+            workers: 计算哈希的进程（或线程）数
+            walk_workers: 遍历目录树的线程数
+            use_processes: 是否使用进程池计算哈希，无法创建进程池时自动改用线程池
+            cancel_check: 取消检查函数
+        """
+        self.min_size = max(1, min_size)
+        self.workers = max(1, workers)
+        self.walk_workers = max(1, walk_workers)
+        self.use_processes = use_processes
+        self.cancel_check = cancel_check
+        self.stats = DuplicateStats()
+
+    def _cancelled(self) -> bool:
+        return bool(self.cancel_check and self.cancel_check())
+
+    def find(self, roots: Iterable[str]) -> List[DuplicateGroup]:
+        """
+        查找重复文件
+
+        Args:
+            roots: 要搜索的目录
+
+        Returns:
+            重复文件组，按可释放空间从大到小排列；被取消时返回已确认的部分
+        """
+        self.stats = DuplicateStats()
+        by_size = self._collect(roots)
+        candidates = [files for files in by_size.values() if len(files) > 1]
+        self.stats.size_candidates = sum(len(files) for files in candidates)
+        if not candidates or self._cancelled():
+            return []
+
+        with self._make_pool() as pool:
+            # 不超过两个数据块的文件，首尾哈希已覆盖全部内容
+            groups = self._refine(pool, candidates, partial=True)
+            small = [g for g in groups if g[0].size <= 2 * BLOCK_SIZE]
+            large = [g for g in groups if g[0].size > 2 * BLOCK_SIZE]
+            confirmed = small + self._refine(pool, large, partial=False)
+
+        result = [self._to_group(files) for files in confirmed]
+        result.sort(key=lambda group: group.reclaimable, reverse=True)
+        return result
+
+    def _collect(self, roots: Iterable[str]) -> Dict[int, List[FileInfo]]:
+        """遍历目录，按大小分组；同一文件的多个硬链接只保留一个"""
+        by_size: Dict[int, List[FileInfo]] = {}
+        seen_ids = set()
+        lock = threading.Lock()
+        min_size = self.min_size
+        stats = self.stats
+
+        def on_file(entry: os.DirEntry, depth: int):
+            st = entry.stat(follow_symlinks=False)
+            looked_up = st.st_size >= min_size and not st.st_ino
+            if looked_up:
+                # Windows 上目录项的 stat 不含文件 ID，需对路径调用 stat 取得真实的 ID
+                try:
+                    st = os.stat(entry.path, follow_symlinks=False)
+                except OSError:
+                    st = None
+            with lock:
+                stats.files_seen += 1
+                stats.id_lookups += looked_up
+                if st is None or st.st_size < min_size:
+                    return
+                key = (st.st_dev, st.st_ino)
+                if st.st_ino and key in seen_ids:
+                    return
+                seen_ids.add(key)
+                by_size.setdefault(st.st_size, []).append(
+                    FileInfo(entry.path, st.st_size, st.st_mtime, st.st_ino)
+                )
+
+        walker = TreeWalker(workers=self.walk_workers, skip_dirs=_SKIP_DIRS, cancel_check=self.cancel_check)
+        walker.walk(self._outermost(roots), on_file=on_file)
+        return by_size
+
+    @staticmethod
+    def _outermost(roots: Iterable[str]) -> List[str]:
+        """去掉被其他根目录包含的根目录，避免同一文件被计为自身的副本"""
+        keys = sorted({os.path.normcase(os.path.normpath(root)): root for root in roots if root}.items())
+        result: List[Tuple[str, str]] = []
+        for key, root in keys:
+            if any(key.startswith(outer.rstrip("\\/") + os.sep) for outer, _ in result):
+                continue
+            result.append((key, root))
+        return [root for _, root in result]
+
+    def _make_pool(self) -> Executor:
+        if self.use_processes:
+            try:
+                return ProcessPoolExecutor(max_workers=self.workers)
+            except (OSError, NotImplementedError, ImportError):
+                pass
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hash")
+
+    def _refine(self, pool: Executor, groups: List[List[FileInfo]], partial: bool) -> List[List[FileInfo]]:
+        """按哈希把每组再细分，只保留仍有两个以上成员的组"""
+        files = [info for group in groups for info in group]
+        digests = self._hash_all(pool, files, partial)
+
+        refined = []
+        for group in groups:
+            buckets: Dict[bytes, List[FileInfo]] = {}
+            for info in group:
+                digest = digests.get(info.path)
+                if digest is not None:
+                    buckets.setdefault(digest, []).append(info)
+            refined.extend(bucket for bucket in buckets.values() if len(bucket) > 1)
+        return refined
+
+    def _hash_all(self, pool: Executor, files: List[FileInfo], partial: bool) -> Dict[str, Optional[bytes]]:
+        digests: Dict[str, Optional[bytes]] = {}
+        for start in range(0, len(files), _SUBMIT_CHUNK):
+            if self._cancelled():
+                break
+            chunk = files[start:start + _SUBMIT_CHUNK]
+            tasks = [(info.path, info.size, partial) for info in chunk]
+            try:
+                results = list(pool.map(_hash_file, tasks, chunksize=16))
+            except BrokenProcessPool:
+                # 进程池不可用（如被安全软件拦截）时本批改在当前线程计算
+                results = [_hash_file(task) for task in tasks]
+            digests.update(results)
+            for info in chunk:
+                if partial:
+                    self.stats.partial_hashed += 1
+                    self.stats.bytes_hashed += min(info.size, 2 * BLOCK_SIZE)
+                else:
+                    self.stats.full_hashed += 1
+                    self.stats.bytes_hashed += info.size
+        return digests
+
+    @staticmethod
+    def _to_group(files: List[FileInfo]) -> DuplicateGroup:
+        """修改时间最早者视为原件保留，相同时保留路径最短的"""
+        files = sorted(files, key=lambda info: (info.mtime, len(info.path), info.path))
+        return DuplicateGroup(files[0].size, files[0], files[1:])
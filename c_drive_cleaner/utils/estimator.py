@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 抽样估算
+对超大的清理项逐层抽样子目录并外推大小与命中数，约一秒内给出带置信区间的估计值；
+精确扫描在后台继续进行，完成后替换估计值
+"""
+
+import math
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.scan_plan import DirRule, FileRule
+
+
+# 95% 置信区间对应的正态分位数
+_Z = 1.96
+
+
+@dataclass
+class SizeEstimate:
+    """单个清理项的抽样估算结果"""
+    item_id: str
+    # 大小与命中数的点估计
+    size: int = 0
+    file_count: int = 0
+    # 大小的 95% 置信区间
+    low: int = 0
+    high: int = 0
+    # 完成的抽样轮数
+    rounds: int = 0
+    # 实际列举的目录数
+    dirs_listed: int = 0
+
+
+class _Listing:
+    """单个目录在某条规则下的列举结果（同一次估算内各轮抽样共享）"""
+
+    __slots__ = ("bytes", "count", "subdirs")
+
+    def __init__(self):
+        self.bytes = 0
+        self.count = 0
+        # (子目录路径, 是否整棵子树都计入, 子目录下生效的规则)
+        self.subdirs: List[Tuple[str, bool, object]] = []
+
+
+class SizeEstimator:
+    """
+    按层抽样的目录树大小估算器
+
+    每一轮从根目录出发，每层只随机进入有限个子目录，并按 子目录总数/抽样数 放大其结果
+    （Knuth 随机探测估计）。多轮结果的均值作为点估计，轮间方差给出置信区间。
+    目录列举结果在各轮之间复用，靠近根目录的层级很快就是精确值，方差主要来自深层。
+    """
+
+    def __init__(
+        self,
+        fanout: int = 2,
+        max_dirs: int = 64,
+        time_budget: float = 1.0,
+        min_rounds: int = 3,
+        max_rounds: int = 200,
+        seed: Optional[int] = None,
+        cancel_check: Callable[[], bool] = None
+    ):
+        """
+        Args:
+            fanout: 每层最多抽样的子目录数
+            max_dirs: 每轮按 fanout 展开的目录数上限，超出后每层只抽一个子目录
+            time_budget: 估算的时间预算（秒），至少完成 min_rounds 轮
+            min_rounds: 最少抽样轮数
+            max_rounds: 最多抽样轮数
+            seed: 随机种子
+            cancel_check: 取消检查函数
+        """
+        self.fanout = max(1, fanout)
+        self.max_dirs = max_dirs
+        self.time_budget = time_budget
+        self.min_rounds = max(2, min_rounds)
+        self.max_rounds = max(self.min_rounds, max_rounds)
+        self.cancel_check = cancel_check
+        self._rng = random.Random(seed)
+        self._listings: Dict[Tuple[int, str, bool], _Listing] = {}
+
+    def estimate(self, item_id: str, rules: List[object]) -> SizeEstimate:
+        """
+        估算一个清理项的大小
+
+        Args:
+            item_id: 清理项 ID
+            rules: 该清理项的扫描规则（FileRule / DirRule）
+
+        Returns:
+            估算结果；被取消时为已完成轮次的估算
+        """
+        rules = self._outermost(rules)
+        if not rules:
+            return SizeEstimate(item_id)
+        deadline = time.monotonic() + self.time_budget
+        sizes: List[float] = []
+        counts: List[float] = []
+
+        while len(sizes) < self.max_rounds:
+            if self.cancel_check and self.cancel_check():
+                break
+            if len(sizes) >= self.min_rounds and time.monotonic() >= deadline:
+                break
+            budget = [self.max_dirs]
+            size = count = 0.0
+            for rule in rules:
+                rule_size, rule_count = self._probe(rule, rule.root, 0, False, budget)
+                size += rule_size
+                count += rule_count
+            sizes.append(size)
+            counts.append(count)
+
+        result = SizeEstimate(item_id, rounds=len(sizes), dirs_listed=len(self._listings))
+        if not sizes:
+            return result
+        mean = sum(sizes) / len(sizes)
+        if len(sizes) > 1:
+            variance = sum((s - mean) ** 2 for s in sizes) / (len(sizes) - 1)
+            margin = _Z * math.sqrt(variance / len(sizes))
+        else:
+            margin = mean
+        result.size = int(mean)
+        result.file_count = int(round(sum(counts) / len(counts)))
+        result.low = int(max(0.0, mean - margin))
+        result.high = int(mean + margin)
+        return result
+
+    @staticmethod
+    def _outermost(rules: List[object]) -> List[object]:
+        """同一清理项的根目录相互嵌套时只保留外层，避免重复计数"""
+        keys = {id(rule): os.path.normcase(os.path.normpath(rule.root)) for rule in rules}
+        result = []
+        for rule in rules:
+            key = keys[id(rule)]
+            nested = any(
+                other is not rule and key.startswith(keys[id(other)].rstrip("\\/") + os.sep)
+                for other in rules
+            )
+            if not nested:
+                result.append(rule)
+        return result
+
+    def _probe(self, rule, path: str, depth: int, whole: bool, budget: List[int]) -> Tuple[float, float]:
+        """对一棵子树做一次随机探测，返回 (估计字节数, 估计命中数)"""
+        listing = self._list(rule, path, depth, whole)
+        size = float(listing.bytes)
+        count = float(listing.count)
+        subdirs = listing.subdirs
+        if not subdirs or (self.cancel_check and self.cancel_check()):
+            return size, count
+
+        budget[0] -= 1
+        k = min(len(subdirs), self.fanout if budget[0] > 0 else 1)
+        scale = len(subdirs) / k
+        for child, child_whole, child_rule in self._rng.sample(subdirs, k):
+            child_size, child_count = self._probe(child_rule, child, depth + 1, child_whole, budget)
+            size += child_size * scale
+            count += child_count * scale
+        return size, count
+
+    def _list(self, rule, path: str, depth: int, whole: bool) -> _Listing:
+        """列举目录并按规则判定其中的文件与子目录，结果缓存供后续轮次复用"""
+        key = (id(rule), path, whole)
+        listing = self._listings.get(key)
+        if listing is not None:
+            return listing
+
+        listing = _Listing()
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            entries = []
+
+        for entry in entries:
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    if whole:
+                        listing.bytes += entry.stat(follow_symlinks=False).st_size
+                    elif isinstance(rule, FileRule) and rule.matches(entry):
+                        listing.bytes += entry.stat(follow_symlinks=False).st_size
+                        listing.count += 1
+                elif entry.is_dir(follow_symlinks=False):
+                    if whole:
+                        listing.subdirs.append((entry.path, whole, rule))
+                    elif isinstance(rule, FileRule):
+                        child_rule = rule.descend(entry.path)
+                        if child_rule is not None:
+                            listing.subdirs.append((entry.path, whole, child_rule))
+                    elif isinstance(rule, DirRule):
+                        self._classify_dir(rule, entry, depth, listing)
+            except OSError:
+                continue
+
+        self._listings[key] = listing
+        return listing
+
+    @staticmethod
+    def _classify_dir(rule: DirRule, entry: os.DirEntry, depth: int, listing: _Listing):
+        """与扫描计划的目录规则判定一致：过期的目标目录整体计入，其余按深度和跳过列表继续"""
+        name_lower = entry.name.lower()
+        if name_lower in rule.targets:
+            if (rule.now - entry.stat(follow_symlinks=False).st_mtime) > rule.threshold:
+                listing.count += 1
+                listing.subdirs.append((entry.path, True, rule))
+                return
+        if name_lower in rule.skip_dirs or entry.name.startswith('.'):
+            return
+        if depth < rule.max_depth:
+            listing.subdirs.append((entry.path, False, rule))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 扫描/清理指标
+记录每个清理项的耗时、访问的目录数、系统调用次数等，供界面日志和监控导出使用
+"""
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Optional
+
+
+@dataclass
+class ItemMetrics:
+    """单个清理项一次扫描或清理的指标"""
+    # 耗时（秒）
+    wall_time: float = 0.0
+    # 访问的目录数（清理时为尝试移除的空目录数）
+    dirs_visited: int = 0
+    # 直接复用增量索引、未重新列举的目录数
+    dirs_cached: int = 0
+    # 检查的目录项数（清理时为处理的路径数）
+    entries: int = 0
+    # stat/lstat 调用次数
+    stat_calls: int = 0
+    # 因权限不足跳过的目录或文件数
+    permission_denied: int = 0
+    # 其他系统错误数
+    os_errors: int = 0
+    # 因上次删除时被占用且之后未变化而跳过的文件数
+    locked_skipped: int = 0
+    # 找到（或释放）的字节数
+    bytes: int = 0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes / self.wall_time if self.wall_time > 0 else 0.0
+
+    @property
+    def entries_per_sec(self) -> float:
+        return self.entries / self.wall_time if self.wall_time > 0 else 0.0
+
+    def merge(self, other: "ItemMetrics"):
+        """累加另一组计数（耗时取较大值）"""
+        self.wall_time = max(self.wall_time, other.wall_time)
+        self.dirs_visited += other.dirs_visited
+        self.dirs_cached += other.dirs_cached
+        self.entries += other.entries
+        self.stat_calls += other.stat_calls
+        self.permission_denied += other.permission_denied
+        self.os_errors += other.os_errors
+        self.locked_skipped += other.locked_skipped
+        self.bytes += other.bytes
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["wall_time"] = round(self.wall_time, 4)
+        data["bytes_per_sec"] = round(self.bytes_per_sec)
+        data["entries_per_sec"] = round(self.entries_per_sec)
+        return data
+
+
+def _records(results: Optional[Dict[str, object]], size_field: str) -> list:
+    if not results:
+        return []
+    return [
+        {
+            "id": result.item_id,
+            "name": result.item_name,
+            size_field: getattr(result, size_field),
+            **result.metrics.to_dict(),
+        }
+        for result in results.values()
+    ]
+
+
+def export_metrics(
+    path: str,
+    scan_results: Optional[Dict[str, object]] = None,
+    clean_results: Optional[Dict[str, object]] = None,
+    extra: Optional[dict] = None
+):
+    """
+    把扫描/清理结果的指标导出为 JSON 文件
+
+    Args:
+        path: 输出文件路径
+        scan_results: 按清理项 ID 索引的扫描结果
+        clean_results: 按清理项 ID 索引的清理结果
+        extra: 附加字段（如盘符）
+    """
+    data = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        **(extra or {}),
+        "scan": _records(scan_results, "total_size"),
+        "clean": _records(clean_results, "cleaned_size"),
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # 先写临时文件再替换，监控程序不会读到写了一半的文件
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def summarize(metrics: Iterable[ItemMetrics]) -> ItemMetrics:
+    """汇总多个清理项的指标"""
+    total = ItemMetrics()
+    for item in metrics:
+        total.merge(item)
+    return total
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 紧凑路径存储
+以列式结构保存扫描到的文件路径，避免大量重复的目录前缀占用内存
+"""
+
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+
+_SEPARATORS = tuple(sep for sep in (os.sep, os.altsep) if sep)
+
+# 记录类型：未知（未保存扫描时的元数据）、文件、目录
+KIND_UNKNOWN = 0
+KIND_FILE = 1
+KIND_DIR = 2
+
+
+class PathRecord(NamedTuple):
+    """一条路径及扫描时记录的元数据"""
+    path: str
+    size: int
+    kind: int
+    # 扫描时的修改时间，0 表示未记录
+    mtime: float
+    # 文件 ID（inode），0 表示未记录
+    file_id: int
+
+
+class PathStore:
+    """
+    列式路径列表
+
+    每条记录拆分为以下几列：
+      - 父目录编号：指向去重后的父目录表（父目录字符串带结尾分隔符）
+      - 文件名：以 UTF-8 编码连续存放在同一个 bytearray 中，按偏移量定位
+      - 文件大小：与记录一一对应的 int64 数组
+      - 扫描时的元数据：类型、修改时间、文件 ID，供清理时免去重复 stat
+
+    迭代时按需拼接出完整路径，用法与 List[str] 一致。
+    """
+
+    __slots__ = ("_dirs", "_dir_index", "_parents", "_names", "_offsets", "_sizes", "_kinds", "_mtimes", "_file_ids")
+
+    def __init__(self):
+        self._dirs: List[str] = []
+        self._dir_index: Dict[str, int] = {}
+        self._parents = array("I")
+        self._names = bytearray()
+        # 第 i 个文件名位于 _names[_offsets[i]:_offsets[i + 1]]
+        self._offsets = array("I", [0])
+        self._sizes = array("q")
+        self._kinds = bytearray()
+        self._mtimes = array("d")
+        self._file_ids = array("Q")
+
+    def add(
+        self,
+        parent: str,
+        name: str,
+        size: int = 0,
+        mtime: float = 0.0,
+        file_id: int = 0,
+        kind: int = KIND_UNKNOWN
+    ):
+        """
+        追加一条记录
+
+        Args:
+            parent: 父目录，必须以路径分隔符结尾，使 parent + name 即为完整路径
+            name: 文件或目录名
+            size: 字节大小
+            mtime: 扫描时的修改时间
+            file_id: 扫描时的文件 ID
+            kind: 记录类型（KIND_FILE / KIND_DIR）
+        """
+        index = self._dir_index.get(parent)
+        if index is None:
+            index = len(self._dirs)
+            self._dirs.append(parent)
+            self._dir_index[parent] = index
+
+        self._parents.append(index)
+        self._names += name.encode("utf-8", "surrogatepass")
+        self._offsets.append(len(self._names))
+        self._sizes.append(size)
+        self._kinds.append(kind)
+        self._mtimes.append(mtime)
+        self._file_ids.append(file_id)
+
+    def add_entry(self, entry: os.DirEntry, size: int = 0):
+        """追加一个 os.scandir 返回的目录项"""
+        path = entry.path
+        kind = KIND_DIR if entry.is_dir(follow_symlinks=False) else KIND_FILE
+        self.add(path[:len(path) - len(entry.name)], entry.name, size, kind=kind)
+
+    def append(self, path: str, size: int = 0):
+        """按完整路径追加一条记录，兼容 list.append 的用法"""
+        split = max(path.rfind(sep) for sep in _SEPARATORS) + 1
+        self.add(path[:split], path[split:], size)
+
+    def size_at(self, index: int) -> int:
+        """获取第 index 条记录的字节大小"""
+        return self._sizes[index]
+
+    def name_at(self, index: int) -> str:
+        """获取第 index 条记录的文件名"""
+        return self._names[self._offsets[index]:self._offsets[index + 1]].decode("utf-8", "surrogatepass")
+
+    def parent_id_at(self, index: int) -> int:
+        """获取第 index 条记录的父目录编号（即 parents 中的下标）"""
+        return self._parents[index]
+
+    @property
+    def parents(self) -> List[str]:
+        """去重后的父目录表（带结尾分隔符），调用方不应修改"""
+        return self._dirs
+
+    def record_at(self, index: int) -> PathRecord:
+        """获取第 index 条记录及其扫描时的元数据"""
+        return PathRecord(
+            self._path_at(index),
+            self._sizes[index],
+            self._kinds[index],
+            self._mtimes[index],
+            self._file_ids[index]
+        )
+
+    def select(self, indices: Iterable[int]) -> "PathStore":
+        """
+        按下标挑选记录，生成新的路径列表（保留全部元数据）
+
+        Args:
+            indices: 要保留的记录下标
+
+        Returns:
+            新的 PathStore
+        """
+        store = PathStore()
+        for index in indices:
+            store.add(
+                self._dirs[self._parents[index]],
+                self.name_at(index),
+                self._sizes[index],
+                self._mtimes[index],
+                self._file_ids[index],
+                self._kinds[index]
+            )
+        return store
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """依次返回 (完整路径, 字节大小)"""
+        for index in range(len(self._parents)):
+            yield self._path_at(index), self._sizes[index]
+
+    def records(self) -> Iterator[PathRecord]:
+        """依次返回带扫描时元数据的记录"""
+        for index in range(len(self._parents)):
+            yield self.record_at(index)
+
+    def _path_at(self, index: int) -> str:
+        return self._dirs[self._parents[index]] + self.name_at(index)
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self._parents)):
+            yield self._path_at(index)
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self._parents)
+        if not 0 <= index < len(self._parents):
+            raise IndexError("PathStore index out of range")
+        return self._path_at(index)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PathStore):
+            return list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PathStore({len(self)} paths, {len(self._dirs)} dirs)"
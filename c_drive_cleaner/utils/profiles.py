@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 多用户配置文件
+枚举本机的用户配置文件目录，把当前用户的路径模板展开到每个用户，
+并把命中的路径归属到对应的用户，便于按用户汇总
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+
+# 不是真实用户的配置文件目录（小写）
+_SKIP_PROFILES = {"public", "default", "default user", "all users", "defaultapppool"}
+
+# Windows 上的重分析点，"Default User"、"All Users" 等兼容性目录联接不作为独立用户
+_FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+
+
+@dataclass
+class UserProfile:
+    """一个用户配置文件"""
+    name: str
+    path: str
+
+
+def _is_reparse(entry: os.DirEntry) -> bool:
+    if entry.is_symlink():
+        return True
+    attributes = getattr(entry.stat(follow_symlinks=False), "st_file_attributes", 0)
+    return bool(attributes & _FILE_ATTRIBUTE_REPARSE_POINT)
+
+
+def list_profiles(root: str, current: Optional[str] = None) -> List[UserProfile]:
+    """
+    枚举用户配置文件目录
+
+    只保留含有 AppData 的真实用户目录；当前用户的目录即使不在 root 下也会包含在内。
+
+    Args:
+        root: 存放配置文件的目录（通常为 C:\\Users）
+        current: 当前用户的配置文件目录
+
+    Returns:
+        按名称排序的配置文件列表
+    """
+    profiles: Dict[str, UserProfile] = {}
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                try:
+                    if entry.name.lower() in _SKIP_PROFILES or not entry.is_dir(follow_symlinks=False):
+                        continue
+                    if _is_reparse(entry) or not os.path.isdir(os.path.join(entry.path, "AppData")):
+                        continue
+                except OSError:
+                    continue
+                profiles[os.path.normcase(entry.path)] = UserProfile(entry.name, entry.path)
+    except OSError:
+        pass
+
+    if current and os.path.isdir(current):
+        current = os.path.normpath(current)
+        profiles.setdefault(os.path.normcase(current), UserProfile(os.path.basename(current), current))
+    return sorted(profiles.values(), key=lambda profile: profile.name.lower())
+
+
+class ProfileResolver:
+    """
+    把路径展开到各用户，并判断路径属于哪个用户
+
+    归属判断按父目录前缀缓存，同一目录下的大量命中只需一次字典查找。
+    """
+
+    def __init__(self, profiles: Iterable[UserProfile], current: str):
+        """
+        Args:
+            profiles: 参与扫描的用户配置文件
+            current: 配置中路径模板所基于的当前用户配置文件目录
+        """
+        self.profiles = list(profiles)
+        self.current = os.path.normpath(current)
+        self._current_key = os.path.normcase(self.current)
+        self._prefixes = [
+            (os.path.normcase(os.path.normpath(profile.path)).rstrip("\\/") + os.sep, profile.name)
+            for profile in self.profiles
+        ]
+        self._owners: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def expand(self, path: str) -> List[str]:
+        """
+        把位于当前用户目录下的路径展开到每个用户，其余路径原样返回
+
+        Args:
+            path: 配置中的路径
+
+        Returns:
+            展开后的路径列表
+        """
+        key = os.path.normcase(os.path.normpath(path))
+        if key != self._current_key and not key.startswith(self._current_key.rstrip("\\/") + os.sep):
+            return [path]
+        relative = os.path.normpath(path)[len(self.current):].lstrip("\\/")
+        return [os.path.join(profile.path, relative) if relative else profile.path for profile in self.profiles]
+
+    def owner(self, prefix: str) -> Optional[str]:
+        """
+        返回路径所属的用户名
+
+        Args:
+            prefix: 目录路径（命中文件的父目录前缀）
+
+        Returns:
+            用户名；不在任何用户目录下时为 None
+        """
+        owner = self._owners.get(prefix, "")
+        if owner != "":
+            return owner
+        key = os.path.normcase(prefix)
+        if not key.endswith(os.sep):
+            key += os.sep
+        owner = None
+        for profile_prefix, name in self._prefixes:
+            if key.startswith(profile_prefix):
+                owner = name
+                break
+        with self._lock:
+            self._owners[prefix] = owner
+        return owner
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 即时回收
+把整个目录改名移入同一卷上的隐藏暂存目录（一次系统调用，与目录中的文件数无关），
+清理项随即报告完成；后台的低优先级线程在撤销期限过后再真正删除暂存的目录树。
+撤销期限内可以把暂存的目录改名移回原处。
+"""
+
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+# 每个卷根目录下的暂存目录名，以 "." 开头，开发者清理和重复文件查找不会进入
+STAGING_DIR_NAME = ".cdrivecleaner-staging"
+
+_FILE_ATTRIBUTE_HIDDEN = 0x2
+_FILE_ATTRIBUTE_SYSTEM = 0x4
+# 线程进入后台处理模式：同时降低 CPU 与 I/O 优先级
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
+
+@dataclass
+class StagedEntry:
+    """一个已移入暂存目录、等待删除的目录"""
+    original: str
+    staged: str
+    size: int
+    count: int
+    item_id: str
+    # 撤销期限截止时间（time.monotonic），之后由后台线程删除
+    deadline: float
+
+
+def _volume_root(path: str) -> str:
+    """返回路径所在卷的根目录"""
+    path = os.path.abspath(path)
+    drive = os.path.splitdrive(path)[0]
+    if drive:
+        return drive + os.sep
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def _set_background_priority():
+    """降低当前线程的优先级，删除大量文件时不与前台程序争抢磁盘"""
+    if os.name != "nt":
+        return
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_MODE_BACKGROUND_BEGIN)
+    except Exception:
+        pass
+
+
+class ReclaimStager:
+    """
+    即时回收暂存区
+
+    stage 只做一次同卷改名，失败（跨卷、被占用、无权创建暂存目录等）时返回 False，
+    由调用方按原方式删除。暂存目录在每个卷上首次使用时创建，
+    上次运行遗留的暂存内容（程序在删除前退出）会一并交给后台线程删除。
+    可在多个线程中调用。
+    """
+
+    def __init__(
+        self,
+        undo_seconds: float = 300,
+        on_purged: Callable[[StagedEntry], None] = None
+    ):
+        """
+        Args:
+            undo_seconds: 撤销期限（秒），为 0 时暂存后立即开始删除
+            on_purged: 每个暂存目录删除完毕后的回调（在后台线程中调用）
+        """
+        self.undo_seconds = max(0.0, undo_seconds)
+        self.on_purged = on_purged
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._entries: List[StagedEntry] = []
+        # 卷根目录 -> 暂存目录；为 None 表示该卷无法暂存
+        self._staging: Dict[str, Optional[str]] = {}
+        self._serial = 0
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- 暂存 ----------
+
+    def _staging_dir(self, path: str) -> Optional[str]:
+        """取得路径所在卷的暂存目录，首次使用时创建（需持有锁）"""
+        volume = os.path.normcase(_volume_root(path))
+        if volume in self._staging:
+            return self._staging[volume]
+        staging = os.path.join(volume, STAGING_DIR_NAME)
+        try:
+            os.makedirs(staging, exist_ok=True)
+            if os.name == "nt":
+                import ctypes
+                ctypes.windll.kernel32.SetFileAttributesW(staging, _FILE_ATTRIBUTE_HIDDEN | _FILE_ATTRIBUTE_SYSTEM)
+            leftovers = [os.path.join(staging, name) for name in os.listdir(staging)]
+        except OSError:
+            staging = None
+            leftovers = []
+        self._staging[volume] = staging
+        # 遗留内容已无法撤销，立即删除
+        now = time.monotonic()
+        for leftover in leftovers:
+            self._entries.append(StagedEntry(leftover, leftover, 0, 0, "", now))
+        if leftovers:
+            self._start()
+        return staging
+
+    def stage(self, path: str, size: int = 0, count: int = 1, item_id: str = "") -> bool:
+        """
+        把目录改名移入暂存区
+
+        Args:
+            path: 要删除的目录
+            size: 目录大小（字节），仅用于记录
+            count: 目录代表的清理项数量，仅用于记录
+            item_id: 所属清理项
+
+        Returns:
+            是否已移入暂存区
+        """
+        with self._lock:
+            staging = self._staging_dir(path)
+            if staging is None:
+                return False
+            self._serial += 1
+            target = os.path.join(staging, f"{int(time.time())}-{self._serial}-{os.path.basename(path)}")
+        try:
+            os.rename(path, target)
+        except OSError:
+            return False
+        entry = StagedEntry(path, target, size, count, item_id, time.monotonic() + self.undo_seconds)
+        with self._lock:
+            self._entries.append(entry)
+            self._start()
+            self._wakeup.notify()
+        return True
+
+    # ---------- 撤销 ----------
+
+    def restorable(self) -> List[StagedEntry]:
+        """撤销期限内、尚未开始删除的暂存目录"""
+        now = time.monotonic()
+        with self._lock:
+            return [entry for entry in self._entries if entry.item_id and entry.deadline > now]
+
+    def undo(self, item_id: Optional[str] = None) -> List[StagedEntry]:
+        """
+        把撤销期限内的暂存目录移回原处
+
+        Args:
+            item_id: 只撤销该清理项；为 None 时撤销全部
+
+        Returns:
+            已恢复的目录；原位置已被重新占用或改名失败的目录保留在暂存区，按期删除
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                entry for entry in self._entries
+                if entry.item_id and entry.deadline > now and (item_id is None or entry.item_id == item_id)
+            ]
+            # 从队列中取出，后台线程不会在改名过程中删除它们
+            for entry in candidates:
+                self._entries.remove(entry)
+
+        restored = []
+        failed = []
+        for entry in candidates:
+            try:
+                if os.path.lexists(entry.original):
+                    raise FileExistsError(entry.original)
+                # 清理后修剪空目录时父目录可能已被移除
+                os.makedirs(os.path.dirname(entry.original), exist_ok=True)
+                os.rename(entry.staged, entry.original)
+                restored.append(entry)
+            except OSError:
+                failed.append(entry)
+
+        if failed:
+            with self._lock:
+                self._entries.extend(failed)
+                self._wakeup.notify()
+        return restored
+
+    # ---------- 后台删除 ----------
+
+    def _start(self):
+        """启动后台删除线程（需持有锁）"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._purge_loop, name="reclaim-purge", daemon=True)
+            self._thread.start()
+
+    def _next_due(self) -> Optional[StagedEntry]:
+        """等待下一个到期的暂存目录，队列为空时返回 None（需持有锁）"""
+        while self._entries:
+            entry = min(self._entries, key=lambda e: e.deadline)
+            delay = entry.deadline - time.monotonic()
+            if delay <= 0:
+                self._entries.remove(entry)
+                return entry
+            self._wakeup.wait(delay)
+        return None
+
+    def _purge_loop(self):
+        _set_background_priority()
+        while True:
+            with self._lock:
+                entry = self._next_due()
+                if entry is None:
+                    self._thread = None
+                    return
+            shutil.rmtree(entry.staged, ignore_errors=True)
+            if self.on_purged and entry.item_id:
+                try:
+                    self.on_purged(entry)
+                except Exception:
+                    pass
+
+    def purge_now(self, timeout: Optional[float] = None) -> bool:
+        """
+        放弃撤销，立即删除全部暂存目录并等待完成（命令行退出前使用）
+
+        Returns:
+            是否在超时前删除完毕
+        """
+        with self._lock:
+            for entry in self._entries:
+                entry.deadline = 0
+            if self._entries:
+                self._start()
+            thread = self._thread
+            self._wakeup.notify()
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 扫描结果明细视图
+为明细面板提供排序、过滤、分页查询，以及清理前排除文件或整个子目录
+"""
+
+import os
+from array import array
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from utils.pathstore import PathStore
+
+
+# 列表模式：逐个文件（或目标目录）、按所在目录汇总
+MODE_FILES = "files"
+MODE_DIRS = "dirs"
+
+# 排序方式
+SORT_SIZE_DESC = "size_desc"
+SORT_SIZE_ASC = "size_asc"
+SORT_NAME = "name"
+SORT_PATH = "path"
+
+
+class ViewRow(NamedTuple):
+    """明细列表中的一行"""
+    # 文件模式为记录下标，目录模式为目录表中的编号
+    key: int
+    path: str
+    size: int
+    # 目录模式下该目录整个子树中的记录数，文件模式恒为 1
+    count: int
+    excluded: bool
+
+
+class ViewQuery:
+    """一次排序/过滤的结果：按显示顺序排列的行键"""
+
+    __slots__ = ("mode", "order")
+
+    def __init__(self, mode: str, order: array):
+        self.mode = mode
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+
+def _prefix_key(path: str) -> str:
+    """目录的比较键（规范化，带结尾分隔符），子树中的路径都以它开头"""
+    key = os.path.normcase(path)
+    return key if key.endswith(("\\", "/")) else key + os.sep
+
+
+def _parent_dir(path: str) -> Optional[str]:
+    """上一级目录（保留结尾分隔符），已到根目录时为 None"""
+    trimmed = path.rstrip("\\/")
+    cut = max(trimmed.rfind("\\"), trimmed.rfind("/"))
+    if cut < 0:
+        return None
+    return trimmed[:cut + 1]
+
+
+class Exclusions:
+    """
+    排除状态的快照
+
+    目录与记录集合不可变，父目录缓存属于快照自身，因此可以交给后台线程使用，
+    界面线程之后的修改不会影响它。
+    """
+
+    __slots__ = ("store", "dirs", "rows", "_parent_excluded")
+
+    def __init__(self, store: PathStore, dirs: FrozenSet[str], rows: FrozenSet[int]):
+        self.store = store
+        self.dirs = dirs
+        self.rows = rows
+        self._parent_excluded: Dict[int, bool] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.dirs or self.rows)
+
+    def dir_excluded(self, parent_id: int) -> bool:
+        excluded = self._parent_excluded.get(parent_id)
+        if excluded is None:
+            key = _prefix_key(self.store.parents[parent_id])
+            excluded = any(key.startswith(prefix) for prefix in self.dirs)
+            self._parent_excluded[parent_id] = excluded
+        return excluded
+
+    def excluded(self, index: int) -> bool:
+        return index in self.rows or self.dir_excluded(self.store.parent_id_at(index))
+
+
+class ResultView:
+    """
+    扫描结果明细的查询模型
+
+    排序和过滤只生成行键数组（百万条记录约占 8MB），显示时按页拼出路径，
+    界面只需为可见的几十行创建控件。query 不修改自身状态，可以在后台线程中执行；
+    排除操作与 page 在界面线程中调用。需要在后台统计或应用排除时，先在界面线程中
+    取 snapshot，再把快照交给 excluded_totals / kept。
+    """
+
+    def __init__(self, store: PathStore):
+        self.store = store
+        # 被排除的目录前缀（规范化，带结尾分隔符），其下的全部记录都不清理
+        self._excluded_dirs: Set[str] = set()
+        # 被单独排除的记录下标
+        self._excluded_rows: Set[int] = set()
+        # 父目录编号 -> 是否位于被排除的目录之下（排除项变化时清空）
+        self._parent_excluded: Dict[int, bool] = {}
+        # 目录表：含记录的目录及其上层目录，各自的子树总字节数与记录数（首次使用时计算）
+        self._dir_table: Optional[Tuple[List[str], array, array]] = None
+
+    # ---------- 查询 ----------
+
+    def query(self, mode: str = MODE_FILES, sort: str = SORT_SIZE_DESC, text: str = "") -> ViewQuery:
+        """
+        按模式、排序方式和过滤文本生成行顺序
+
+        Args:
+            mode: MODE_FILES 或 MODE_DIRS
+            sort: 排序方式
+            text: 路径中需包含的文本（不区分大小写），为空时不过滤
+
+        Returns:
+            查询结果
+        """
+        text = text.strip().lower()
+        if mode == MODE_DIRS:
+            keys = self._matching_dirs(text)
+            paths, sizes, _ = self._dirs()
+            key_funcs = {
+                SORT_NAME: lambda k: os.path.basename(paths[k].rstrip("\\/")).lower(),
+                SORT_PATH: lambda k: paths[k].lower(),
+            }
+        else:
+            keys = self._matching_rows(text)
+            sizes = None
+            parents = self.store.parents
+            key_funcs = {
+                SORT_NAME: lambda k: self.store.name_at(k).lower(),
+                SORT_PATH: lambda k: (parents[self.store.parent_id_at(k)].lower(), self.store.name_at(k).lower()),
+            }
+
+        size_of = sizes.__getitem__ if sizes is not None else self.store.size_at
+        if sort == SORT_SIZE_DESC:
+            keys.sort(key=size_of, reverse=True)
+        elif sort == SORT_SIZE_ASC:
+            keys.sort(key=size_of)
+        elif sort in key_funcs:
+            keys.sort(key=key_funcs[sort])
+        return ViewQuery(mode, array("q", keys))
+
+    def _matching_rows(self, text: str) -> List[int]:
+        total = len(self.store)
+        if not text:
+            return list(range(total))
+        parents = [parent.lower() for parent in self.store.parents]
+        parent_hit = [text in parent for parent in parents]
+        keys = []
+        for index in range(total):
+            parent_id = self.store.parent_id_at(index)
+            # 父目录已包含过滤文本时无需再解码文件名
+            if parent_hit[parent_id] or text in parents[parent_id] + self.store.name_at(index).lower():
+                keys.append(index)
+        return keys
+
+    def _matching_dirs(self, text: str) -> List[int]:
+        paths = self._dirs()[0]
+        return [key for key, path in enumerate(paths) if not text or text in path.lower()]
+
+    def _dirs(self) -> Tuple[List[str], array, array]:
+        """
+        目录表（首次使用时计算）
+
+        包括直接含有记录的目录，以及它们直到所有记录的公共上层目录为止的每一级上层目录，
+        因此中间层目录也能整体查看和排除。大小与记录数按子树累计。
+        """
+        if self._dir_table is not None:
+            return self._dir_table
+
+        parents = self.store.parents
+        own_sizes = array("q", bytes(8 * len(parents)))
+        own_counts = array("q", bytes(8 * len(parents)))
+        for index in range(len(self.store)):
+            parent_id = self.store.parent_id_at(index)
+            own_sizes[parent_id] += self.store.size_at(index)
+            own_counts[parent_id] += 1
+
+        used = [parent_id for parent_id in range(len(parents)) if own_counts[parent_id]]
+        # 所有记录的公共上层目录，向上累计到此为止
+        common = os.path.commonprefix([_prefix_key(parents[parent_id]) for parent_id in used])
+        top_len = max(common.rfind("\\"), common.rfind("/")) + 1
+
+        index_of: Dict[str, int] = {}
+        paths: List[str] = []
+        sizes = array("q")
+        counts = array("q")
+        for parent_id in used:
+            path = parents[parent_id]
+            while path is not None:
+                key = _prefix_key(path)
+                if len(key) < top_len:
+                    break
+                node = index_of.get(key)
+                if node is None:
+                    node = index_of[key] = len(paths)
+                    paths.append(path)
+                    sizes.append(0)
+                    counts.append(0)
+                sizes[node] += own_sizes[parent_id]
+                counts[node] += own_counts[parent_id]
+                path = _parent_dir(path)
+        self._dir_table = (paths, sizes, counts)
+        return self._dir_table
+
+    def page(self, query: ViewQuery, offset: int, limit: int) -> List[ViewRow]:
+        """
+        取查询结果中的一页
+
+        Args:
+            query: 查询结果
+            offset: 起始行
+            limit: 最多返回的行数
+
+        Returns:
+            该页的行
+        """
+        rows = []
+        for key in query.order[max(0, offset):max(0, offset) + limit]:
+            if query.mode == MODE_DIRS:
+                paths, sizes, counts = self._dirs()
+                path = paths[key]
+                rows.append(ViewRow(key, path, sizes[key], counts[key], self._is_path_excluded(path)))
+            else:
+                rows.append(ViewRow(key, self.store[key], self.store.size_at(key), 1, self.is_excluded(key)))
+        return rows
+
+    # ---------- 排除 ----------
+
+    def _is_path_excluded(self, path: str) -> bool:
+        """目录是否位于被排除的目录之下（含其本身）"""
+        key = _prefix_key(path)
+        return any(key.startswith(prefix) for prefix in self._excluded_dirs)
+
+    def _is_dir_excluded(self, parent_id: int) -> bool:
+        """父目录是否位于被排除的目录之下"""
+        excluded = self._parent_excluded.get(parent_id)
+        if excluded is None:
+            excluded = self._is_path_excluded(self.store.parents[parent_id])
+            self._parent_excluded[parent_id] = excluded
+        return excluded
+
+    def is_excluded(self, index: int) -> bool:
+        """第 index 条记录是否被排除"""
+        if not self._excluded_dirs and not self._excluded_rows:
+            return False
+        return index in self._excluded_rows or self._is_dir_excluded(self.store.parent_id_at(index))
+
+    def toggle(self, query: ViewQuery, row: ViewRow) -> bool:
+        """
+        切换一行的排除状态：文件行只影响该记录，目录行影响整个子目录
+
+        Returns:
+            切换后是否为排除状态
+        """
+        if query.mode == MODE_DIRS:
+            prefix = _prefix_key(row.path)
+            covering = {p for p in self._excluded_dirs if prefix.startswith(p)}
+            if covering:
+                # 恢复时同时解除覆盖它的上层排除
+                self._excluded_dirs -= covering
+                excluded = False
+            else:
+                self._excluded_dirs.add(prefix)
+                excluded = True
+            self._parent_excluded.clear()
+            return excluded
+
+        if row.key in self._excluded_rows:
+            self._excluded_rows.discard(row.key)
+            return False
+        if self._is_dir_excluded(self.store.parent_id_at(row.key)):
+            # 位于被排除的目录下，单独恢复没有意义，需先恢复目录
+            return True
+        self._excluded_rows.add(row.key)
+        return True
+
+    def clear_exclusions(self):
+        self._excluded_dirs.clear()
+        self._excluded_rows.clear()
+        self._parent_excluded.clear()
+
+    @property
+    def has_exclusions(self) -> bool:
+        return bool(self._excluded_dirs or self._excluded_rows)
+
+    def snapshot(self) -> Exclusions:
+        """当前排除状态的快照（在界面线程中调用）"""
+        return Exclusions(self.store, frozenset(self._excluded_dirs), frozenset(self._excluded_rows))
+
+    def excluded_totals(self, exclusions: Optional[Exclusions] = None) -> Tuple[int, int]:
+        """
+        被排除的 (记录数, 字节数)
+
+        Args:
+            exclusions: 排除状态快照，在后台线程中调用时必须提供；省略时使用当前状态
+        """
+        exclusions = exclusions if exclusions is not None else self.snapshot()
+        count = size = 0
+        if not exclusions:
+            return count, size
+        for index in range(len(self.store)):
+            if exclusions.excluded(index):
+                count += 1
+                size += self.store.size_at(index)
+        return count, size
+
+    def kept(self, exclusions: Optional[Exclusions] = None) -> PathStore:
+        """
+        去掉被排除记录后的路径列表
+
+        Args:
+            exclusions: 排除状态快照，在后台线程中调用时必须提供；省略时使用当前状态
+        """
+        exclusions = exclusions if exclusions is not None else self.snapshot()
+        if not exclusions:
+            return self.store
+        return self.store.select(index for index in range(len(self.store)) if not exclusions.excluded(index))
@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 增量扫描索引
+以 SQLite 持久化每个已扫描目录的修改时间和匹配结果，
+再次扫描时目录修改时间未变化则直接复用，不再列举该目录
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+_SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    rule        TEXT    NOT NULL,
+    path        TEXT    NOT NULL,
+    mtime       REAL    NOT NULL,
+    entry_count INTEGER NOT NULL,
+    file_count  INTEGER NOT NULL,
+    total_size  INTEGER NOT NULL,
+    names       TEXT    NOT NULL,
+    sizes       BLOB    NOT NULL,
+    mtimes      BLOB    NOT NULL,
+    file_ids    BLOB    NOT NULL,
+    owners      TEXT    NOT NULL,
+    subdirs     TEXT    NOT NULL,
+    PRIMARY KEY (rule, path)
+)
+"""
+
+# 各清理项的历史扫描产出速率（字节/秒），用于快速扫描时安排扫描顺序
+_STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS item_stats (
+    item_id       TEXT    PRIMARY KEY,
+    bytes_per_sec REAL    NOT NULL,
+    samples       INTEGER NOT NULL
+)
+"""
+
+# 开发者中间件目录的大小缓存，目录修改时间未变化时直接复用上次的大小
+_SIZES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dir_sizes (
+    path  TEXT    PRIMARY KEY,
+    mtime REAL    NOT NULL,
+    size  INTEGER NOT NULL,
+    seen  REAL    NOT NULL
+)
+"""
+
+# 删除时被其他程序占用的文件，在文件变化或记录过期之前扫描和清理都跳过它们
+_LOCKED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS locked_files (
+    path     TEXT    PRIMARY KEY,
+    file_id  INTEGER NOT NULL,
+    mtime    REAL    NOT NULL,
+    failures INTEGER NOT NULL,
+    seen     REAL    NOT NULL
+)
+"""
+
+# 超过此时间（秒）未再用到的目录大小记录会被清除
+_SIZE_EXPIRY = 90 * 24 * 3600
+
+# 新样本在产出速率滑动平均中的权重
+_RATE_WEIGHT = 0.5
+
+# 名称列表的分隔符，Windows 文件名中不可能出现 NUL
+_SEP = "\0"
+
+
+class DirRecord:
+    """单个目录的索引记录"""
+
+    __slots__ = ("mtime", "entry_count", "names", "sizes", "subdirs", "owners", "file_mtimes", "file_ids")
+
+    def __init__(
+        self,
+        mtime: float,
+        entry_count: int,
+        names: List[str],
+        sizes: array,
+        subdirs: List[str],
+        owners: List[str] = None,
+        file_mtimes: array = None,
+        file_ids: array = None
+    ):
+        self.mtime = mtime
+        self.entry_count = entry_count
+        # 该目录下直接匹配的文件名及大小
+        self.names = names
+        self.sizes = sizes
+        # 子目录名
+        self.subdirs = subdirs
+        # 每个匹配文件所属的清理项 ID
+        self.owners = owners or []
+        # 每个匹配文件扫描时的修改时间和文件 ID
+        self.file_mtimes = file_mtimes if file_mtimes is not None else array("d", bytes(8 * len(names)))
+        self.file_ids = file_ids if file_ids is not None else array("Q", bytes(8 * len(names)))
+
+    @property
+    def file_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def total_size(self) -> int:
+        return sum(self.sizes)
+
+
+class ScanIndex:
+    """持久化扫描索引"""
+
+    def __init__(self, path: str):
+        """
+        打开（或创建）索引数据库
+
+        Args:
+            path: 数据库文件路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != _SCHEMA_VERSION:
+                # 索引只是缓存，结构变化时直接重建
+                self._conn.execute("DROP TABLE IF EXISTS dirs")
+                self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            self._conn.execute(_SCHEMA)
+            self._conn.execute(_STATS_SCHEMA)
+            self._conn.execute(_SIZES_SCHEMA)
+            self._conn.execute(_LOCKED_SCHEMA)
+            self._conn.commit()
+
+    def load(self, rule: str) -> Dict[str, DirRecord]:
+        """读取某条规则的全部目录记录"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, mtime, entry_count, names, sizes, mtimes, file_ids, owners, subdirs FROM dirs WHERE rule = ?",
+                (rule,)
+            ).fetchall()
+
+        records = {}
+        for path, mtime, entry_count, names, sizes, mtimes, file_ids, owners, subdirs in rows:
+            size_array = array("q")
+            size_array.frombytes(sizes)
+            mtime_array = array("d")
+            mtime_array.frombytes(mtimes)
+            id_array = array("Q")
+            id_array.frombytes(file_ids)
+            records[path] = DirRecord(
+                mtime,
+                entry_count,
+                names.split(_SEP) if names else [],
+                size_array,
+                subdirs.split(_SEP) if subdirs else [],
+                owners.split(_SEP) if owners else [],
+                mtime_array,
+                id_array
+            )
+        return records
+
+    def update(self, rule: str, changed: Dict[str, DirRecord], removed: Iterable[str]):
+        """
+        写回一次扫描的变化
+
+        Args:
+            rule: 规则键
+            changed: 重新列举过的目录记录
+            removed: 本次扫描未再访问到的目录
+        """
+        rows = [
+            (
+                rule,
+                path,
+                record.mtime,
+                record.entry_count,
+                record.file_count,
+                record.total_size,
+                _SEP.join(record.names),
+                record.sizes.tobytes(),
+                record.file_mtimes.tobytes(),
+                record.file_ids.tobytes(),
+                _SEP.join(record.owners),
+                _SEP.join(record.subdirs),
+            )
+            for path, record in changed.items()
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "DELETE FROM dirs WHERE rule = ? AND path = ?",
+                    ((rule, path) for path in removed)
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+
+    def item_rates(self) -> Dict[str, float]:
+        """读取各清理项的历史产出速率（字节/秒）"""
+        with self._lock:
+            rows = self._conn.execute("SELECT item_id, bytes_per_sec FROM item_stats").fetchall()
+        return dict(rows)
+
+    def record_item_rates(self, rates: Dict[str, float]):
+        """
+        记录一次完整扫描得到的产出速率，与历史值做滑动平均
+
+        Args:
+            rates: 清理项 ID -> 本次的字节/秒
+        """
+        if not rates:
+            return
+        with self._lock:
+            with self._conn:
+                for item_id, rate in rates.items():
+                    row = self._conn.execute(
+                        "SELECT bytes_per_sec, samples FROM item_stats WHERE item_id = ?", (item_id,)
+                    ).fetchone()
+                    if row is not None:
+                        rate = row[0] + (rate - row[0]) * _RATE_WEIGHT
+                    samples = row[1] + 1 if row is not None else 1
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO item_stats VALUES (?, ?, ?)", (item_id, rate, samples)
+                    )
+
+    def load_dir_sizes(self) -> Dict[str, Tuple[float, int]]:
+        """读取全部目录大小缓存：路径 -> (目录修改时间, 大小)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, mtime, size FROM dir_sizes").fetchall()
+        return {path: (mtime, size) for path, mtime, size in rows}
+
+    def store_dir_sizes(self, sizes: Dict[str, Tuple[float, int]], used: Iterable[str]):
+        """
+        写回目录大小缓存，并清除长期未用到的记录
+
+        Args:
+            sizes: 本次重新计算的目录：路径 -> (目录修改时间, 大小)
+            used: 本次直接复用缓存的目录
+        """
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO dir_sizes VALUES (?, ?, ?, ?)",
+                    ((path, mtime, size, now) for path, (mtime, size) in sizes.items())
+                )
+                self._conn.executemany(
+                    "UPDATE dir_sizes SET seen = ? WHERE path = ?", ((now, path) for path in used)
+                )
+                self._conn.execute("DELETE FROM dir_sizes WHERE seen < ?", (now - _SIZE_EXPIRY,))
+
+    def load_locked(self, max_age: float) -> Dict[str, Tuple[int, float]]:
+        """
+        读取被占用文件的记录，先清除最后一次失败已超过 max_age 秒的记录
+
+        Returns:
+            规范化路径 -> (文件 ID, 修改时间)
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM locked_files WHERE seen < ?", (time.time() - max_age,))
+            rows = self._conn.execute("SELECT path, file_id, mtime FROM locked_files").fetchall()
+        return {path: (file_id, mtime) for path, file_id, mtime in rows}
+
+    def store_locked(self, failed: Dict[str, Tuple[int, float]], cleared: Iterable[str]):
+        """
+        写回被占用文件的记录
+
+        Args:
+            failed: 本次删除失败的文件：规范化路径 -> (文件 ID, 修改时间)
+            cleared: 已变化或已删除、不再需要跳过的文件
+        """
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO locked_files VALUES (?, ?, ?, 1, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET file_id = excluded.file_id, mtime = excluded.mtime, "
+                    "failures = failures + 1, seen = excluded.seen",
+                    ((path, file_id, mtime, now) for path, (file_id, mtime) in failed.items())
+                )
+                self._conn.executemany("DELETE FROM locked_files WHERE path = ?", ((path,) for path in cleared))
+
+    def locked_files(self, max_age: float) -> "LockedFileMemory":
+        """载入被占用文件的记录，供一次扫描或清理使用"""
+        return LockedFileMemory(self, max_age)
+
+    def size_cache(self) -> "DirSizeCache":
+        """为一次扫描创建目录大小缓存"""
+        return DirSizeCache(self)
+
+    def session(self, rule: str) -> "IndexSession":
+        """为一次扫描创建会话"""
+        return IndexSession(self, rule)
+
+    def clear(self):
+        """清空索引"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM dirs")
+                self._conn.execute("DELETE FROM item_stats")
+                self._conn.execute("DELETE FROM dir_sizes")
+                self._conn.execute("DELETE FROM locked_files")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class IndexSession:
+    """
+    单条规则的一次扫描会话
+
+    扫描开始时载入旧记录，扫描过程中收集新记录，扫描完整结束后调用 commit 写回。
+    """
+
+    def __init__(self, index: ScanIndex, rule: str):
+        self.index = index
+        self.rule = rule
+        self._cached = index.load(rule)
+        self._seen = set()
+        self._changed: Dict[str, DirRecord] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, path: str) -> Tuple[Optional[DirRecord], float]:
+        """
+        查询目录是否可以复用
+
+        Returns:
+            (可复用的记录或 None, 目录当前修改时间)
+        """
+        mtime = os.stat(path).st_mtime
+        record = self._cached.get(path)
+        with self._lock:
+            self._seen.add(path)
+        if record is not None and record.mtime == mtime:
+            return record, mtime
+        return None, mtime
+
+    def store(self, path: str, record: DirRecord):
+        """记录重新列举过的目录"""
+        with self._lock:
+            self._seen.add(path)
+            self._changed[path] = record
+
+    def commit(self):
+        """只写回有变化的记录，并清除已不再访问的目录"""
+        with self._lock:
+            changed = dict(self._changed)
+            removed = [path for path in self._cached if path not in self._seen]
+        self.index.update(self.rule, changed, removed)
+
+
+class DirSizeCache:
+    """
+    一次扫描使用的目录大小缓存
+
+    以路径和目录修改时间为键：过期的开发者项目通常不再变化，再次扫描时无需重新遍历计算大小。
+    扫描完整结束后调用 commit 写回。
+    """
+
+    def __init__(self, index: ScanIndex):
+        self.index = index
+        self._cached = index.load_dir_sizes()
+        self._used = set()
+        self._changed: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, mtime: float) -> Optional[int]:
+        """目录修改时间与缓存一致时返回缓存的大小，否则返回 None"""
+        cached = self._cached.get(path)
+        if cached is None or cached[0] != mtime:
+            return None
+        with self._lock:
+            self._used.add(path)
+        return cached[1]
+
+    def put(self, path: str, mtime: float, size: int):
+        with self._lock:
+            self._changed[path] = (mtime, size)
+
+    def commit(self):
+        with self._lock:
+            changed = dict(self._changed)
+            used = list(self._used)
+        self.index.store_dir_sizes(changed, used)
+
+
+class LockedFileMemory:
+    """
+    删除时被占用的文件
+
+    以路径为键，并记录失败时的文件 ID 和修改时间：文件变化（被重写或替换）后不再跳过，
+    记录在最后一次失败后超过 max_age 秒也会过期，届时重新尝试删除。
+    可在多个线程中查询，调用 commit 写回本次的变化。
+    """
+
+    def __init__(self, index: ScanIndex, max_age: float):
+        self.index = index
+        self._cached = index.load_locked(max_age)
+        self._failed: Dict[str, Tuple[int, float]] = {}
+        self._cleared = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cached)
+
+    def is_locked(self, path: str, file_id: int, mtime: float) -> bool:
+        """
+        文件是否应跳过
+
+        Args:
+            path: 文件路径
+            file_id: 扫描时的文件 ID（0 表示未知，不参与比较）
+            mtime: 扫描时的修改时间
+        """
+        if not self._cached:
+            return False
+        key = os.path.normcase(path)
+        cached = self._cached.get(key)
+        if cached is None:
+            return False
+        if cached[1] == mtime and (not file_id or not cached[0] or cached[0] == file_id):
+            return True
+        # 文件已变化，之后按正常文件处理
+        with self._lock:
+            self._cleared.add(key)
+        return False
+
+    def add(self, path: str, file_id: int, mtime: float):
+        """记录一次因文件被占用而失败的删除"""
+        key = os.path.normcase(path)
+        with self._lock:
+            self._failed[key] = (file_id, mtime)
+            self._cleared.discard(key)
+
+    def commit(self):
+        with self._lock:
+            failed = dict(self._failed)
+            cleared = [key for key in self._cleared if key not in failed]
+            self._failed.clear()
+            self._cleared.clear()
+        self.index.store_locked(failed, cleared)
@@ -0,0 +1,712 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 扫描计划
+汇总所有清理项的扫描根目录，合并相互嵌套的根目录，
+每个目录只列举一次，并同时对所有生效的规则进行匹配
+"""
+
+import copy
+import fnmatch
+import os
+import re
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from utils.dir_tree import DirTree
+from utils.pathstore import KIND_DIR, KIND_FILE
+from utils.scan_index import DirRecord, DirSizeCache, IndexSession
+from utils.walker import TreeWalker
+
+
+class FileRule:
+    """
+    文件匹配规则：根目录下满足全部条件的文件
+
+    清理项配置在构造时编译一次。逐个文件判断时条件按代价从低到高排列：
+    扩展名（集合查找）→ 文件名通配符 → 路径子串 → 路径正则 → 大小 / 修改时间，
+    只有前面的条件都满足、且规则确实需要时才读取文件元数据。
+    include / exclude 按相对根目录的路径在进入子目录时判断一次，不增加逐文件的开销。
+    """
+
+    __slots__ = (
+        "item_id", "root", "extensions", "names", "pattern", "path_regex",
+        "min_size", "max_mtime", "include", "exclude", "needs_stat", "active",
+        "_spec", "_root_len", "_inside"
+    )
+
+    def __init__(
+        self,
+        item_id: str,
+        root: str,
+        extensions: Iterable[str] = None,
+        pattern: str = None,
+        names: Iterable[str] = None,
+        path_regex: str = None,
+        min_size: int = 0,
+        min_age_days: Optional[float] = None,
+        include: Iterable[str] = None,
+        exclude: Iterable[str] = None,
+        now: Optional[float] = None
+    ):
+        """
+        Args:
+            item_id: 清理项 ID
+            root: 根目录
+            extensions: 扩展名（含点，不区分大小写）
+            pattern: 完整路径中需包含的子串（不区分大小写）
+            names: 文件名通配符，如 "thumbcache_*.db"，满足任意一个即可
+            path_regex: 完整路径需匹配的正则表达式（search，不区分大小写）
+            min_size: 最小文件大小（字节）
+            min_age_days: 文件至少多少天未修改
+            include: 子目录通配符（相对根目录，以 / 分隔），设置后只匹配这些子目录之下的文件
+            exclude: 子目录通配符（相对根目录，以 / 分隔），匹配的子目录整体跳过
+            now: 计算文件年龄的当前时间，默认为构造时的时间
+        """
+        self.item_id = item_id
+        self.root = root
+        self.extensions: Optional[FrozenSet[str]] = frozenset(e.lower() for e in extensions) if extensions else None
+        self.names = _compile_globs(names)
+        self.pattern = pattern.lower() if pattern else None
+        self.path_regex = re.compile(path_regex, re.IGNORECASE).search if path_regex else None
+        self.min_size = min_size or 0
+        self.max_mtime = (now if now is not None else time.time()) - min_age_days * 86400 if min_age_days else None
+        self.include = _compile_globs(include)
+        self.exclude = _compile_globs(exclude)
+        self.needs_stat = bool(self.min_size) or self.max_mtime is not None
+        # 设置了 include 时，进入匹配的子目录之前规则只用于继续向下遍历
+        self.active = self.include is None
+        self._spec = (
+            sorted(self.extensions) if self.extensions else None, pattern, sorted(names) if names else None,
+            path_regex, min_size, min_age_days, sorted(include) if include else None,
+            sorted(exclude) if exclude else None
+        )
+        self._root_len = len(os.path.normpath(root).rstrip("\\/")) + 1
+        self._inside: Optional["FileRule"] = None
+
+    @classmethod
+    def from_item(cls, item: dict, root: str, now: Optional[float] = None) -> "FileRule":
+        """按清理项配置编译规则"""
+        return cls(
+            item["id"],
+            root,
+            item.get("extensions"),
+            item.get("pattern"),
+            names=item.get("names"),
+            path_regex=item.get("path_regex"),
+            min_size=item.get("min_size", 0),
+            min_age_days=item.get("min_age_days"),
+            include=item.get("include"),
+            exclude=item.get("exclude"),
+            now=now
+        )
+
+    @property
+    def cacheable(self) -> bool:
+        """大小与年龄条件可能在目录修改时间不变的情况下改变结果，不能复用增量索引的匹配记录"""
+        return not self.needs_stat
+
+    @property
+    def scoped(self) -> bool:
+        return self.include is not None or self.exclude is not None
+
+    @property
+    def unfiltered(self) -> bool:
+        """没有任何过滤条件，根目录下的每个文件都匹配"""
+        return (
+            self.extensions is None and self.names is None and self.pattern is None and self.path_regex is None
+            and not self.needs_stat and self.include is None and self.exclude is None
+        )
+
+    def descend(self, path: str) -> Optional["FileRule"]:
+        """
+        进入子目录时的规则
+
+        Returns:
+            该子目录下生效的规则；子目录被排除时为 None
+        """
+        if self.include is None and self.exclude is None:
+            return self
+        relative = path[self._root_len:].replace("\\", "/").lower()
+        if self.exclude is not None and self.exclude(relative):
+            return None
+        if self.active or not self.include(relative):
+            return self
+        if self._inside is None:
+            inside = copy.copy(self)
+            inside.active = True
+            self._inside = inside
+        return self._inside
+
+    def matches(self, entry, st: Optional[os.stat_result] = None) -> bool:
+        """
+        单独判断一个文件是否命中（遍历时对多条规则的批量判定见 _PlanRun._handle_file）
+
+        Args:
+            entry: 具有 name / path / stat() 的目录项
+            st: 已读取的元数据，规则需要时才会调用 entry.stat()
+        """
+        if not self.active:
+            return False
+        name = entry.name
+        if self.extensions is not None and _suffix(name) not in self.extensions:
+            return False
+        if self.names is not None and not self.names(name):
+            return False
+        if self.pattern is not None and self.pattern not in entry.path.lower():
+            return False
+        if self.path_regex is not None and not self.path_regex(entry.path):
+            return False
+        if self.needs_stat:
+            return self.accepts_stat(st if st is not None else entry.stat(follow_symlinks=False))
+        return True
+
+    def accepts_stat(self, st: os.stat_result) -> bool:
+        if st.st_size < self.min_size:
+            return False
+        return self.max_mtime is None or st.st_mtime <= self.max_mtime
+
+    def signature(self) -> str:
+        return f"F|{self.item_id}|{self.root}|{self._spec}"
+
+
+def _compile_globs(globs: Optional[Iterable[str]]) -> Optional[Callable[[str], object]]:
+    """把一组通配符合并为一个不区分大小写的正则，返回其 match 方法"""
+    if not globs:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(g)})" for g in globs), re.IGNORECASE).match
+
+
+def _suffix(name: str) -> str:
+    """与 os.path.splitext 相同的扩展名（小写）：只有以点开头的文件名才需要额外检查"""
+    dot = name.rfind(".")
+    if dot <= 0 or (name[0] == "." and not name[:dot].strip(".")):
+        return ""
+    return name[dot:].lower()
+
+
+class DirRule:
+    """目录匹配规则：在限定深度内查找超过阈值未修改的指定名称目录（开发者项目中间件）"""
+
+    __slots__ = ("item_id", "root", "targets", "threshold", "max_depth", "skip_dirs", "now")
+
+    def __init__(
+        self,
+        item_id: str,
+        root: str,
+        targets: Iterable[str],
+        threshold: float,
+        max_depth: int,
+        skip_dirs: Iterable[str],
+        now: float
+    ):
+        self.item_id = item_id
+        self.root = root
+        self.targets = frozenset(t.lower() for t in targets)
+        self.threshold = threshold
+        self.max_depth = max_depth
+        self.skip_dirs = frozenset(skip_dirs)
+        self.now = now
+
+    def signature(self) -> str:
+        return f"D|{self.item_id}|{self.root}|{sorted(self.targets)}|{self.max_depth}|{sorted(self.skip_dirs)}"
+
+
+# 目录上下文: (生效的文件规则, [(目录规则, 相对深度)], 其下尚未进入的嵌套根目录, 所属根目录)
+_Context = Tuple[Tuple[FileRule, ...], Tuple[Tuple[DirRule, int], ...], Tuple[str, ...], str]
+
+
+def _root_key(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+
+def _under(key: str) -> str:
+    """返回用于判断子路径的前缀"""
+    return key if key.endswith(os.sep) else key + os.sep
+
+
+class _CachedEntry:
+    """索引中记录的子目录，提供与 os.DirEntry 相同的 name/path/stat 接口"""
+
+    __slots__ = ("name", "path")
+
+    def __init__(self, prefix: str, name: str):
+        self.name = name
+        self.path = prefix + name
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        return os.stat(self.path, follow_symlinks=follow_symlinks)
+
+
+class _VisitCounters:
+    """单个目录的访问计数，目录处理完后一次性计入各清理项的指标"""
+
+    __slots__ = ("entries", "stat_calls", "permission_denied", "os_errors", "cached")
+
+    def __init__(self):
+        self.entries = 0
+        self.stat_calls = 0
+        self.permission_denied = 0
+        self.os_errors = 0
+        self.cached = False
+
+    def error(self, e: OSError):
+        if isinstance(e, PermissionError):
+            self.permission_denied += 1
+        else:
+            self.os_errors += 1
+
+
+class ScanPlan:
+    """
+    扫描计划
+
+    根目录按规范化路径合并：完全相同的根目录共享一次遍历，
+    嵌套在其他根目录之下的根目录不单独遍历，而是在外层遍历到达时附加其规则。
+    """
+
+    def __init__(self, rules: List[object]):
+        self.rules = rules
+        self._rules_at: Dict[str, List[object]] = {}
+        self._path_of: Dict[str, str] = {}
+        for rule in rules:
+            key = _root_key(rule.root)
+            self._rules_at.setdefault(key, []).append(rule)
+            self._path_of.setdefault(key, os.path.normpath(rule.root))
+
+        keys = sorted(self._rules_at)
+        self.top_keys = self._topmost(keys)
+        # 每个根目录的外层根目录，用于逐层汇报完成进度
+        self._parent_of: Dict[str, Optional[str]] = {}
+        for key in keys:
+            outer = [other for other in keys if other != key and key.startswith(_under(other))]
+            self._parent_of[key] = max(outer, key=len) if outer else None
+
+    @staticmethod
+    def _topmost(keys: Iterable[str]) -> List[str]:
+        """从有序路径列表中选出不被其他路径包含的路径"""
+        result = []
+        for key in sorted(keys, key=len):
+            if any(key.startswith(_under(outer)) for outer in result):
+                continue
+            result.append(key)
+        return sorted(result)
+
+    @property
+    def root_keys(self) -> List[str]:
+        """合并后的全部根目录（规范化路径），每个根目录是一个进度单位"""
+        return list(self._rules_at)
+
+    def rules_at(self, key: str) -> List[object]:
+        return self._rules_at.get(key, [])
+
+    def signature(self) -> str:
+        """计划签名，规则变化后增量索引不再适用"""
+        return "\n".join(sorted(rule.signature() for rule in self.rules))
+
+    def _root_context(self, key: str, files=(), dirs=()) -> _Context:
+        files = tuple(files) + tuple(r for r in self._rules_at[key] if isinstance(r, FileRule))
+        dirs = tuple(dirs) + tuple((r, 0) for r in self._rules_at[key] if isinstance(r, DirRule))
+        prefix = _under(key)
+        nested = tuple(k for k in self._rules_at if k.startswith(prefix))
+        return files, dirs, nested, key
+
+    def execute(
+        self,
+        walker: TreeWalker,
+        results: Dict[str, object],
+        sizer: Callable[[str], int],
+        session: Optional[IndexSession] = None,
+        on_root_done: Callable[[str], None] = None,
+        on_match: Callable[[str, str, str, int, float, int, int], None] = None,
+        keep_files: bool = True,
+        size_cache: Optional[DirSizeCache] = None,
+        size_workers: int = 4,
+        tree: Optional[DirTree] = None,
+        skip: Optional[Callable[[str, int, float], bool]] = None
+    ):
+        """
+        执行扫描计划
+
+        Args:
+            walker: 遍历器
+            results: 按清理项 ID 索引的扫描结果（需有 total_size/file_count/files/metrics 属性）
+            sizer: 计算目录大小的函数，在独立的线程池中对识别出的目标目录并发调用
+            session: 增量索引会话
+            on_root_done: 某个根目录（含其嵌套根目录）扫描完成时的回调，参数为规范化路径
+            on_match: 每次命中时的回调，参数为(清理项 ID, 父目录前缀, 名称, 大小, 修改时间, 文件 ID, 记录类型)；
+                在遍历线程中调用且不持有计划的锁，可能被多个线程并发调用
+            keep_files: 是否把命中的路径保存到扫描结果中
+            size_cache: 目录大小缓存，目标目录修改时间未变化时不再重新计算大小
+            size_workers: 计算目标目录大小的线程数
+            tree: 目录聚合表，提供时记录每个列举过的目录，目标目录的大小也改为在表中遍历得出
+            skip: 命中的文件是否应跳过，参数为(路径, 文件 ID, 修改时间)，如已知被占用的文件
+        """
+        _PlanRun(
+            self, results, sizer, session, on_root_done, on_match, keep_files, size_cache, tree, skip
+        ).run(walker, size_workers)
+
+
+class _PlanRun:
+    """单次执行扫描计划的状态"""
+
+    def __init__(
+        self, plan: ScanPlan, results, sizer, session, on_root_done, on_match, keep_files, size_cache, tree, skip
+    ):
+        self.plan = plan
+        self.results = results
+        self.sizer = sizer
+        self.session = session
+        self.size_cache = size_cache
+        self.on_root_done = on_root_done
+        self.on_match = on_match
+        self.keep_files = keep_files
+        self.tree = tree
+        self.skip = skip
+        self.lock = threading.Lock()
+        # 每个根目录尚未完成的目录数、嵌套根目录数与尚未算出大小的目标目录数
+        self.outstanding: Dict[str, int] = {}
+
+    def run(self, walker: TreeWalker, size_workers: int):
+        self.walker = walker
+        roots = []
+        for key in self.plan.top_keys:
+            self.outstanding[key] = 1
+            roots.append((self.plan._path_of[key], self.plan._root_context(key)))
+        # 识别与计算大小分为两个阶段：遍历线程只负责识别目标目录，
+        # 大小在线程池中并发计算，不会阻塞对其余目录的遍历
+        with ThreadPoolExecutor(max_workers=max(1, size_workers), thread_name_prefix="sizer") as pool:
+            self.size_pool = pool
+            walker.traverse(roots, self.visit)
+
+    # ---------- 进度统计 ----------
+
+    def _enter_root(self, key: str):
+        """开始遍历嵌套根目录：它本身计一个目录，同时作为外层根目录的一项未完成工作"""
+        with self.lock:
+            self.outstanding[key] = self.outstanding.get(key, 0) + 1
+            parent = self.plan._parent_of[key]
+            if parent is not None:
+                self.outstanding[parent] = self.outstanding.get(parent, 0) + 1
+
+    def _finish(self, key: str, delta: int):
+        finished = []
+        with self.lock:
+            self.outstanding[key] += delta
+            while key is not None and self.outstanding[key] == 0:
+                finished.append(key)
+                key = self.plan._parent_of[key]
+                if key is not None:
+                    self.outstanding[key] -= 1
+        if self.on_root_done:
+            for done in finished:
+                self.on_root_done(done)
+
+    # ---------- 遍历 ----------
+
+    def visit(self, path: str, depth: int, context: _Context) -> List[Tuple[str, _Context]]:
+        children: List[Tuple[str, _Context]] = []
+        counters = _VisitCounters()
+        try:
+            self._visit(path, context, children, counters)
+        finally:
+            self._record(context, counters)
+            # 遍历被中止时目录可能只列举了一部分，不能据此认定根目录已完成
+            if not self.walker.is_cancelled():
+                # 进入新的嵌套根目录的子目录已在 _enter_root 中计数
+                same_unit = sum(1 for _, child in children if child[3] == context[3])
+                self._finish(context[3], same_unit - 1)
+        return children
+
+    def _record(self, context: _Context, counters: _VisitCounters):
+        """把目录的访问计数计入所有在此目录生效的清理项"""
+        owners = {rule.item_id for rule in context[0]}
+        owners.update(rule.item_id for rule, _ in context[1])
+        with self.lock:
+            for owner in owners:
+                metrics = self.results[owner].metrics
+                metrics.dirs_visited += 1
+                metrics.dirs_cached += counters.cached
+                metrics.entries += counters.entries
+                metrics.stat_calls += counters.stat_calls
+                metrics.permission_denied += counters.permission_denied
+                metrics.os_errors += counters.os_errors
+
+    def _visit(
+        self, path: str, context: _Context, children: List[Tuple[str, _Context]], counters: _VisitCounters
+    ):
+        files = context[0]
+        prefix = path if path.endswith(("\\", "/")) else path + os.sep
+        session = self.session
+        record = mtime = None
+
+        if session is not None and all(rule.cacheable for rule in files):
+            counters.stat_calls += 1
+            try:
+                record, mtime = session.lookup(path)
+            except OSError:
+                record, mtime = None, None
+
+        if record is not None:
+            counters.cached = True
+            # 目录未变化：复用上次的匹配结果，子目录仍按当前规则重新判定
+            owners = {rule.item_id for rule in files}
+            matches = [
+                match for match in zip(
+                    record.owners, record.names, record.sizes, record.file_mtimes, record.file_ids
+                )
+                if match[0] in owners
+            ]
+            if self.skip is not None:
+                matches = [self._refresh_skipped(prefix, match, counters) for match in matches]
+            self._credit_all([
+                (owner, prefix, name, size, file_mtime, file_id, KIND_FILE)
+                for owner, name, size, file_mtime, file_id in matches
+            ])
+            for name in record.subdirs:
+                try:
+                    self._handle_dir(_CachedEntry(prefix, name), context, children, counters)
+                except OSError as e:
+                    counters.error(e)
+            return
+
+        match_owners: List[str] = []
+        match_names: List[str] = []
+        match_sizes = array("q")
+        match_mtimes = array("d")
+        match_ids = array("Q")
+        subdirs: List[str] = []
+        entry_count = 0
+        tree = self.tree
+        node = tree.add(path) if tree is not None else None
+        own_bytes = own_files = 0
+
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if self.walker.is_cancelled():
+                        return
+                    entry_count += 1
+                    counters.entries += 1
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            st = None
+                            if tree is not None:
+                                # 已读取的元数据交给规则匹配复用，每个文件只计一次 stat
+                                counters.stat_calls += 1
+                                st = entry.stat(follow_symlinks=False)
+                                own_bytes += st.st_size
+                                own_files += 1
+                            if files:
+                                counters.stat_calls += self._handle_file(
+                                    entry, files, prefix, match_owners, match_names, match_sizes, match_mtimes, match_ids, st
+                                )
+                        elif entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            self._handle_dir(entry, context, children, counters)
+                    except OSError as e:
+                        # 跳过无权限访问的目录项
+                        counters.error(e)
+                        continue
+        except OSError as e:
+            counters.error(e)
+            if entry_count:
+                return
+            # 目录无法列举时，其下的嵌套根目录仍可能直接访问
+            for nested_key in ScanPlan._topmost(context[2]):
+                self._enter_root(nested_key)
+                children.append((self.plan._path_of[nested_key], self.plan._root_context(nested_key)))
+            return
+
+        if tree is not None:
+            tree.set_listing(node, own_bytes, own_files, len(subdirs))
+        if session is not None and mtime is not None:
+            session.store(path, DirRecord(
+                mtime, entry_count, match_names, match_sizes, subdirs, match_owners, match_mtimes, match_ids
+            ))
+
+    def _handle_file(
+        self, entry: os.DirEntry, files, prefix, match_owners, match_names, match_sizes, match_mtimes, match_ids,
+        known_st: Optional[os.stat_result] = None
+    ) -> int:
+        """
+        对文件依次检查所有生效的文件规则，条件按代价从低到高判断，元数据最多读取一次
+
+        Args:
+            known_st: 调用方已读取的元数据，提供时不再计入 stat 次数
+
+        Returns:
+            本方法发起的 stat 调用次数
+        """
+        name = entry.name
+        ext = None
+        path_lower = None
+        st = known_st
+        matched = None
+
+        for rule in files:
+            if not rule.active:
+                continue
+            if rule.extensions is not None:
+                if ext is None:
+                    ext = _suffix(name)
+                if ext not in rule.extensions:
+                    continue
+            if rule.names is not None and not rule.names(name):
+                continue
+            if rule.pattern is not None:
+                if path_lower is None:
+                    path_lower = entry.path.lower()
+                if rule.pattern not in path_lower:
+                    continue
+            if rule.path_regex is not None and not rule.path_regex(entry.path):
+                continue
+            if rule.needs_stat:
+                if st is None:
+                    st = entry.stat(follow_symlinks=False)
+                if not rule.accepts_stat(st):
+                    continue
+            if matched is None:
+                matched = [rule.item_id]
+            elif rule.item_id not in matched:
+                # 同一清理项的根目录相互嵌套时，文件只计一次
+                matched.append(rule.item_id)
+
+        stat_calls = 0 if st is None or st is known_st else 1
+        if matched is None:
+            return stat_calls
+
+        # 清理时复用这里的大小、修改时间和文件 ID，不再重复 stat
+        if st is None:
+            st = entry.stat(follow_symlinks=False)
+            stat_calls = 1
+        size = st.st_size
+        self._credit_all([(owner, prefix, name, size, st.st_mtime, st.st_ino, KIND_FILE) for owner in matched])
+        for owner in matched:
+            match_owners.append(owner)
+            match_names.append(name)
+            match_sizes.append(size)
+            match_mtimes.append(st.st_mtime)
+            match_ids.append(st.st_ino)
+        return stat_calls
+
+    def _handle_dir(
+        self, entry, context: _Context, children: List[Tuple[str, _Context]], counters: _VisitCounters
+    ):
+        """计算子目录的上下文，决定是否以及如何继续遍历"""
+        files, dirs, nested, unit = context
+        name_lower = entry.name.lower()
+        if files and any(rule.scoped for rule in files):
+            files = tuple(child for child in (rule.descend(entry.path) for rule in files) if child is not None)
+
+        child_dirs = []
+        for rule, depth in dirs:
+            # 检查是否为目标清理目录
+            if name_lower in rule.targets and self._check_target(rule, entry, unit, counters):
+                # 识别到目标后，不再进入该目录深层
+                continue
+            if name_lower in rule.skip_dirs or entry.name.startswith('.'):
+                continue
+            if depth < rule.max_depth:
+                child_dirs.append((rule, depth + 1))
+
+        if not nested:
+            if files or child_dirs:
+                children.append((entry.path, (files, tuple(child_dirs), (), unit)))
+            return
+
+        key = os.path.normcase(entry.path)
+        child_nested = tuple(k for k in nested if k.startswith(_under(key)))
+
+        if key in nested:
+            # 到达嵌套的根目录，附加其规则
+            self._enter_root(key)
+            children.append((entry.path, self.plan._root_context(key, files, child_dirs)))
+        elif files or child_dirs:
+            children.append((entry.path, (files, tuple(child_dirs), child_nested, unit)))
+        else:
+            # 当前没有生效的规则，直接跳到其下的嵌套根目录，不列举中间目录
+            for nested_key in ScanPlan._topmost(child_nested):
+                self._enter_root(nested_key)
+                children.append((self.plan._path_of[nested_key], self.plan._root_context(nested_key)))
+
+    def _check_target(self, rule: DirRule, entry, unit: str, counters: _VisitCounters) -> bool:
+        """检查目标目录是否已过期，过期时提交计算大小"""
+        counters.stat_calls += 1
+        st = entry.stat(follow_symlinks=False)
+        # 如果文件夹超过阈值未更新，记录
+        if (rule.now - st.st_mtime) <= rule.threshold:
+            return False
+        # 大小算出之前根目录不算完成
+        with self.lock:
+            self.outstanding[unit] += 1
+        self.size_pool.submit(self._size_target, rule.item_id, entry.path, entry.name, st, unit)
+        return True
+
+    def _size_target(self, item_id: str, path: str, name: str, st: os.stat_result, unit: str):
+        """计算目标目录大小并计入结果（在线程池中执行）"""
+        try:
+            if self.walker.is_cancelled():
+                return
+            size = self.size_cache.get(path, st.st_mtime) if self.size_cache is not None else None
+            if size is not None and self.tree is not None:
+                self.tree.add_sized(path, size)
+            if size is None:
+                size = self.tree.measure(path, self.walker.is_cancelled) if self.tree is not None else self.sizer(path)
+                # 被中止时只算出了部分大小，不能缓存
+                if self.walker.is_cancelled():
+                    return
+                if self.size_cache is not None:
+                    self.size_cache.put(path, st.st_mtime, size)
+            self._credit_all([(item_id, path[:len(path) - len(name)], name, size, st.st_mtime, st.st_ino, KIND_DIR)])
+        except Exception:
+            # 与遍历中的目录项一致，无法访问的目标目录直接跳过
+            pass
+        finally:
+            if not self.walker.is_cancelled():
+                self._finish(unit, -1)
+
+    def _refresh_skipped(
+        self, prefix: str, match: Tuple[str, str, int, float, int], counters: _VisitCounters
+    ) -> Tuple[str, str, int, float, int]:
+        """
+        索引中的文件元数据在目录修改时间不变时可能已过期（文件被改写或 touch 不改变目录）。
+        按记录会被跳过的文件重新 lstat 一次，变化后按当前状态判定和计入，不必等待记录过期。
+        """
+        owner, name, size, file_mtime, file_id = match
+        if not self.skip(prefix + name, file_id, file_mtime):
+            return match
+        counters.stat_calls += 1
+        try:
+            st = os.lstat(prefix + name)
+        except OSError:
+            return match
+        return owner, name, st.st_size, st.st_mtime, st.st_ino or file_id
+
+    def _credit_all(self, matches: List[Tuple[str, str, str, int, float, int, int]]):
+        """
+        计入一组命中，元素与命中回调的参数相同
+
+        结果在锁内累加，命中回调在释放锁之后调用：回调阻塞时（如流式输出的有界队列已满）
+        只有当前线程等待，其余遍历线程照常进行。
+        """
+        with self.lock:
+            credited = [match for match in matches if self._credit(*match)]
+        if self.on_match:
+            for match in credited:
+                self.on_match(*match)
+
+    def _credit(self, item_id: str, prefix: str, name: str, size: int, mtime: float, file_id: int, kind: int) -> bool:
+        """把一次命中计入结果（需持有锁），返回是否计入"""
+        result = self.results[item_id]
+        if self.skip is not None and kind == KIND_FILE and self.skip(prefix + name, file_id, mtime):
+            # 仍记入索引，文件解除占用后无需重新列举目录即可再次命中
+            result.metrics.locked_skipped += 1
+            return False
+        result.total_size += size
+        result.file_count += 1
+        if self.keep_files:
+            result.files.add(prefix, name, size, mtime, file_id, kind)
+        return True
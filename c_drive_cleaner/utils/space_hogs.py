@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 空间大户分析
+一次遍历整个驱动器，用固定大小的最小堆保留最大的 N 个文件和 N 个目录；
+目录大小自底向上汇总，子树统计完毕即释放，内存占用与文件数量无关
+"""
+
+import heapq
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from utils.walker import TreeWalker
+
+
+# Windows 上的重分析点（目录联接、符号链接等），不进入以免重复计数或陷入循环
+_FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+
+
+@dataclass
+class SpaceHog:
+    """一个大文件或大目录"""
+    path: str
+    size: int
+    # 目录下（含子目录）的文件数，文件项为 1
+    file_count: int = 1
+
+
+@dataclass
+class SpaceHogReport:
+    """空间大户分析结果"""
+    # 按大小从大到小排列
+    files: List[SpaceHog] = field(default_factory=list)
+    dirs: List[SpaceHog] = field(default_factory=list)
+    total_size: int = 0
+    file_count: int = 0
+    dir_count: int = 0
+    # 为 False 时分析被取消，未统计完的目录不会出现在目录排行中
+    complete: bool = True
+    elapsed: float = 0.0
+
+
+class _DirNode:
+    """尚未统计完的目录"""
+
+    __slots__ = ("path", "parent", "size", "files", "pending")
+
+    def __init__(self, path: str, parent: Optional["_DirNode"]):
+        self.path = path
+        self.parent = parent
+        self.size = 0
+        self.files = 0
+        # 自身的列举 + 尚未统计完的子目录数，降为 0 时整棵子树统计完毕
+        self.pending = 1
+
+
+class SpaceHogFinder:
+    """
+    空间大户查找器
+
+    遍历器按深度优先处理各线程自己的队列，同一时刻未统计完的目录只有当前路径上的祖先
+    及其待处理的兄弟目录，因此内存只与目录树的深度和宽度有关。
+    子目录统计完毕时把大小加到父目录并尝试放入目录堆，随后即可被回收。
+    """
+
+    def __init__(
+        self,
+        top_n: int = 50,
+        workers: int = 4,
+        cancel_check: Callable[[], bool] = None
+    ):
+        """
+        Args:
+            top_n: 文件与目录排行各保留的数量
+            workers: 遍历目录树的线程数
+            cancel_check: 取消检查函数
+        """
+        self.top_n = max(1, top_n)
+        self.workers = max(1, workers)
+        self.cancel_check = cancel_check
+        self._lock = threading.Lock()
+        # (大小, 路径, 文件数) 的最小堆，堆顶为当前排行中最小的一项
+        self._file_heap: List[Tuple[int, str, int]] = []
+        self._dir_heap: List[Tuple[int, str, int]] = []
+        # 文件堆已满时的入堆门槛，在锁外读取作为快速过滤（偶尔读到旧值只会多进一次锁）
+        self._file_floor = -1
+        self._report = SpaceHogReport()
+
+    def find(self, roots: List[str]) -> SpaceHogReport:
+        """
+        分析若干根目录（通常是驱动器根目录）
+
+        Args:
+            roots: 根目录列表
+
+        Returns:
+            分析结果；根目录本身不计入目录排行
+        """
+        started = time.monotonic()
+        self._file_heap = []
+        self._dir_heap = []
+        self._file_floor = -1
+        self._report = SpaceHogReport()
+
+        walker = TreeWalker(workers=self.workers, cancel_check=self.cancel_check)
+        walker.traverse(((root, _DirNode(root, None)) for root in roots), self._visit)
+
+        report = self._report
+        report.files = [SpaceHog(path, size, count) for size, path, count in sorted(self._file_heap, reverse=True)]
+        report.dirs = [SpaceHog(path, size, count) for size, path, count in sorted(self._dir_heap, reverse=True)]
+        report.complete = not (self.cancel_check and self.cancel_check())
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def _visit(self, path: str, depth: int, node: _DirNode) -> List[Tuple[str, _DirNode]]:
+        """列举单个目录：累计文件大小，筛出可能进入排行的大文件，返回子目录"""
+        size = 0
+        count = 0
+        big_files: List[Tuple[int, str, int]] = []
+        children: List[Tuple[str, _DirNode]] = []
+        floor = self._file_floor
+        listed = True
+
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            file_size = entry.stat(follow_symlinks=False).st_size
+                            size += file_size
+                            count += 1
+                            if file_size > floor:
+                                big_files.append((file_size, entry.path, 1))
+                        elif entry.is_dir(follow_symlinks=False) and not self._is_reparse(entry):
+                            children.append((entry.path, _DirNode(entry.path, node)))
+                    except OSError:
+                        continue
+        except OSError:
+            # 无权访问的目录按空目录汇总，父目录仍可统计完毕
+            children = []
+            listed = False
+
+        if self.cancel_check and self.cancel_check():
+            # 子树不完整，不再向上汇总
+            return []
+
+        with self._lock:
+            report = self._report
+            report.total_size += size
+            report.file_count += count
+            report.dir_count += listed
+            for item in big_files:
+                self._push(self._file_heap, item)
+            if len(self._file_heap) >= self.top_n:
+                self._file_floor = self._file_heap[0][0]
+
+            node.size += size
+            node.files += count
+            node.pending += len(children) - 1
+            if node.pending == 0:
+                self._complete(node)
+        return children
+
+    def _complete(self, node: _DirNode):
+        """子树统计完毕：放入目录堆并汇总到父目录，父目录也完毕时继续向上（需持有锁）"""
+        while node is not None and node.pending == 0:
+            parent = node.parent
+            if parent is None:
+                return
+            self._push(self._dir_heap, (node.size, node.path, node.files))
+            parent.size += node.size
+            parent.files += node.files
+            parent.pending -= 1
+            node = parent
+
+    def _push(self, heap: List[Tuple[int, str, int]], item: Tuple[int, str, int]):
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    @staticmethod
+    def _is_reparse(entry: os.DirEntry) -> bool:
+        """Windows 下目录项自带属性，无需额外系统调用"""
+        if os.name != "nt":
+            return False
+        attributes = getattr(entry.stat(follow_symlinks=False), "st_file_attributes", 0)
+        return bool(attributes & _FILE_ATTRIBUTE_REPARSE_POINT)
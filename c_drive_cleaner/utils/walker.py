@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+C盘清理工具 - 目录遍历引擎
+使用显式工作队列代替递归，多个线程之间可以互相窃取任务
+"""
+
+import os
+import random
+import threading
+from collections import deque
+from typing import Any, Callable, Iterable, List, Optional, Set, Tuple
+
+
+# 文件回调: (目录项, 所在目录深度)
+FileVisitor = Callable[[os.DirEntry, int], None]
+# 目录回调: (目录项, 所在目录深度) -> 是否继续深入该目录
+DirVisitor = Callable[[os.DirEntry, int], bool]
+# 进入目录回调: (目录路径, 深度) -> 返回子目录列表时跳过对该目录的列举，返回 None 时正常列举
+EnterVisitor = Callable[[str, int], Optional[List[str]]]
+# 离开目录回调: (目录路径, 深度, 目录项数量, 将继续遍历的子目录列表)
+ExitVisitor = Callable[[str, int, int, List[str]], None]
+# 底层目录处理函数: (目录路径, 深度, 上下文) -> [(子目录路径, 子目录上下文), ...]
+DirHandler = Callable[[str, int, Any], List[Tuple[str, Any]]]
+
+
+class TreeWalker:
+    """迭代式并行目录遍历器"""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_depth: Optional[int] = None,
+        skip_dirs: Optional[Set[str]] = None,
+        cancel_check: Callable[[], bool] = None
+    ):
+        """
+        初始化遍历器
+
+        Args:
+            workers: 遍历线程数，1 表示只在调用线程中遍历
+            max_depth: 最大列举深度，根目录深度为 0，None 表示不限制（仅对 walk 生效）
+            skip_dirs: 需要剪枝的目录名集合（小写，仅对 walk 生效）
+            cancel_check: 取消检查函数，返回 True 时尽快停止遍历
+        """
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.skip_dirs = skip_dirs or set()
+        self.cancel_check = cancel_check
+
+    def walk(
+        self,
+        roots: Iterable[str],
+        on_file: FileVisitor = None,
+        on_dir: DirVisitor = None,
+        on_enter: EnterVisitor = None,
+        on_exit: ExitVisitor = None
+    ):
+        """
+        遍历一组根目录
+
+        回调可能在多个线程中同时被调用，调用方需要自行保证线程安全。
+        同一目录的 on_enter、各目录项回调和 on_exit 总是在同一线程中依次调用。
+        回调抛出的 PermissionError / OSError 只跳过当前目录项，其他异常会中止遍历并重新抛出。
+
+        Args:
+            roots: 根目录列表
+            on_file: 文件回调
+            on_dir: 目录回调，返回 False 时不再深入该目录
+            on_enter: 进入目录回调，可返回缓存的子目录列表以跳过列举
+            on_exit: 目录列举完成后的回调，列举失败的目录不会触发
+        """
+        visitor = _EntryVisitor(self, on_file, on_dir, on_enter, on_exit)
+        self.traverse(((root, None) for root in roots), visitor.visit)
+
+    def traverse(self, roots: Iterable[Tuple[str, Any]], handler: DirHandler):
+        """
+        以自定义处理函数遍历目录树
+
+        处理函数负责列举目录并返回需要继续遍历的子目录及其上下文，
+        遍历器只负责任务调度、线程间任务窃取和取消。
+
+        Args:
+            roots: [(根目录路径, 上下文), ...]
+            handler: 目录处理函数
+        """
+        roots = [(path, context) for path, context in roots if path]
+        if not roots:
+            return
+
+        walk = _Walk(self, handler, len(roots))
+        for index, (path, context) in enumerate(roots):
+            walk.queues[index % self.workers].append((path, 0, context))
+
+        threads = [
+            threading.Thread(target=walk.run, args=(index,), daemon=True, name=f"walker-{index}")
+            for index in range(1, self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        walk.run(0)
+        for thread in threads:
+            thread.join()
+
+        if walk.error is not None:
+            raise walk.error
+
+    def is_cancelled(self) -> bool:
+        return bool(self.cancel_check and self.cancel_check())
+
+
+class _Walk:
+    """单次遍历的共享状态"""
+
+    def __init__(self, walker: TreeWalker, handler: DirHandler, pending: int):
+        self.walker = walker
+        self.handler = handler
+        self.queues: List[deque] = [deque() for _ in range(walker.workers)]
+        # 已入队但尚未处理完的目录数，降为 0 时遍历结束
+        self.pending = pending
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.error: Optional[BaseException] = None
+
+    def run(self, index: int):
+        """工作线程主循环：优先处理自己队列尾部的任务，空闲时从其他队列头部窃取"""
+        own = self.queues[index]
+        walker = self.walker
+
+        while not self.stopped:
+            if walker.is_cancelled():
+                self._stop()
+                return
+
+            task = self._take(own, index)
+            if task is None:
+                with self.cond:
+                    if self.pending == 0 or self.stopped:
+                        self.cond.notify_all()
+                        return
+                    self.cond.wait(0.01)
+                continue
+
+            path, depth, context = task
+            children: List[Tuple[str, int, Any]] = []
+            try:
+                children = [
+                    (child, depth + 1, child_context)
+                    for child, child_context in self.handler(path, depth, context)
+                ]
+            except BaseException as e:
+                with self.cond:
+                    if self.error is None:
+                        self.error = e
+                self._stop()
+            finally:
+                if children:
+                    # 先计入子目录再放入队列：子目录可能立即被窃取并处理完，
+                    # 此前未计入会使 pending 提前归零，空闲线程随之退出
+                    with self.cond:
+                        self.pending += len(children)
+                    own.extend(children)
+                with self.cond:
+                    # 最后扣除当前目录
+                    self.pending -= 1
+                    if children or self.pending == 0:
+                        self.cond.notify_all()
+
+    def _take(self, own: deque, index: int) -> Optional[Tuple[str, int, Any]]:
+        """取出一个任务：自己队列按后进先出（深度优先，控制内存），窃取时取最早入队的大子树"""
+        try:
+            return own.pop()
+        except IndexError:
+            pass
+
+        count = len(self.queues)
+        if count == 1:
+            return None
+        start = random.randrange(count)
+        for offset in range(count):
+            victim = (start + offset) % count
+            if victim == index:
+                continue
+            try:
+                return self.queues[victim].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+
+
+class _EntryVisitor:
+    """把逐目录项回调适配为底层目录处理函数"""
+
+    def __init__(
+        self,
+        walker: TreeWalker,
+        on_file: FileVisitor,
+        on_dir: DirVisitor,
+        on_enter: EnterVisitor,
+        on_exit: ExitVisitor
+    ):
+        self.walker = walker
+        self.on_file = on_file
+        self.on_dir = on_dir
+        self.on_enter = on_enter
+        self.on_exit = on_exit
+
+    def visit(self, path: str, depth: int, context: Any) -> List[Tuple[str, Any]]:
+        """列举单个目录，返回需要继续遍历的子目录"""
+        walker = self.walker
+        on_file = self.on_file
+        on_dir = self.on_dir
+        skip_dirs = walker.skip_dirs
+        descend = walker.max_depth is None or depth < walker.max_depth
+
+        if self.on_enter:
+            cached = self.on_enter(path, depth)
+            if cached is not None:
+                return [(child, None) for child in cached] if descend else []
+
+        children = []
+        entry_count = 0
+
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if walker.is_cancelled():
+                        return children
+                    entry_count += 1
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            if on_file:
+                                on_file(entry, depth)
+                        elif entry.is_dir(follow_symlinks=False):
+                            if skip_dirs and entry.name.lower() in skip_dirs:
+                                continue
+                            if on_dir and on_dir(entry, depth) is False:
+                                continue
+                            if descend:
+                                children.append((entry.path, None))
+                    except (PermissionError, OSError):
+                        # 跳过无权限访问的目录项
+                        continue
+        except (PermissionError, OSError):
+            return children
+
+        if self.on_exit:
+            self.on_exit(path, depth, entry_count, [child for child, _ in children])
+        return children
+
+
+def get_dir_size(
+    path: str,
+    workers: int = 4,
+    cancel_check: Callable[[], bool] = None
+) -> int:
+    """
+    获取目录总大小
+
+    Args:
+        path: 目录路径
+        workers: 遍历线程数
+        cancel_check: 取消检查函数
+
+    Returns:
+        目录下所有文件的字节数之和
+    """
+    total = [0]
+    lock = threading.Lock()
+
+    def on_file(entry: os.DirEntry, depth: int):
+        size = entry.stat(follow_symlinks=False).st_size
+        with lock:
+            total[0] += size
+
+    TreeWalker(workers=workers, cancel_check=cancel_check).walk([path], on_file=on_file)
+    return total[0]